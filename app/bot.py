@@ -9,9 +9,17 @@ from aiogram.client.default import DefaultBotProperties
 from app.config import settings
 from app.handlers import setup_routers
 from app.logging_config import setup_logging
-from app.db.session import SessionLocal, create_all
+from app.db.session import SessionLocal, create_all, dispose_engines
 from app.utils.scheduler import AppScheduler
-from app.middlewares import InteractionLoggingMiddleware
+from app.services.job_queue import JobWorkerPool
+from app.services.interaction_log import InteractionLogBuffer
+from app.services import llm_jobs  # noqa: F401  # регистрирует обработчики фоновых задач
+from app.middlewares import (
+    DbSessionMiddleware,
+    InteractionLoggingMiddleware,
+    QueryTrackingMiddleware,
+    UserProfileMiddleware,
+)
 
 
 async def main() -> None:
@@ -23,13 +31,32 @@ async def main() -> None:
 
     bot = Bot(token=settings.BOT_TOKEN, default=DefaultBotProperties(parse_mode="HTML"))
     dp = Dispatcher()
-    dp.message.middleware(InteractionLoggingMiddleware())
+    interaction_log = InteractionLogBuffer(session_factory=SessionLocal)
+    await interaction_log.start()
+    # Учет SQL-запросов по обработчикам охватывает все остальные middleware
+    dp.message.middleware(QueryTrackingMiddleware())
+    dp.callback_query.middleware(QueryTrackingMiddleware())
+    # Профиль пользователя резолвится первым и переиспользуется логированием и обработчиками
+    dp.message.middleware(UserProfileMiddleware())
+    dp.callback_query.middleware(UserProfileMiddleware())
+    dp.message.middleware(InteractionLoggingMiddleware(interaction_log))
+    # Одна сессия/транзакция на апдейт (см. флаг обработчика db)
+    dp.message.middleware(DbSessionMiddleware())
+    dp.callback_query.middleware(DbSessionMiddleware())
     dp.include_router(setup_routers())
 
     scheduler = AppScheduler(bot=bot, session_factory=SessionLocal)
     scheduler.start()
 
-    await dp.start_polling(bot)
+    job_workers = JobWorkerPool(bot=bot, session_factory=SessionLocal)
+    await job_workers.start()
+
+    try:
+        await dp.start_polling(bot)
+    finally:
+        await job_workers.stop()
+        await interaction_log.stop()
+        await dispose_engines()
 
 
 if __name__ == "__main__":
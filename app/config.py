@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Optional
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -10,9 +12,102 @@ class Settings(BaseSettings):
 
     BOT_TOKEN: str
     DATABASE_URL: str
+    # Реплика только для чтения (экраны просмотра и аналитика); пусто - все на основной БД
+    DATABASE_REPLICA_URL: Optional[str] = None
+    # Реплика не используется при отставании больше N сек и для пользователя, писавшего последние N сек
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_STICKY_SECONDS: float = 10.0
+    DB_REPLICA_LAG_CHECK_SECONDS: float = 5.0
+
+    # Пул соединений БД (для PostgreSQL)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Кеш подготовленных выражений asyncpg (0 - выключить, нужно для PgBouncer)
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Телеметрия пула: порог медленной выдачи соединения (мс) и период отчета (мин, 0 - выкл)
+    DB_POOL_SLOW_CHECKOUT_MS: float = 100.0
+    DB_POOL_STATS_INTERVAL_MINUTES: int = 5
+    # Учет SQL-запросов по апдейтам и задачам: порог медленного запроса (мс),
+    # детектор N+1 (для dev/тестов) и его порог повторов, строгие бюджеты (CI)
+    DB_SLOW_QUERY_MS: float = 200.0
+    DB_QUERY_DEBUG: bool = False
+    DB_N_PLUS_ONE_THRESHOLD: int = 5
+    DB_QUERY_BUDGET_STRICT: bool = False
+    # Встроенная SQLite (DATABASE_URL=sqlite+aiosqlite:///path.db): журнал WAL,
+    # synchronous, время ожидания блокировки (мс), кеш страниц (<0 - в КиБ),
+    # отображение файла в память (байт) и число соединений-читателей
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE: int = -65536
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_READ_POOL_SIZE: int = 4
 
     # DeepSeek (LLM) API
     DEEPSEEK_API_KEY: str
+    # Адрес API; для нагрузочных тестов - локальный стаб (deepseek_stub_server.py)
+    DEEPSEEK_BASE_URL: str = "https://api.deepseek.com"
+    # Минимальный интервал (сек) между правками сообщения при потоковом выводе ответа ИИ
+    LLM_STREAM_EDIT_INTERVAL: float = 1.0
+    # Таймаут запроса к ИИ (сек)
+    LLM_TIMEOUT: float = 120.0
+    # Предохранитель: размыкается после N ошибок подряд на заданное время (сек)
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_RESET_SECONDS: float = 30.0
+    # Дублировать интерактивный запрос, если ответ дольше p95 последних вызовов
+    LLM_HEDGE_ENABLED: bool = True
+
+    # Background job queue (LLM-heavy handlers)
+    JOB_WORKERS: int = 4
+    JOB_POLL_INTERVAL: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_DELAY: float = 5.0
+    JOB_LEASE_SECONDS: int = 600
+
+    # Общий кеш планов готовки: вариантов на бакет параметров, срок жизни и час (UTC) предзаполнения
+    COOKING_PLAN_CACHE_VARIANTS: int = 3
+    COOKING_PLAN_CACHE_TTL_DAYS: int = 14
+    COOKING_PLAN_PREFILL_HOUR: int = 3
+    # За сколько минут до напоминания о готовке заранее готовить план
+    COOKING_PLAN_LEAD_MINUTES: int = 30
+
+    # Ночная подготовка плана идеального дня (локальный час пользователя, по согласию)
+    PERFECT_DAY_PREGEN_HOUR: int = 3
+
+    # Кеш совета ИИ в финансовом отчете: допустимое относительное отклонение показателей,
+    # максимальный возраст совета и ожидание ответа ИИ при пустом кеше
+    FINANCE_ADVICE_TOLERANCE: float = 0.1
+    FINANCE_ADVICE_MAX_AGE_HOURS: int = 24
+    FINANCE_ADVICE_WAIT_SECONDS: float = 3.0
+
+    # Кеш профилей пользователей (middleware): максимум записей и время жизни (сек)
+    USER_PROFILE_CACHE_SIZE: int = 10000
+    USER_PROFILE_CACHE_TTL_SECONDS: float = 300.0
+
+    # Отложенная запись истории взаимодействий: размер пачки, период сброса (мс), лимит очереди
+    INTERACTION_LOG_BATCH_SIZE: int = 200
+    INTERACTION_LOG_FLUSH_MS: int = 500
+    INTERACTION_LOG_QUEUE_SIZE: int = 10000
+    # Хранение истории взаимодействий: сколько месяцев держать (0 - бессрочно),
+    # на сколько месяцев вперед создавать партиции (PostgreSQL), размер пачки
+    # удаления без партиций (SQLite) и час запуска обслуживания (UTC)
+    INTERACTION_RETENTION_MONTHS: int = 12
+    INTERACTION_PARTITIONS_AHEAD: int = 2
+    INTERACTION_RETENTION_BATCH_SIZE: int = 5000
+    INTERACTION_RETENTION_HOUR: int = 4
+
+    # Хранение сгенерированных данных: сколько дней держать выполненные автозадачи
+    # и полные планы готовки от ИИ, размер пачки и лимит пачек за один запуск (UTC)
+    RETENTION_FINANCE_TODO_DAYS: int = 7
+    RETENTION_NUTRITION_TODO_DAYS: int = 3
+    RETENTION_GOAL_TODO_DAYS: int = 7
+    RETENTION_COOKING_SESSION_DAYS: int = 30
+    RETENTION_BATCH_SIZE: int = 1000
+    RETENTION_MAX_BATCHES: int = 100
+    RETENTION_HOUR: int = 4
 
     # Others
     DEFAULT_TIMEZONE: str = "UTC"
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from sqlalchemy import Select, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Составные экраны (сводки, статистика) считают несколько независимых
+# агрегатов. Вместо запроса на каждый счетчик они собираются в один SELECT:
+# агрегаты по одной таблице - через FILTER (func.count().filter(...)),
+# по разным таблицам - отдельными подзапросами, соединенными ON true.
+
+
+async def fetch_aggregates(session: AsyncSession, *queries: Select) -> Dict[str, Any]:
+    """Выполняет агрегатные запросы за одно обращение к базе.
+
+    Каждый запрос - агрегат без GROUP BY (ровно одна строка) с уникальными
+    метками колонок, например:
+
+        select(func.count().label("total"), func.count().filter(Book.rating.is_(None)).label("unrated"))
+
+    Returns:
+        Значения по меткам колонок всех запросов
+    """
+    if not queries:
+        return {}
+    subqueries = [query.subquery() for query in queries]
+    joined = subqueries[0]
+    for subquery in subqueries[1:]:
+        joined = joined.join(subquery, true())
+    statement = select(*(column for subquery in subqueries for column in subquery.c)).select_from(joined)
+    row = (await session.execute(statement)).one()
+    return dict(row._mapping)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Callable, Dict
+
+from sqlalchemy import StatementLambdaElement, and_, lambda_stmt, select
+
+from .models import Creditor, Debtor, Todo, User
+
+# Горячие запросы (каждый апдейт и каждый проход планировщика) собираются
+# через lambda_stmt: select() строится и получает ключ кеша один раз на место
+# в коде, а при следующих вызовах из замыкания берутся только значения
+# параметров, и скомпилированный SQL сразу находится в кеше движка.
+#
+# Значения передаются только аргументами функций (становятся bind-параметрами);
+# структура запроса внутри лямбды не должна зависеть от них.
+
+
+def user_by_telegram_id(telegram_id: int) -> StatementLambdaElement:
+    return lambda_stmt(lambda: select(User).where(User.telegram_id == telegram_id))
+
+
+def open_todos(user_id: int) -> StatementLambdaElement:
+    """Невыполненные задачи пользователя (экран списка задач)."""
+    return lambda_stmt(
+        lambda: select(Todo)
+        .where(and_(Todo.user_id == user_id, Todo.is_completed == False))
+        .order_by(Todo.due_date, Todo.priority)
+    )
+
+
+def completed_todos(user_id: int) -> StatementLambdaElement:
+    return lambda_stmt(
+        lambda: select(Todo)
+        .where(and_(Todo.user_id == user_id, Todo.is_completed == True))
+        .order_by(Todo.due_date.desc(), Todo.priority)
+    )
+
+
+def overdue_creditors(user_id: int, today: date) -> StatementLambdaElement:
+    return lambda_stmt(
+        lambda: select(Creditor)
+        .where(and_(Creditor.user_id == user_id, Creditor.is_active == True, Creditor.due_date < today))
+        .order_by(Creditor.due_date)
+    )
+
+
+def overdue_debtors(user_id: int, today: date) -> StatementLambdaElement:
+    return lambda_stmt(
+        lambda: select(Debtor)
+        .where(and_(Debtor.user_id == user_id, Debtor.is_active == True, Debtor.due_date < today))
+        .order_by(Debtor.due_date)
+    )
+
+
+def upcoming_creditors(user_id: int, date_from: date, date_to: date) -> StatementLambdaElement:
+    """Активные кредиторы со сроком в [date_from, date_to]."""
+    return lambda_stmt(
+        lambda: select(Creditor)
+        .where(and_(
+            Creditor.user_id == user_id,
+            Creditor.is_active == True,
+            Creditor.due_date >= date_from,
+            Creditor.due_date <= date_to,
+        ))
+        .order_by(Creditor.due_date)
+    )
+
+
+def upcoming_debtors(user_id: int, date_from: date, date_to: date) -> StatementLambdaElement:
+    """Активные должники со сроком в [date_from, date_to]."""
+    return lambda_stmt(
+        lambda: select(Debtor)
+        .where(and_(
+            Debtor.user_id == user_id,
+            Debtor.is_active == True,
+            Debtor.due_date >= date_from,
+            Debtor.due_date <= date_to,
+        ))
+        .order_by(Debtor.due_date)
+    )
+
+
+# Реестр для бенчмарка (benchmark_hot_queries.py) и проверки планов запросов (test_query_plans.py)
+HOT_QUERIES: Dict[str, Callable[..., StatementLambdaElement]] = {
+    "user_by_telegram_id": user_by_telegram_id,
+    "open_todos": open_todos,
+    "completed_todos": completed_todos,
+    "overdue_creditors": overdue_creditors,
+    "overdue_debtors": overdue_debtors,
+    "upcoming_creditors": upcoming_creditors,
+    "upcoming_debtors": upcoming_debtors,
+}
@@ -4,10 +4,12 @@ from .goal import Goal, GoalScope, GoalStatus, ABAnalysis, GoalReminder
 from .finance import FinanceTransaction, Creditor, Debtor, Income, FinancialGoal
 from .productivity import PomodoroSession, WeeklyRetro, WorkLog
 from .routine import RoutineChecklist, RoutineItem, RoutineLog, RoutineType
-from .nutrition import Recipe, MealPlan, MealType, NutritionLog, CookingSession, NutritionReminder
-from .todo import Todo
+from .nutrition import Recipe, MealPlan, MealType, NutritionLog, CookingSession, CookingPlanVariant, NutritionReminder
+from .todo import Todo, TodoOrigin, FINANCE_TODO_ORIGINS, NUTRITION_TODO_ORIGINS
 from .health import HealthMetric, HealthGoal, HealthReminder as HealthDailyReminder
 from .motivation import Motivation
+from .job import BackgroundJob, JobStatus
+from .perfect_day import PerfectDayPlan
 
 from .book import Book, BookStatus, BookQuote, BookThought, GeneralThought
 
@@ -36,13 +38,20 @@ __all__ = [
     "MealType",
     "NutritionLog",
     "CookingSession",
+    "CookingPlanVariant",
     "NutritionReminder",
     "Todo",
+    "TodoOrigin",
+    "FINANCE_TODO_ORIGINS",
+    "NUTRITION_TODO_ORIGINS",
     "HealthMetric",
     "HealthGoal",
     "HealthDailyReminder",
 
     "Motivation",
+    "BackgroundJob",
+    "JobStatus",
+    "PerfectDayPlan",
 
     "Book",
     "BookStatus",
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import date, datetime
 from decimal import Decimal
 
-from sqlalchemy import ForeignKey, String, Numeric, Date, Integer
+from sqlalchemy import ForeignKey, String, Numeric, Date, Integer, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from ..base import Base
@@ -12,6 +12,8 @@ from ..base import Base
 class FinanceTransaction(Base):
     """Financial transaction record."""
 
+    __table_args__ = (Index("ix_financetransaction_user_date", "user_id", "date"),)
+
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), index=True)
     date: Mapped[date]
@@ -24,6 +26,8 @@ class FinanceTransaction(Base):
 class Creditor(Base):
     """Кредитор - кому должны деньги мы"""
 
+    __table_args__ = (Index("ix_creditor_user_active_due", "user_id", "is_active", "due_date"),)
+
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), index=True)
     name: Mapped[str] = mapped_column(String(128))
@@ -38,6 +42,8 @@ class Creditor(Base):
 class Debtor(Base):
     """Должник - кто должен деньги нам"""
 
+    __table_args__ = (Index("ix_debtor_user_active_due", "user_id", "is_active", "due_date"),)
+
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), index=True)
     name: Mapped[str] = mapped_column(String(128))
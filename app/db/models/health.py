@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import ForeignKey, String, JSON, Text
+from sqlalchemy import ForeignKey, String, JSON, Text, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from ..base import Base
@@ -12,6 +12,8 @@ from ..base import Base
 class HealthMetric(Base):
     """Aggregated daily health metrics per user."""
 
+    __table_args__ = (Index("uq_healthmetric_user_day", "user_id", "day", unique=True),)
+
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), index=True)
     day: Mapped[date] = mapped_column(index=True)
@@ -10,7 +10,13 @@ from ..base import Base
 
 
 class Interaction(Base):
-    """Stores complete per-user interaction history with the bot."""
+    """Stores complete per-user interaction history with the bot.
+
+    On PostgreSQL the table is range-partitioned by month on created_at
+    (migration 012, primary key (id, created_at)); expired months are dropped
+    by app.services.interaction_retention. The ORM identity stays id, which is
+    unique through the shared sequence.
+    """
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), index=True)
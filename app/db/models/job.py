@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import BigInteger, Enum as SAEnum, ForeignKey, JSON, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..base import Base
+
+
+class JobStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class BackgroundJob(Base):
+    """Persisted background job (LLM-heavy work executed by the worker pool)."""
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[Optional[int]] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), nullable=True, index=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger)
+    kind: Mapped[str] = mapped_column(String(64), index=True)
+    payload: Mapped[dict] = mapped_column(JSON, default=dict)
+    status: Mapped[JobStatus] = mapped_column(SAEnum(JobStatus), default=JobStatus.pending, index=True)
+    attempts: Mapped[int] = mapped_column(default=0)
+    max_attempts: Mapped[int] = mapped_column(default=3)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    available_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, index=True)  # Не раньше этого времени (retry backoff)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import date, datetime
 from enum import Enum
 
-from sqlalchemy import Enum as SAEnum, ForeignKey, String, Text
+from sqlalchemy import Enum as SAEnum, ForeignKey, String, Text, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from ..base import Base
@@ -57,6 +57,17 @@ class CookingSession(Base):
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
 
+class CookingPlanVariant(Base):
+    """Общий для пользователей план готовки по нормализованным параметрам (бакету)."""
+    __table_args__ = (UniqueConstraint("bucket_key", "variant", name="uq_cookingplanvariant_bucket_variant"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    bucket_key: Mapped[str] = mapped_column(String(128), index=True)
+    variant: Mapped[int] = mapped_column(default=0)
+    plan: Mapped[str] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+
 class NutritionReminder(Base):
     """Настройки напоминаний о готовке."""
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
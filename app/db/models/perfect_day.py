@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from sqlalchemy import ForeignKey, String, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..base import Base
+
+
+class PerfectDayPlan(Base):
+    """Prepared "perfect day" plan for a user's local date.
+
+    ``context_hash`` fingerprints the prompt (todos, goals, motivation) the plan
+    was built from; the plan is served only while the context is unchanged.
+    """
+
+    __table_args__ = (UniqueConstraint("user_id", "plan_date", name="uq_perfectdayplan_user_date"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), index=True)
+    plan_date: Mapped[date]
+    context_hash: Mapped[str] = mapped_column(String(64))
+    plan: Mapped[str] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
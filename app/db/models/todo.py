@@ -1,14 +1,45 @@
 from datetime import date, datetime, timezone
-from sqlalchemy import String, Date, Boolean, Text, ForeignKey
+from enum import Enum
+from typing import Optional
+from sqlalchemy import String, Date, Boolean, Text, ForeignKey, Index, Enum as SAEnum, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.base import Base
 
 
+class TodoOrigin(str, Enum):
+    """Откуда взялась задача; origin_ref_id указывает на исходную запись."""
+    manual = "manual"
+    creditor = "creditor"  # origin_ref_id -> creditor.id
+    debtor = "debtor"  # origin_ref_id -> debtor.id
+    goal = "goal"  # origin_ref_id -> goal.id
+    nutrition_cooking = "nutrition_cooking"  # origin_ref_id -> nutritionreminder.id
+    nutrition_shopping = "nutrition_shopping"  # origin_ref_id -> nutritionreminder.id
+    perfect_day = "perfect_day"
+
+
+FINANCE_TODO_ORIGINS = (TodoOrigin.creditor, TodoOrigin.debtor)
+NUTRITION_TODO_ORIGINS = (TodoOrigin.nutrition_cooking, TodoOrigin.nutrition_shopping)
+
+
 class Todo(Base):
     __tablename__ = "todos"
+    __table_args__ = (
+        # Списки задач пользователя по дате/статусу и выборка напоминаний планировщиком
+        Index("ix_todos_user_due_completed", "user_id", "due_date", "is_completed"),
+        Index("ix_todos_reminder_active_time", "is_reminder_active", "reminder_time"),
+        # Сгенерированные задачи (финансы, цели, питание) пользователя по дате
+        Index("ix_todos_user_origin_due", "user_id", "origin", "due_date"),
+        # Не больше одной задачи на кредитора/должника в день (генерация идет INSERT ... ON CONFLICT)
+        Index(
+            "uq_todos_finance_origin_due", "origin", "origin_ref_id", "due_date",
+            unique=True,
+            postgresql_where=text("origin IN ('creditor', 'debtor')"),
+            sqlite_where=text("origin IN ('creditor', 'debtor')"),
+        ),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("user.id"), nullable=False)
+    user_id: Mapped[int] = mapped_column(ForeignKey("user.id"), nullable=False, index=True)
     title: Mapped[str] = mapped_column(String(500), nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=True)
     due_date: Mapped[date] = mapped_column(Date, nullable=False)
@@ -17,6 +48,10 @@ class Todo(Base):
     priority: Mapped[str] = mapped_column(String(20), default="medium")  # low, medium, high
     reminder_time: Mapped[str] = mapped_column(String(5), nullable=True)  # Format: "HH:MM"
     is_reminder_active: Mapped[bool] = mapped_column(Boolean, default=False)
+    origin: Mapped[TodoOrigin] = mapped_column(
+        SAEnum(TodoOrigin), default=TodoOrigin.manual, server_default=TodoOrigin.manual.value
+    )
+    origin_ref_id: Mapped[Optional[int]] = mapped_column(nullable=True)
     created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
     
     # Связи
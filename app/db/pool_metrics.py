@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """Счетчики пула соединений: ожидание выдачи, открытие соединений, занятые соединения, overflow."""
+
+    def __init__(self, window_size: int = 1000, slow_checkout_ms: float = 100.0) -> None:
+        self.slow_checkout_ms = slow_checkout_ms
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        # Сколько раз пул переходил в overflow (а не число выдач в этом состоянии)
+        self.overflow_events = 0
+        self.in_overflow = False
+        self.slow_checkouts = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self._waits_ms: Deque[float] = deque(maxlen=window_size)
+        self._connects_ms: Deque[float] = deque(maxlen=window_size)
+
+    def record_wait(self, wait_ms: float) -> None:
+        self._waits_ms.append(wait_ms)
+        if wait_ms >= self.slow_checkout_ms:
+            self.slow_checkouts += 1
+            logger.warning("DB pool: connection checkout waited %.0f ms (in use: %d)", wait_ms, self.in_use)
+
+    def record_connect(self, connect_ms: float) -> None:
+        self._connects_ms.append(connect_ms)
+
+    def record_overflow(self, overflowing: bool) -> None:
+        if overflowing and not self.in_overflow:
+            self.overflow_events += 1
+        self.in_overflow = overflowing
+
+    def snapshot(self, pool: Optional[Pool] = None) -> Dict[str, Any]:
+        waits = sorted(self._waits_ms)
+        connects = sorted(self._connects_ms)
+
+        def _pct(values: List[float], p: float) -> Optional[float]:
+            return round(values[min(len(values) - 1, int(len(values) * p))], 2) if values else None
+
+        stats: Dict[str, Any] = {
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "overflow_events": self.overflow_events,
+            "slow_checkouts": self.slow_checkouts,
+            "in_use": self.in_use,
+            "max_in_use": self.max_in_use,
+            "wait_ms_p50": _pct(waits, 0.5),
+            "wait_ms_p95": _pct(waits, 0.95),
+            "wait_ms_max": round(waits[-1], 2) if waits else None,
+            "connect_ms_p50": _pct(connects, 0.5),
+            "connect_ms_max": round(connects[-1], 2) if connects else None,
+        }
+        if pool is not None:
+            stats["pool_status"] = pool.status()
+        return stats
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """Пул, замеряющий ожидание свободного соединения.
+
+    В событиях пула нет момента запроса соединения, поэтому время снимаем
+    вокруг _do_get, вычитая открытие нового соединения (оно учитывается
+    отдельно), и передаем в событие checkout через запись соединения.
+    Счетчики ведутся, только если для пула вызван install_pool_metrics.
+    """
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):  # type: ignore[override]
+        started = time.perf_counter()
+        record = super()._do_get()
+        # _do_get может вызывать себя рекурсивно: внешний вызов пишет последним
+        record.info["_pool_wait_ms"] = (
+            (time.perf_counter() - started) * 1000 - record.info.pop("_pool_connect_ms", 0.0)
+        )
+        if self.metrics is not None:
+            self.metrics.record_overflow(self.overflow() > 0)
+        return record
+
+    def _create_connection(self):  # type: ignore[override]
+        started = time.perf_counter()
+        record = super()._create_connection()
+        connect_ms = (time.perf_counter() - started) * 1000
+        record.info["_pool_connect_ms"] = connect_ms
+        if self.metrics is not None:
+            self.metrics.record_connect(connect_ms)
+        return record
+
+    def recreate(self) -> "TimedAsyncAdaptedQueuePool":
+        # dispose() пересоздает пул: счетчики переходят к новому
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool  # type: ignore[return-value]
+
+
+def install_pool_metrics(engine: AsyncEngine, slow_checkout_ms: float) -> PoolMetrics:
+    """Заводит счетчики для пула движка и подписывает их на события пула."""
+    pool = engine.sync_engine.pool
+    metrics = PoolMetrics(slow_checkout_ms=slow_checkout_ms)
+    if isinstance(pool, TimedAsyncAdaptedQueuePool):
+        pool.metrics = metrics
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):  # noqa: ANN001
+        metrics.connects += 1
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):  # noqa: ANN001
+        metrics.checkouts += 1
+        metrics.in_use += 1
+        metrics.max_in_use = max(metrics.max_in_use, metrics.in_use)
+        wait_ms = connection_record.info.pop("_pool_wait_ms", None)
+        if wait_ms is not None:
+            metrics.record_wait(wait_ms)
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):  # noqa: ANN001
+        metrics.checkins += 1
+        metrics.in_use = max(0, metrics.in_use - 1)
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):  # noqa: ANN001
+        metrics.invalidations += 1
+
+    return metrics
+
+
+def log_pool_stats(engine: AsyncEngine) -> Dict[str, Any]:
+    pool = engine.sync_engine.pool
+    metrics = getattr(pool, "metrics", None)
+    if metrics is None:
+        return {}
+    stats = metrics.snapshot(pool)
+    logger.info("DB pool stats: %s", stats)
+    return stats
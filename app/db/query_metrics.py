@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Списки параметров разной длины (IN (?, ?, ?)) считаем одной формой запроса
+_PARAM_LIST_RE = re.compile(r"\((?:\s*(?:\?|\$\d+|%s|%\(\w+\)s)\s*,)*\s*(?:\?|\$\d+|%s|%\(\w+\)s)\s*\)")
+_SPACES_RE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Обработчик выполнил больше SQL-запросов, чем объявил в query_budget."""
+
+
+def statement_shape(statement: str) -> str:
+    return _PARAM_LIST_RE.sub("(?...)", _SPACES_RE.sub(" ", statement).strip())
+
+
+@dataclass
+class QueryScope:
+    """Запросы одного апдейта или фоновой задачи."""
+    name: str
+    budget: Optional[int] = None
+    count: int = 0
+    total_ms: float = 0.0
+    slow: int = 0
+    shapes: Counter = field(default_factory=Counter)
+    # Формы, повторившиеся не меньше порога N+1 (заполняется в отладочном режиме)
+    repeated: Dict[str, int] = field(default_factory=dict)
+
+
+class QueryMetrics:
+    """Глобальные счетчики SQL-запросов и настройки детектора."""
+
+    def __init__(
+        self,
+        slow_query_ms: float = 200.0,
+        detect_n_plus_one: bool = False,
+        n_plus_one_threshold: int = 5,
+        strict_budgets: bool = False,
+    ) -> None:
+        self.slow_query_ms = slow_query_ms
+        self.detect_n_plus_one = detect_n_plus_one
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.strict_budgets = strict_budgets
+        self.statements = 0
+        self.slow_statements = 0
+        self.unscoped_statements = 0
+        self.budget_violations = 0
+
+    def record(self, statement: str, duration_ms: float) -> None:
+        self.statements += 1
+        scope = _current_scope.get()
+        scope_name = scope.name if scope else "-"
+        if duration_ms >= self.slow_query_ms:
+            self.slow_statements += 1
+            logger.warning("Slow query in %s: %.0f ms: %s", scope_name, duration_ms, _SPACES_RE.sub(" ", statement)[:500])
+        if scope is None:
+            self.unscoped_statements += 1
+            return
+        scope.count += 1
+        scope.total_ms += duration_ms
+        if duration_ms >= self.slow_query_ms:
+            scope.slow += 1
+        if self.detect_n_plus_one:
+            shape = statement_shape(statement)
+            scope.shapes[shape] += 1
+            if scope.shapes[shape] == self.n_plus_one_threshold:
+                scope.repeated[shape] = self.n_plus_one_threshold
+                logger.warning(
+                    "Possible N+1 in %s: same statement executed %d times: %s",
+                    scope.name, self.n_plus_one_threshold, shape[:500],
+                )
+            elif shape in scope.repeated:
+                scope.repeated[shape] = scope.shapes[shape]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "statements": self.statements,
+            "slow_statements": self.slow_statements,
+            "unscoped_statements": self.unscoped_statements,
+            "budget_violations": self.budget_violations,
+        }
+
+
+query_metrics = QueryMetrics()
+
+_current_scope: ContextVar[Optional[QueryScope]] = ContextVar("current_query_scope", default=None)
+
+
+def current_query_scope() -> Optional[QueryScope]:
+    return _current_scope.get()
+
+
+@contextmanager
+def track_queries(name: str, budget: Optional[int] = None) -> Iterator[QueryScope]:
+    """Относит все SQL-запросы внутри блока к name (обработчик, задача планировщика).
+
+    При превышении budget пишет предупреждение, а в строгом режиме
+    (DB_QUERY_BUDGET_STRICT, для тестов и CI) бросает QueryBudgetExceeded.
+    """
+    scope = QueryScope(name=name, budget=budget)
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+    logger.debug("Queries in %s: %d statements, %.1f ms", name, scope.count, scope.total_ms)
+    if budget is not None and scope.count > budget:
+        query_metrics.budget_violations += 1
+        message = f"{name} executed {scope.count} SQL statements, budget is {budget}"
+        if query_metrics.strict_budgets:
+            raise QueryBudgetExceeded(message)
+        logger.warning("Query budget exceeded: %s", message)
+
+
+def install_query_metrics(engine: AsyncEngine) -> None:
+    """Подписывает счетчики query_metrics на выполнение запросов движком."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):  # noqa: ANN001
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):  # noqa: ANN001
+        started: List[float] = conn.info.get("query_started_at") or []
+        if started:
+            query_metrics.record(statement, (time.perf_counter() - started.pop()) * 1000)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):  # noqa: ANN001
+        # Запрос упал: снимаем его отметку времени, чтобы стек не разъехался
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started_at"):
+            connection.info["query_started_at"].pop()
+
+
+def log_query_stats() -> Dict[str, Any]:
+    stats = query_metrics.snapshot()
+    logger.info("DB query stats: %s", stats)
+    return stats
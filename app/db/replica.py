@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Dict, Hashable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Отставание реплики PostgreSQL; на primary (не в recovery) - 0
+_PG_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaRouter:
+    """Решает, можно ли отправить чтение на реплику.
+
+    Реплика не используется, если ее отставание больше max_lag (или его не
+    удалось измерить) и для пользователя, который сам писал в последние
+    sticky_seconds: он должен видеть свои изменения (read-your-writes).
+    Отставание измеряется не чаще раза в check_interval секунд.
+    """
+
+    def __init__(self, max_lag: float, sticky_seconds: float, check_interval: float) -> None:
+        self.max_lag = max_lag
+        self.sticky_seconds = sticky_seconds
+        self.check_interval = check_interval
+        self.lag: Optional[float] = None
+        self._checked_at = float("-inf")
+        self._recent_writes: Dict[Hashable, float] = {}
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+
+    def note_write(self, key: Hashable) -> None:
+        now = time.monotonic()
+        self._recent_writes[key] = now
+        if len(self._recent_writes) > 10000:
+            # Выкидываем записи старше окна, чтобы словарь не рос бесконечно
+            cutoff = now - self.sticky_seconds
+            self._recent_writes = {k: t for k, t in self._recent_writes.items() if t >= cutoff}
+
+    def wrote_recently(self, key: Optional[Hashable]) -> bool:
+        if key is None:
+            return False
+        written_at = self._recent_writes.get(key)
+        return written_at is not None and time.monotonic() - written_at < self.sticky_seconds
+
+    async def measure_lag(self, engine: AsyncEngine) -> Optional[float]:
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return self.lag
+        self._checked_at = time.monotonic()
+        try:
+            if engine.dialect.name == "postgresql":
+                async with engine.connect() as conn:
+                    self.lag = float((await conn.execute(_PG_LAG_SQL)).scalar() or 0.0)
+            else:
+                # Копия файла SQLite и прочие бэкенды: отставание не измерить, считаем нулевым
+                self.lag = 0.0
+        except Exception as e:
+            logger.warning("DB replica: lag check failed: %s", e)
+            self.lag = None
+        return self.lag
+
+    async def can_read(self, engine: AsyncEngine, key: Optional[Hashable]) -> bool:
+        if self.wrote_recently(key):
+            self.primary_fallbacks += 1
+            return False
+        lag = await self.measure_lag(engine)
+        if lag is None or lag > self.max_lag:
+            self.primary_fallbacks += 1
+            return False
+        self.replica_reads += 1
+        return True
+
+    def stats(self) -> Dict[str, object]:
+        return {"lag": self.lag, "replica_reads": self.replica_reads, "primary_fallbacks": self.primary_fallbacks}
@@ -1,30 +1,234 @@
 from __future__ import annotations
 
 import asyncio
-from contextlib import asynccontextmanager
-from typing import AsyncIterator
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Hashable, Iterator, Optional
 
+from sqlalchemy import event, inspect
+
+from sqlalchemy.engine import URL, Connection, make_url
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import ORMExecuteState, Session
 
 from ..config import settings
 from .base import Base
+from .pool_metrics import TimedAsyncAdaptedQueuePool, install_pool_metrics
+from .query_metrics import install_query_metrics, query_metrics
+from .replica import ReplicaRouter
+from .sqlite import install_sqlite_profile, is_file_database, sqlite_engine_options
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
 
 
-def _build_async_engine() -> AsyncEngine:
-    database_url = settings.DATABASE_URL
+def _engine_options(url: URL, readonly: bool = False) -> Dict[str, Any]:
+    """Параметры пула и драйвера из Settings."""
+    if url.get_backend_name() == "sqlite":
+        return sqlite_engine_options(url, readonly)
+    options: Dict[str, Any] = {
+        "poolclass": TimedAsyncAdaptedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url.get_driver_name() == "asyncpg":
+        # Кеш подготовленных выражений asyncpg; 0 - для PgBouncer в режиме transaction
+        options["connect_args"] = {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    return options
+
+
+def _async_url(database_url: str) -> URL:
+    # Enforce async driver
     if database_url.startswith("postgresql://"):
-        # Enforce async driver
         database_url = database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
-    return create_async_engine(database_url, echo=False, future=True)
+    elif database_url.startswith("sqlite://"):
+        database_url = database_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return make_url(database_url)
+
 
+def _build_async_engine(database_url: str, collect_metrics: bool = True, readonly: bool = False) -> AsyncEngine:
+    """Движок БД; readonly - пул читателей SQLite (см. app.db.sqlite)."""
+    url = _async_url(database_url)
+    if url.get_driver_name() == "asyncpg":
+        # Кеш подготовленных выражений на стороне диалекта SQLAlchemy
+        url = url.update_query_dict({"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)})
+    options = _engine_options(url, readonly)
+    engine = create_async_engine(url, echo=False, future=True, **options)
+    if collect_metrics and options.get("poolclass") is TimedAsyncAdaptedQueuePool:
+        install_pool_metrics(engine, slow_checkout_ms=settings.DB_POOL_SLOW_CHECKOUT_MS)
+    if is_file_database(url):
+        install_sqlite_profile(engine, readonly)
+    install_query_metrics(engine)
+    return engine
 
-engine: AsyncEngine = _build_async_engine()
+
+query_metrics.slow_query_ms = settings.DB_SLOW_QUERY_MS
+query_metrics.detect_n_plus_one = settings.DB_QUERY_DEBUG
+query_metrics.n_plus_one_threshold = settings.DB_N_PLUS_ONE_THRESHOLD
+query_metrics.strict_budgets = settings.DB_QUERY_BUDGET_STRICT
+
+
+engine: AsyncEngine = _build_async_engine(settings.DATABASE_URL)
 SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
+# Необязательная реплика для read-only единиц работы (DATABASE_REPLICA_URL)
+replica_engine: Optional[AsyncEngine] = (
+    _build_async_engine(settings.DATABASE_REPLICA_URL, collect_metrics=False, readonly=True)
+    if settings.DATABASE_REPLICA_URL else None
+)
+ReplicaSessionLocal = (
+    async_sessionmaker(replica_engine, expire_on_commit=False, class_=AsyncSession) if replica_engine else None
+)
+# Файловая SQLite без реплики: read-only единицы работы читают через пул
+# читателей, не занимая единственное соединение писателя
+reader_engine: Optional[AsyncEngine] = (
+    _build_async_engine(settings.DATABASE_URL, collect_metrics=False, readonly=True)
+    if replica_engine is None and is_file_database(_async_url(settings.DATABASE_URL)) else None
+)
+ReaderSessionLocal = (
+    async_sessionmaker(reader_engine, expire_on_commit=False, class_=AsyncSession) if reader_engine else None
+)
+replica_router = ReplicaRouter(
+    max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    sticky_seconds=settings.DB_REPLICA_STICKY_SECONDS,
+    check_interval=settings.DB_REPLICA_LAG_CHECK_SECONDS,
+)
+
+# Пользователь текущего апдейта: его записи на время отключают для него реплику
+_current_writer_key: ContextVar[Optional[Hashable]] = ContextVar("current_writer_key", default=None)
+
+
+@contextmanager
+def writer_key(key: Optional[Hashable]) -> Iterator[None]:
+    """Помечает записи внутри блока как сделанные пользователем key (для read-your-writes)."""
+    token = _current_writer_key.set(key)
+    try:
+        yield
+    finally:
+        _current_writer_key.reset(token)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush_write(session: Session, flush_context) -> None:  # noqa: ANN001
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_dml_write(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _note_committed_write(session: Session) -> None:
+    key = _current_writer_key.get()
+    if session.info.pop("has_writes", False) and key is not None:
+        replica_router.note_write(key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_write(session: Session) -> None:
+    session.info.pop("has_writes", None)
+
+
+@dataclass
+class UnitOfWork:
+    session: AsyncSession
+    task: Optional["asyncio.Task[Any]"]
+    readonly: bool = False
+    # Ошибка в присоединенном session_scope: транзакция уже откачена, фиксировать нечего
+    rollback_only: bool = False
+
+
+# Единица работы текущего апдейта (см. unit_of_work / DbSessionMiddleware)
+_current_uow: ContextVar[Optional[UnitOfWork]] = ContextVar("current_uow", default=None)
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    """Активная единица работы, если код выполняется в задаче, которая ее открыла.
+
+    Задачи, порожденные через create_task, наследуют контекст, но не должны
+    делить с обработчиком AsyncSession, поэтому сверяем текущую задачу.
+    """
+    uow = _current_uow.get()
+    if uow is not None and uow.task is asyncio.current_task():
+        return uow
+    return None
+
+
+@asynccontextmanager
+async def unit_of_work(readonly: bool = False) -> AsyncIterator[AsyncSession]:
+    """Одна сессия и одна транзакция на апдейт; фиксируется один раз в конце.
+
+    Все session_scope() внутри присоединяются к этой сессии. В режиме
+    readonly нет ни flush, ни commit: транзакция откатывается в конце, а
+    чтение идет на реплику, если она настроена и проходит проверки отставания
+    (для файловой SQLite - в пул читателей).
+
+    Если внутри присоединенного session_scope() возникло исключение, транзакция
+    откатывается сразу, а единица работы становится rollback-only: даже когда
+    обработчик перехватил ошибку, изменения апдейта не фиксируются.
+    """
+    factory = SessionLocal
+    if readonly and replica_engine is not None:
+        if await replica_router.can_read(replica_engine, _current_writer_key.get()):
+            factory = ReplicaSessionLocal
+    elif readonly and ReaderSessionLocal is not None:
+        factory = ReaderSessionLocal
+    async with factory(autoflush=not readonly) as session:
+        uow = UnitOfWork(session, asyncio.current_task(), readonly)
+        token = _current_uow.set(uow)
+        try:
+            yield session
+            if uow.rollback_only:
+                if session.new or session.dirty or session.deleted or session.info.get("has_writes"):
+                    logger.warning("Unit of work rolled back after an error: discarding later changes")
+                await session.rollback()
+            elif readonly:
+                if session.new or session.dirty or session.deleted:
+                    logger.warning("Read-only unit of work: discarding pending changes")
+                await session.rollback()
+            else:
+                await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            _current_uow.reset(token)
+
 
 @asynccontextmanager
-async def session_scope() -> AsyncIterator[AsyncSession]:
-    """Async session context manager for DB operations."""
+async def session_scope(savepoint: bool = False) -> AsyncIterator[AsyncSession]:
+    """Async session context manager for DB operations.
+
+    Inside a unit of work the update's session is reused and committed by the
+    unit of work; ``savepoint=True`` wraps the block in a nested transaction so
+    that an error rolls back only this block. Without a savepoint an error
+    rolls back the whole unit of work (see unit_of_work).
+    """
+    uow = current_unit_of_work()
+    if uow is not None:
+        if savepoint:
+            async with uow.session.begin_nested():
+                yield uow.session
+            return
+        try:
+            yield uow.session
+        except Exception:
+            # Часть изменений блока уже могла уйти в транзакцию: откатываем ее
+            # сразу, иначе перехвативший ошибку обработчик зафиксировал бы
+            # половину изменений или получил PendingRollbackError
+            uow.rollback_only = True
+            await uow.session.rollback()
+            raise
+        return
     async with SessionLocal() as session:
         try:
             yield session
@@ -34,10 +238,36 @@ async def session_scope() -> AsyncIterator[AsyncSession]:
             raise
 
 
+def create_schema(connection: Connection) -> None:
+    """Создает недостающие таблицы.
+
+    Новую базу SQLite сразу помечает последней ревизией Alembic: схема
+    create_all совпадает со схемой после всех миграций, а цепочка миграций
+    начинается с изменения уже существующих таблиц. Дальше база обновляется
+    обычным alembic upgrade head.
+    """
+    fresh = not inspect(connection).get_table_names()
+    Base.metadata.create_all(connection)
+    if fresh and connection.dialect.name == "sqlite" and ALEMBIC_INI.exists():
+        from alembic.config import Config
+        from alembic.runtime.migration import MigrationContext
+        from alembic.script import ScriptDirectory
+
+        script = ScriptDirectory.from_config(Config(str(ALEMBIC_INI)))
+        MigrationContext.configure(connection).stamp(script, "head")
+
+
 async def create_all() -> None:
     """Create all tables (dev only; prefer Alembic in production)."""
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_schema)
+
+
+async def dispose_engines() -> None:
+    """Закрывает соединения всех движков (при остановке бота и в тестах)."""
+    for target in (engine, replica_engine, reader_engine):
+        if target is not None:
+            await target.dispose()
 
 
 if __name__ == "__main__":
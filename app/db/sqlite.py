@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..config import settings
+from .pool_metrics import TimedAsyncAdaptedQueuePool
+
+# Профиль встроенной SQLite (sqlite+aiosqlite) для небольших установок, CI и
+# нагрузочных стендов.
+#
+# База работает в режиме WAL: читатели не блокируют писателя и друг друга.
+# Писатель один: основной движок держит единственное соединение, и очередь
+# ожидания в его пуле служит очередью записи. Транзакции писателя начинаются с
+# BEGIN IMMEDIATE - блокировка записи берется сразу, а не при первом INSERT,
+# когда в WAL можно получить SQLITE_BUSY без ожидания. Read-only единицы
+# работы идут в отдельный пул читателей (PRAGMA query_only).
+
+
+def is_file_database(url: URL) -> bool:
+    """SQLite в файле (для базы в памяти WAL и пул читателей не нужны)."""
+    database = url.database or ""
+    return (
+        url.get_backend_name() == "sqlite"
+        and database not in ("", ":memory:")
+        and not database.startswith("file::memory:")
+        and url.query.get("mode") != "memory"
+    )
+
+
+def sqlite_engine_options(url: URL, readonly: bool = False) -> Dict[str, Any]:
+    """Пул соединений: одно соединение у писателя, SQLITE_READ_POOL_SIZE у читателей."""
+    if not is_file_database(url):
+        return {}
+    return {
+        "poolclass": TimedAsyncAdaptedQueuePool,
+        "pool_size": settings.SQLITE_READ_POOL_SIZE if readonly else 1,
+        "max_overflow": 0,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+
+
+def sqlite_pragmas(readonly: bool = False) -> List[str]:
+    pragmas = [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        # Каскадное удаление по внешним ключам, как в PostgreSQL
+        "PRAGMA foreign_keys=ON",
+    ]
+    if readonly:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+
+def install_sqlite_profile(engine: AsyncEngine, readonly: bool = False) -> None:
+    """Настраивает соединения файловой SQLite: pragma и явное начало транзакций."""
+    sync_engine = engine.sync_engine
+    pragmas = sqlite_pragmas(readonly)
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):  # noqa: ANN001
+        # Транзакции начинает SQLAlchemy (событие begin), а не драйвер: иначе
+        # pysqlite откладывает BEGIN до первой записи и ломает SAVEPOINT
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    @event.listens_for(sync_engine, "begin")
+    def _on_begin(conn):  # noqa: ANN001
+        # Напрямую через курсор драйвера: BEGIN не должен попадать в счетчики
+        # запросов (в PostgreSQL его неявно отправляет драйвер)
+        cursor = conn.connection.cursor()
+        cursor.execute("BEGIN" if readonly else "BEGIN IMMEDIATE")
+        cursor.close()
@@ -9,9 +9,12 @@ from sqlalchemy import select, desc
 from sqlalchemy.orm import selectinload
 
 from app.db.session import session_scope
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import User, WeeklyRetro, Goal, FinanceTransaction
 from app.keyboards.common import analysis_menu, back_main_menu
-from app.services.llm import deepseek_complete
+from app.services.llm import deepseek_complete, deepseek_stream
+from app.services.llm_context import ContextBuilder, compact_text, format_amount
+from app.utils.stream_renderer import TelegramStreamRenderer
 
 router = Router()
 
@@ -170,7 +173,7 @@ async def process_failure_handler(message: types.Message, state: FSMContext) ->
     )
 
 
-@router.message(AnalysisStates.waiting_for_failure_reason)
+@router.message(AnalysisStates.waiting_for_failure_reason, flags={"db": "none"})
 async def process_failure_reason_handler(message: types.Message, state: FSMContext) -> None:
     """Обработать ответ о причинах неудач и завершить анализ."""
     await state.update_data(failure_reason=message.text)
@@ -185,7 +188,7 @@ async def process_failure_reason_handler(message: types.Message, state: FSMConte
     
     async with session_scope() as session:
         db_user = (await session.execute(
-            select(User).where(User.telegram_id == user.id)
+            user_by_telegram_id(user.id)
         )).scalar_one()
         
         # Определить начало недели (понедельник)
@@ -205,20 +208,10 @@ async def process_failure_reason_handler(message: types.Message, state: FSMConte
         )
         session.add(analysis)
         await session.commit()
+        analysis_id = analysis.id
         
         # Получить последние 10 записей для анализа ИИ
         recent_data = await get_recent_user_data(session, db_user.id)
-        
-        # Сгенерировать анализ с помощью ИИ
-        try:
-            await message.answer("⏳ **Генерирую рекомендации ИИ...**", parse_mode="Markdown")
-        except Exception:
-            pass
-        ai_analysis = await generate_ai_analysis(data, recent_data)
-        
-        # Обновить запись с планом от ИИ
-        analysis.plan = ai_analysis
-        await session.commit()
     
     # Очистить состояние
     await state.clear()
@@ -235,18 +228,24 @@ async def process_failure_reason_handler(message: types.Message, state: FSMConte
         parse_mode="Markdown"
     )
     
-    # Отправить рекомендации ИИ отдельными сообщениями
-    if ai_analysis:
-        await message.answer("🤖 **Рекомендации ИИ:**", parse_mode="Markdown")
-        parts = _split_into_messages(ai_analysis)
-        for i, part in enumerate(parts, 1):
-            if i == 1:
-                await message.answer(part, parse_mode="Markdown")
-            else:
-                await message.answer(f"**Продолжение рекомендаций:**\n{part}", parse_mode="Markdown")
-
-
-@router.callback_query(F.data == "analysis_history")
+    # Сгенерировать рекомендации ИИ, выводя их по мере генерации
+    status_msg = await message.answer("⏳ **Генерирую рекомендации ИИ...**", parse_mode="Markdown")
+    renderer = TelegramStreamRenderer(status_msg, header="🤖 **Рекомендации ИИ:**\n\n", parse_mode="Markdown")
+    prompt, system_prompt = build_ai_analysis_prompt(data, recent_data)
+    try:
+        ai_analysis = await renderer.render(deepseek_stream(prompt, system=system_prompt, max_tokens=5000))
+    except Exception as e:
+        ai_analysis = f"К сожалению, не удалось сгенерировать анализ ИИ. Ошибка: {str(e)}"
+        await renderer.finish(ai_analysis)
+    
+    # Обновить запись с планом от ИИ
+    async with session_scope() as session:
+        analysis = await session.get(WeeklyRetro, analysis_id)
+        if analysis:
+            analysis.plan = ai_analysis
+
+
+@router.callback_query(F.data == "analysis_history", flags={"db": "readonly"})
 async def analysis_history_handler(callback: types.CallbackQuery) -> None:
     """Показать историю анализов."""
     user = callback.from_user
@@ -255,7 +254,7 @@ async def analysis_history_handler(callback: types.CallbackQuery) -> None:
     
     async with session_scope() as session:
         db_user = (await session.execute(
-            select(User).where(User.telegram_id == user.id)
+            user_by_telegram_id(user.id)
         )).scalar_one()
         
         # Получить последние 5 анализов
@@ -326,28 +325,35 @@ async def get_recent_user_data(session, user_id: int) -> dict[str, Any]:
     return recent_data
 
 
-async def generate_ai_analysis(analysis_data: dict, recent_data: dict) -> str:
-    """Генерировать анализ с помощью ИИ на основе данных пользователя."""
-    
-    # Подготовить контекст для ИИ
-    context = f"""
-Анализ недели пользователя:
-
-Что получилось: {analysis_data.get('success', 'Не указано')}
-Почему получилось: {analysis_data.get('success_reason', 'Не указано')}
-Что не получилось: {analysis_data.get('failure', 'Не указано')}
-Почему не получилось: {analysis_data.get('failure_reason', 'Не указано')}
-
-Последние данные пользователя:
-- Цели: {len(recent_data['goals'])} записей
-- Финансы: {len(recent_data['finances'])} записей
+# Бюджет токенов на контекст анализа недели (без системного сообщения)
+ANALYSIS_CONTEXT_TOKENS = 900
 
 
-Детали последних записей:
-Цели: {recent_data['goals']}
-Финансы: {recent_data['finances']}
-
-"""
+def build_ai_analysis_prompt(analysis_data: dict, recent_data: dict) -> tuple[str, str]:
+    """Сформировать промпт и системное сообщение для анализа недели."""
+    
+    # Подготовить контекст для ИИ: ответы пользователя важнее истории целей и финансов
+    builder = ContextBuilder(ANALYSIS_CONTEXT_TOKENS)
+    builder.add("Анализ недели пользователя:", [
+        f"Что получилось: {analysis_data.get('success') or 'Не указано'}",
+        f"Почему получилось: {analysis_data.get('success_reason') or 'Не указано'}",
+        f"Что не получилось: {analysis_data.get('failure') or 'Не указано'}",
+        f"Почему не получилось: {analysis_data.get('failure_reason') or 'Не указано'}",
+    ], priority=100, min_lines=4, max_line_chars=600)
+    builder.add("Последние цели:", [
+        f"{g['title']} [{g['status']}]" + (f": {compact_text(g['description'], 100)}" if g.get('description') else "")
+        for g in recent_data['goals']
+    ], priority=50)
+    
+    # Финансы сводим по категориям вместо списка транзакций
+    by_category: dict[str, list[float]] = {}
+    for f in recent_data['finances']:
+        by_category.setdefault(f.get('category') or "без категории", []).append(float(f['amount'] or 0))
+    builder.add("Последние операции по категориям:", [
+        f"{category}: {format_amount(sum(amounts))} ({len(amounts)} опер.)"
+        for category, amounts in sorted(by_category.items(), key=lambda item: abs(sum(item[1])), reverse=True)
+    ], priority=30)
+    context = builder.build()
     
     system_prompt = """Ты - персональный коуч и аналитик. Проанализируй данные пользователя и дай конкретные, практические рекомендации для улучшения его результатов на следующей неделе. 
 
@@ -359,9 +365,16 @@ async def generate_ai_analysis(analysis_data: dict, recent_data: dict) -> str:
 
 Будь мотивирующим, но реалистичным. Дай 3-5 конкретных рекомендаций."""
     
+    prompt = f"Проанализируй эти данные и дай рекомендации:\n\n{context}"
+    return prompt, system_prompt
+
+
+async def generate_ai_analysis(analysis_data: dict, recent_data: dict) -> str:
+    """Генерировать анализ с помощью ИИ на основе данных пользователя."""
+    prompt, system_prompt = build_ai_analysis_prompt(analysis_data, recent_data)
     try:
         ai_response = await deepseek_complete(
-            prompt=f"Проанализируй эти данные и дай рекомендации:\n\n{context}",
+            prompt=prompt,
             system=system_prompt,
             max_tokens=5000
         )
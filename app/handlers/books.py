@@ -8,16 +8,20 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from sqlalchemy import select, func
+from sqlalchemy import and_, select, func
 from sqlalchemy.orm import joinedload
 
+from app.db.aggregates import fetch_aggregates
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import Book, BookStatus, BookQuote, BookThought, User
 from app.db.session import session_scope
 from app.keyboards.common import (
     books_menu, book_status_menu, book_add_status_menu, book_detail_keyboard, book_list_keyboard,
     book_edit_keyboard, book_rating_keyboard, book_ai_menu, back_main_menu
 )
-from app.services.llm import deepseek_complete
+from app.services.llm import deepseek_stream
+from app.services.user_profile import UserProfile
+from app.utils.stream_renderer import TelegramStreamRenderer
 
 router = Router()
 
@@ -203,7 +207,7 @@ async def books_add_status(cb: types.CallbackQuery, state: FSMContext) -> None:
     user = cb.from_user
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         
         # Создать книгу
         book = Book(
@@ -256,7 +260,7 @@ async def books_want_to_read(cb: types.CallbackQuery) -> None:
     user = cb.from_user
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         books = (await session.execute(
             select(Book).where(
                 Book.user_id == db_user.id,
@@ -290,7 +294,7 @@ async def books_reading(cb: types.CallbackQuery) -> None:
     user = cb.from_user
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         books = (await session.execute(
             select(Book).where(
                 Book.user_id == db_user.id,
@@ -324,7 +328,7 @@ async def books_completed(cb: types.CallbackQuery) -> None:
     user = cb.from_user
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         books = (await session.execute(
             select(Book).where(
                 Book.user_id == db_user.id,
@@ -359,7 +363,7 @@ async def book_view(cb: types.CallbackQuery) -> None:
     user = cb.from_user
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         book = (await session.execute(
             select(Book)
             .options(joinedload(Book.quotes), joinedload(Book.thoughts))
@@ -543,7 +547,14 @@ async def book_ai_question_start(cb: types.CallbackQuery, state: FSMContext) ->
     )
 
 
-@router.callback_query(F.data.startswith("book_ai_"))
+def _clean_book_ai_response(text: str) -> str:
+    """Очистить ответ ИИ от проблемных для HTML-разметки символов"""
+    text = text.replace('*', '⭐')  # Звездочки на эмодзи
+    text = text.replace('<', '&lt;')  # Защита от HTML
+    return text.replace('>', '&gt;')  # Защита от HTML
+
+
+@router.callback_query(F.data.startswith("book_ai_"), flags={"db": "none"})
 async def book_ai_question_handle(cb: types.CallbackQuery, state: FSMContext) -> None:
     """Обработать предустановленные вопросы к ИИ"""
     # Сразу отвечаем на callback query, чтобы избежать ошибки "query is too old"
@@ -603,29 +614,20 @@ async def book_ai_question_handle(cb: types.CallbackQuery, state: FSMContext) ->
         parse_mode="HTML"
     )
     
-    # Небольшая пауза для лучшего UX
-    import asyncio
-    await asyncio.sleep(0.5)
-    
-    # Получить ответ от ИИ
+    # Получить ответ от ИИ, выводя его по мере генерации
+    renderer = TelegramStreamRenderer(
+        loading_message,
+        header=f"🤖 <b>Ответ ИИ о книге</b>\n\n<b>Вопрос:</b> {question}\n\n<b>Ответ:</b>\n",
+        formatter=_clean_book_ai_response,
+        parse_mode="HTML",
+        reply_markup=book_detail_keyboard(book_id),
+    )
     try:
-        ai_response = await deepseek_complete(
-            f"{question}\n\nКонтекст:\n{context}",
-            system="Ты эксперт по литературе. Отвечай кратко, но информативно. Используй эмодзи для лучшего восприятия. Если нужно указать рейтинг или важность, используй эмодзи звезд ⭐ вместо символа *. Не используй HTML-разметку, только обычный текст с эмодзи."
-        )
-        
-        # Очистить ответ ИИ от проблемных символов
-        ai_response_clean = ai_response.replace('*', '⭐')  # Звездочки на эмодзи
-        ai_response_clean = ai_response_clean.replace('<', '&lt;')  # Защита от HTML
-        ai_response_clean = ai_response_clean.replace('>', '&gt;')  # Защита от HTML
-        
-        # Заменить сообщение загрузки на готовый ответ
-        await loading_message.edit_text(
-            f"🤖 <b>Ответ ИИ о книге</b>\n\n"
-            f"<b>Вопрос:</b> {question}\n\n"
-            f"<b>Ответ:</b>\n{ai_response_clean}",
-            reply_markup=book_detail_keyboard(book_id),
-            parse_mode="HTML"
+        await renderer.render(
+            deepseek_stream(
+                f"{question}\n\nКонтекст:\n{context}",
+                system="Ты эксперт по литературе. Отвечай кратко, но информативно. Используй эмодзи для лучшего восприятия. Если нужно указать рейтинг или важность, используй эмодзи звезд ⭐ вместо символа *. Не используй HTML-разметку, только обычный текст с эмодзи."
+            )
         )
     except Exception as e:
         # Заменить сообщение загрузки на сообщение об ошибке
@@ -649,7 +651,7 @@ async def book_view_quotes(cb: types.CallbackQuery) -> None:
     user = cb.from_user
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         book = (await session.execute(
             select(Book).where(Book.id == book_id, Book.user_id == db_user.id)
         )).scalar_one_or_none()
@@ -707,7 +709,7 @@ async def book_view_thoughts(cb: types.CallbackQuery) -> None:
     user = cb.from_user
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         book = (await session.execute(
             select(Book).where(Book.id == book_id, Book.user_id == db_user.id)
         )).scalar_one_or_none()
@@ -755,69 +757,39 @@ async def book_view_thoughts(cb: types.CallbackQuery) -> None:
     )
 
 
-@router.callback_query(F.data == "books_stats")
-async def books_stats(cb: types.CallbackQuery) -> None:
+@router.callback_query(F.data == "books_stats", flags={"db": "readonly", "query_budget": 4})
+async def books_stats(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Показать статистику чтения"""
-    user = cb.from_user
-    
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
-        
-        # Общая статистика
-        total_books = (await session.execute(
-            select(func.count(Book.id)).where(Book.user_id == db_user.id)
-        )).scalar()
-        
-        want_to_read = (await session.execute(
-            select(func.count(Book.id)).where(
-                Book.user_id == db_user.id,
-                Book.status == BookStatus.want_to_read
-            )
-        )).scalar()
-        
-        reading = (await session.execute(
-            select(func.count(Book.id)).where(
-                Book.user_id == db_user.id,
-                Book.status == BookStatus.reading
-            )
-        )).scalar()
-        
-        completed = (await session.execute(
-            select(func.count(Book.id)).where(
-                Book.user_id == db_user.id,
-                Book.status == BookStatus.completed
-            )
-        )).scalar()
-        
-        abandoned = (await session.execute(
-            select(func.count(Book.id)).where(
-                Book.user_id == db_user.id,
-                Book.status == BookStatus.abandoned
-            )
-        )).scalar()
-        
-        # Статистика по цитатам и мыслям
-        total_quotes = (await session.execute(
-            select(func.count(BookQuote.id))
+        # Все счетчики - одним запросом
+        rated_completed = and_(Book.status == BookStatus.completed, Book.rating.isnot(None))
+        stats = await fetch_aggregates(
+            session,
+            # Общая статистика и средний рейтинг прочитанных книг
+            select(
+                func.count(Book.id).label("total_books"),
+                func.count(Book.id).filter(Book.status == BookStatus.want_to_read).label("want_to_read"),
+                func.count(Book.id).filter(Book.status == BookStatus.reading).label("reading"),
+                func.count(Book.id).filter(Book.status == BookStatus.completed).label("completed"),
+                func.count(Book.id).filter(Book.status == BookStatus.abandoned).label("abandoned"),
+                func.avg(Book.rating).filter(rated_completed).label("avg_rating"),
+            ).where(Book.user_id == user_profile.id),
+            # Статистика по цитатам и мыслям
+            select(func.count(BookQuote.id).label("total_quotes"))
             .join(Book)
-            .where(Book.user_id == db_user.id)
-        )).scalar()
-        
-        total_thoughts = (await session.execute(
-            select(func.count(BookThought.id))
+            .where(Book.user_id == user_profile.id),
+            select(func.count(BookThought.id).label("total_thoughts"))
             .join(Book)
-            .where(Book.user_id == db_user.id)
-        )).scalar()
-        
-        # Средний рейтинг прочитанных книг
-        avg_rating = (await session.execute(
-            select(func.avg(Book.rating))
-            .where(
-                Book.user_id == db_user.id,
-                Book.status == BookStatus.completed,
-                Book.rating.isnot(None)
-            )
-        )).scalar()
+            .where(Book.user_id == user_profile.id),
+        )
+        total_books = stats["total_books"]
+        want_to_read = stats["want_to_read"]
+        reading = stats["reading"]
+        completed = stats["completed"]
+        abandoned = stats["abandoned"]
+        total_quotes = stats["total_quotes"]
+        total_thoughts = stats["total_thoughts"]
+        avg_rating = stats["avg_rating"]
         
         avg_rating_text = f"{avg_rating:.1f}⭐" if avg_rating else "Нет оценок"
         
@@ -825,9 +797,8 @@ async def books_stats(cb: types.CallbackQuery) -> None:
         top_books = (await session.execute(
             select(Book.title, Book.rating)
             .where(
-                Book.user_id == db_user.id,
-                Book.status == BookStatus.completed,
-                Book.rating.isnot(None)
+                Book.user_id == user_profile.id,
+                rated_completed
             )
             .order_by(Book.rating.desc())
             .limit(3)
@@ -904,7 +875,7 @@ async def book_delete(cb: types.CallbackQuery) -> None:
     user = cb.from_user
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         book = (await session.execute(
             select(Book).where(Book.id == book_id, Book.user_id == db_user.id)
         )).scalar_one_or_none()
@@ -976,7 +947,7 @@ async def book_rate_handle(cb: types.CallbackQuery, state: FSMContext) -> None:
     
     # Применить оценку к книге
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         book = (await session.execute(
             select(Book).where(Book.id == book_id, Book.user_id == db_user.id)
         )).scalar_one_or_none()
@@ -1066,7 +1037,7 @@ async def book_change_status_apply(cb: types.CallbackQuery, state: FSMContext) -
     user = cb.from_user
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         book = (await session.execute(
             select(Book).where(Book.id == book_id, Book.user_id == db_user.id)
         )).scalar_one_or_none()
@@ -1144,7 +1115,7 @@ async def books_search_handle(message: types.Message, state: FSMContext) -> None
     user = message.from_user
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         
         # Поиск по названию и автору
         books = (await session.execute(
@@ -1274,7 +1245,7 @@ async def book_quote_page_handler(message: types.Message, state: FSMContext) ->
     user = message.from_user
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         
         # Проверяем, что книга принадлежит пользователю
         book = await session.execute(
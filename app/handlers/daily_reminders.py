@@ -5,14 +5,25 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from app.db.session import session_scope
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import User
 from sqlalchemy import select
 from app.services.daily_reminders import (
     daily_reminder_keyboard, 
     perfect_day_keyboard,
-    generate_perfect_day_plan,
-    create_todo_from_perfect_day
+    build_perfect_day_prompt,
+    format_perfect_day_plan,
+    get_prepared_perfect_day_plan,
+    perfect_day_context_hash,
+    save_perfect_day_plan,
+    create_todo_from_perfect_day,
+    PERFECT_DAY_HEADER,
+    PERFECT_DAY_FOOTER,
+    PERFECT_DAY_MAX_TOKENS,
 )
+from app.services.llm import deepseek_stream
+from app.utils.stream_renderer import TelegramStreamRenderer
+from app.utils.timezone_utils import get_user_local_time
 from app.keyboards.common import back_main_menu
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
@@ -77,7 +88,7 @@ async def quick_todo_description_handler(message: types.Message, state: FSMConte
     try:
         async with session_scope() as session:
             db_user = (await session.execute(
-                select(User).where(User.telegram_id == message.from_user.id)
+                user_by_telegram_id(message.from_user.id)
             )).scalar_one()
             
             from app.db.models.todo import Todo
@@ -111,9 +122,18 @@ async def quick_todo_description_handler(message: types.Message, state: FSMConte
     await state.clear()
 
 
+async def _perfect_day_pregen_enabled(telegram_id: int) -> bool:
+    async with session_scope() as session:
+        prefs = (await session.execute(
+            select(User.notification_preferences).where(User.telegram_id == telegram_id)
+        )).scalar_one_or_none()
+    return bool((prefs or {}).get("perfect_day_pregen", False))
+
+
 @router.callback_query(F.data == "perfect_day_plan")
 async def perfect_day_menu(cb: types.CallbackQuery) -> None:
     """Меню планирования идеального дня"""
+    pregen_enabled = await _perfect_day_pregen_enabled(cb.from_user.id)
     await cb.message.edit_text(
         "⚔️ <b>ПРИКАЗ ЛАНИСТЫ</b>\n\n"
         "Готов получить план тренировок на завтра, гладиатор?\n\n"
@@ -123,15 +143,34 @@ async def perfect_day_menu(cb: types.CallbackQuery) -> None:
         "• Воинственная мотивация и дисциплина\n"
         "• Конкретные временные рамки\n\n"
         "Выбери действие, воин:",
-        reply_markup=perfect_day_keyboard(),
+        reply_markup=perfect_day_keyboard(pregen_enabled),
         parse_mode="HTML"
     )
     await cb.answer()
 
 
-@router.callback_query(F.data == "create_perfect_day")
+@router.callback_query(F.data == "toggle_perfect_day_pregen")
+async def toggle_perfect_day_pregen(cb: types.CallbackQuery) -> None:
+    """Включает/выключает ночную подготовку плана идеального дня"""
+    async with session_scope() as session:
+        db_user = (await session.execute(
+            user_by_telegram_id(cb.from_user.id)
+        )).scalar_one()
+        prefs = dict(db_user.notification_preferences or {})
+        prefs["perfect_day_pregen"] = not prefs.get("perfect_day_pregen", False)
+        # Присваиваем новый dict, чтобы SQLAlchemy заметил изменение JSON-поля
+        db_user.notification_preferences = prefs
+        enabled = prefs["perfect_day_pregen"]
+    
+    await cb.message.edit_reply_markup(reply_markup=perfect_day_keyboard(enabled))
+    await cb.answer(
+        "🌙 План будет готов к утру" if enabled else "Ночная подготовка плана выключена"
+    )
+
+
+@router.callback_query(F.data.in_({"create_perfect_day", "regenerate_perfect_day"}), flags={"db": "none"})
 async def create_perfect_day_handler(cb: types.CallbackQuery) -> None:
-    """Создание плана идеального дня"""
+    """Создание плана идеального дня (готовый ночной план отдается сразу)"""
     # Сразу отвечаем на callback query, чтобы избежать ошибки "query is too old"
     await cb.answer()
     
@@ -147,24 +186,40 @@ async def create_perfect_day_handler(cb: types.CallbackQuery) -> None:
     try:
         async with session_scope() as session:
             db_user = (await session.execute(
-                select(User).where(User.telegram_id == cb.from_user.id)
+                user_by_telegram_id(cb.from_user.id)
             )).scalar_one()
             
-            # Генерируем план
-            plan = await generate_perfect_day_plan(db_user.id, session)
-            
-            # Отправляем план
-            await cb.message.edit_text(
-                plan,
-                reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                    [
-                        InlineKeyboardButton(text="⚔️ Создать задачи в To-Do", callback_data="convert_plan_to_todos"),
-                        InlineKeyboardButton(text="🔄 Новый план", callback_data="create_perfect_day")
-                    ],
-                    [InlineKeyboardButton(text="⬅️ Назад", callback_data="perfect_day_plan")]
-                ]),
-                parse_mode="HTML"
-            )
+            plan_date = get_user_local_time(db_user.timezone).date()
+            context_hash = await perfect_day_context_hash(session, db_user.id, plan_date)
+            prepared = None
+            if cb.data != "regenerate_perfect_day":
+                prepared = await get_prepared_perfect_day_plan(session, db_user.id, plan_date, context_hash)
+            if not prepared:
+                prompt = await build_perfect_day_prompt(db_user.id, session, day=plan_date)
+        
+        renderer = TelegramStreamRenderer(
+            cb.message,
+            header=PERFECT_DAY_HEADER,
+            footer=PERFECT_DAY_FOOTER,
+            formatter=format_perfect_day_plan,
+            parse_mode="HTML",
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                [
+                    InlineKeyboardButton(text="⚔️ Создать задачи в To-Do", callback_data="convert_plan_to_todos"),
+                    InlineKeyboardButton(text="🔄 Новый план", callback_data="regenerate_perfect_day")
+                ],
+                [InlineKeyboardButton(text="⬅️ Назад", callback_data="perfect_day_plan")]
+            ]),
+        )
+        if prepared:
+            # Задачи не менялись с ночной подготовки - план показываем без обращения к ИИ
+            await renderer.finish(prepared)
+            return
+        
+        # Генерируем план, выводя его по мере генерации
+        plan = await renderer.render(deepseek_stream(prompt, max_tokens=PERFECT_DAY_MAX_TOKENS))
+        async with session_scope() as session:
+            await save_perfect_day_plan(session, db_user.id, plan_date, context_hash, plan)
             
     except Exception as e:
         await cb.message.edit_text(
@@ -188,7 +243,7 @@ async def convert_plan_to_todos_handler(cb: types.CallbackQuery) -> None:
         
         async with session_scope() as session:
             db_user = (await session.execute(
-                select(User).where(User.telegram_id == cb.from_user.id)
+                user_by_telegram_id(cb.from_user.id)
             )).scalar_one()
             
             # Создаем задачи из плана
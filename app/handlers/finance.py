@@ -6,6 +6,7 @@ from aiogram import Router, types
 from aiogram.filters import Command
 from sqlalchemy import select
 
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import FinanceTransaction, User
 from app.db.session import session_scope
 
@@ -28,7 +29,7 @@ async def add_expense(message: types.Message) -> None:
     description = " ".join(parts[2:]) if len(parts) > 2 else None
 
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         session.add(
             FinanceTransaction(
                 user_id=db_user.id,
@@ -51,7 +52,7 @@ async def finance_export(message: types.Message) -> None:
     from app.services.exporters import export_user_data_to_excel
 
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         out = Path("exports") / f"user_{db_user.id}.xlsx"
         await export_user_data_to_excel(session, db_user.id, out)
 
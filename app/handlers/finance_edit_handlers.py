@@ -8,6 +8,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import session_scope
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import User, Creditor, Debtor
 from app.keyboards.common import back_main_menu
 from app.services.finance_reminders import send_finance_reminders_for_user
@@ -154,7 +155,7 @@ async def creditor_edit_description_handler(message: types.Message, state: FSMCo
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Получаем кредитора для обновления
             creditor = await session.get(Creditor, creditor_id)
@@ -272,7 +273,7 @@ async def debtor_edit_description_handler(message: types.Message, state: FSMCont
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Получаем должника для обновления
             debtor = await session.get(Debtor, debtor_id)
@@ -320,7 +321,7 @@ async def test_finance_reminders(message: types.Message) -> None:
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Отправляем тестовое финансовое уведомление
             await send_finance_reminders_for_user(session, db_user.id)
@@ -12,6 +12,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import session_scope
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import User, Creditor, Debtor, Income, FinanceTransaction, FinancialGoal
 from app.keyboards.common import creditor_debtor_menu, back_main_menu
 from app.services.finance_reminders import send_finance_reminders_for_user
@@ -134,7 +135,7 @@ async def creditor_description_handler(message: types.Message, state: FSMContext
         return
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         
         creditor = Creditor(
             user_id=db_user.id,
@@ -226,7 +227,7 @@ async def debtor_description_handler(message: types.Message, state: FSMContext)
         return
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         
         debtor = Debtor(
             user_id=db_user.id,
@@ -447,7 +448,7 @@ async def expense_description_handler(message: types.Message, state: FSMContext)
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Создаем транзакцию расхода (отрицательная сумма)
             from app.db.models import FinanceTransaction
@@ -594,7 +595,7 @@ async def income_description_handler(message: types.Message, state: FSMContext)
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             from datetime import date
             
@@ -658,7 +659,7 @@ async def income_list_handler(cb: types.CallbackQuery) -> None:
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Получаем все доходы пользователя
             incomes = (await session.execute(
@@ -804,7 +805,7 @@ async def financial_goal_description_handler(message: types.Message, state: FSMC
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             from decimal import Decimal
             
@@ -859,7 +860,7 @@ async def financial_goals_list_handler(cb: types.CallbackQuery) -> None:
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Получаем все активные финансовые цели пользователя
             goals = (await session.execute(
@@ -923,7 +924,7 @@ async def financial_goal_contribute_start(cb: types.CallbackQuery, state: FSMCon
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Получаем все активные финансовые цели пользователя
             goals = (await session.execute(
@@ -1013,7 +1014,7 @@ async def contribution_amount_handler(message: types.Message, state: FSMContext)
         
         try:
             async with session_scope() as session:
-                db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+                db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
                 
                 # Получаем цель
                 goal = (await session.execute(
@@ -1082,7 +1083,7 @@ async def financial_goals_progress_handler(cb: types.CallbackQuery) -> None:
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Получаем все активные финансовые цели пользователя
             goals = (await session.execute(
@@ -1146,7 +1147,7 @@ async def financial_goals_progress_handler(cb: types.CallbackQuery) -> None:
     await cb.answer()
 
 
-@router.callback_query(F.data == "finance_categories_groups")
+@router.callback_query(F.data == "finance_categories_groups", flags={"db": "readonly"})
 async def finance_categories_groups_handler(cb: types.CallbackQuery) -> None:
     """Показать группировку финансов по основным категориям"""
     user = cb.from_user
@@ -1156,7 +1157,7 @@ async def finance_categories_groups_handler(cb: types.CallbackQuery) -> None:
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Получаем сводку по группам за последние 30 дней
             from app.services.finance_analytics import get_finance_summary_by_groups, get_group_color
@@ -1245,7 +1246,7 @@ async def finance_categories_groups_handler(cb: types.CallbackQuery) -> None:
     await cb.answer()
 
 
-@router.callback_query(F.data.startswith("finance_groups_period_"))
+@router.callback_query(F.data.startswith("finance_groups_period_"), flags={"db": "readonly"})
 async def finance_groups_period_handler(cb: types.CallbackQuery) -> None:
     """Обработчик выбора периода для группировки"""
     user = cb.from_user
@@ -1262,7 +1263,7 @@ async def finance_groups_period_handler(cb: types.CallbackQuery) -> None:
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Получаем сводку по группам за выбранный период
             from app.services.finance_analytics import get_finance_summary_by_groups, get_group_color
@@ -1351,7 +1352,7 @@ async def finance_groups_period_handler(cb: types.CallbackQuery) -> None:
     await cb.answer()
 
 
-@router.callback_query(F.data == "finance_categories_detailed")
+@router.callback_query(F.data == "finance_categories_detailed", flags={"db": "readonly"})
 async def finance_categories_detailed_handler(cb: types.CallbackQuery) -> None:
     """Показать детальную статистику по категориям"""
     user = cb.from_user
@@ -1361,7 +1362,7 @@ async def finance_categories_detailed_handler(cb: types.CallbackQuery) -> None:
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Получаем детальную статистику по категориям за последние 30 дней
             from app.services.finance_analytics import get_category_statistics, get_main_category_group, get_group_color
@@ -1437,7 +1438,7 @@ async def test_finance_todo_creation(message: types.Message) -> None:
     try:
         async with session_scope() as session:
             db_user = (await session.execute(
-                select(User).where(User.telegram_id == message.from_user.id)
+                user_by_telegram_id(message.from_user.id)
             )).scalar_one()
             
             # Создаем задачи для финансовых обязательств
@@ -10,6 +10,7 @@ from aiogram.filters import Command
 from sqlalchemy import select
 
 from app.db.session import session_scope
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import FinanceTransaction, User
 from app.services.finance_analytics import process_bank_csv
 
@@ -44,7 +45,7 @@ async def handle_csv_upload(message: types.Message, bot: types.Bot) -> None:
             csv_text = fix_tbank_csv_format(csv_text)
         
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Обработать CSV через сервис
             result = await process_bank_csv(session, db_user.id, csv_text, bank_type)
@@ -235,7 +236,7 @@ async def handle_bank_csv_legacy(message: types.Message, bot: types.Bot) -> None
     rows = list(reader)
     count = 0
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         for r in rows:
             try:
                 dt = datetime.fromisoformat(r["date"]).date()
@@ -300,7 +301,7 @@ async def handle_excel_upload(message: types.Message, bot: types.Bot) -> None:
                 csv_content = df.to_csv(index=False, sep=',')
                 
                 async with session_scope() as session:
-                    db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+                    db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
                     
                     # Обрабатываем как MBank CSV
                     from app.services.finance_analytics import process_bank_csv
@@ -361,7 +362,7 @@ async def handle_excel_upload(message: types.Message, bot: types.Bot) -> None:
         
         try:
             async with session_scope() as session:
-                db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+                db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
                 
                 # Импортируем Excel через сервис
                 from app.services.excel_importer import import_excel_data
@@ -502,7 +503,7 @@ async def handle_xls_upload(message: types.Message, bot: types.Bot) -> None:
             csv_content = df.to_csv(index=False, sep=',')
             
             async with session_scope() as session:
-                db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+                db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
                 
                 # Обрабатываем как MBank CSV
                 from app.services.finance_analytics import process_bank_csv
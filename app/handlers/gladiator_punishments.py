@@ -5,9 +5,13 @@ from aiogram.filters import Command
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from datetime import datetime, date
 from sqlalchemy import select, func
+from app.db.aggregates import fetch_aggregates
 from app.db.session import session_scope
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import User, Goal, GoalStatus, Todo
-from app.services.gladiator_punishments import generate_gladiator_punishment
+from app.services.job_queue import enqueue_job
+from app.services.llm_jobs import GLADIATOR_PUNISHMENT_JOB
+from app.services.user_profile import UserProfile
 
 router = Router()
 
@@ -54,7 +58,7 @@ async def check_arena_punishment(message_or_cb, user=None) -> None:
     try:
         async with session_scope() as session:
             db_user = (await session.execute(
-                select(User).where(User.telegram_id == user.id)
+                user_by_telegram_id(user.id)
             )).scalar_one()
             
             today = date.today()
@@ -134,48 +138,23 @@ async def check_arena_punishment(message_or_cb, user=None) -> None:
                     parse_mode="HTML"
                 )
             
-            # Генерируем наказание
-            punishment = await generate_gladiator_punishment(
-                overdue_goals=overdue_items['goals'],
-    
-                overdue_todos=overdue_items['todos']
+            # Наказание генерирует воркер очереди и заменяет им сообщение о проверке
+            await enqueue_job(
+                session,
+                GLADIATOR_PUNISHMENT_JOB,
+                chat_id=status_message.chat.id,
+                payload={
+                    "message_id": status_message.message_id,
+                    "overdue_goals": [
+                        {"title": g["title"], "days_overdue": g["days_overdue"]} for g in overdue_items['goals']
+                    ],
+                    "overdue_todos": [
+                        {"title": t["title"], "days_overdue": t["days_overdue"]} for t in overdue_items['todos']
+                    ],
+                },
+                user_id=db_user.id,
             )
             
-            # Создаем клавиатуру для действий
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text="⚔️ Принять наказание", 
-                        callback_data="accept_punishment"
-                    ),
-                    InlineKeyboardButton(
-                        text="🛡️ Исправить дела", 
-                        callback_data="fix_overdue_items"
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        text="📊 Детальный анализ", 
-                        callback_data="overdue_analysis"
-                    )
-                ]
-            ])
-            
-            # Отправляем наказание
-            if hasattr(status_message, 'edit_text'):
-                await status_message.edit_text(
-                    f"⚔️ <b>ПРИГОВОР АРЕНЫ ВЫНЕСЕН!</b>\n\n{punishment}",
-                    reply_markup=keyboard,
-                    parse_mode="HTML"
-                )
-            else:
-                # Для обычных сообщений отправляем новое
-                await message_or_cb.answer(
-                    f"⚔️ <b>ПРИГОВОР АРЕНЫ ВЫНЕСЕН!</b>\n\n{punishment}",
-                    reply_markup=keyboard,
-                    parse_mode="HTML"
-                )
-            
     except Exception as e:
         if hasattr(status_message, 'edit_text'):
             await status_message.edit_text(
@@ -229,40 +208,33 @@ async def fix_overdue_items(cb: types.CallbackQuery) -> None:
     await cb.answer()
 
 
-@router.callback_query(F.data == "overdue_analysis")
-async def overdue_analysis(cb: types.CallbackQuery) -> None:
+@router.callback_query(F.data == "overdue_analysis", flags={"db": "readonly", "query_budget": 2})
+async def overdue_analysis(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Детальный анализ просроченных дел"""
-    user = cb.from_user
-    if not user:
-        await cb.answer()
-        return
-    
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(
-                select(User).where(User.telegram_id == user.id)
-            )).scalar_one()
-            
             today = date.today()
             
-            # Получаем детальную статистику
-            overdue_goals_count = (await session.execute(
-                select(func.count(Goal.id)).where(
-                    Goal.user_id == db_user.id,
-                    Goal.status == GoalStatus.active,
-                    Goal.deadline < today
-                )
-            )).scalar()
-            
-
-            
-            overdue_todos_count = (await session.execute(
-                select(func.count(Todo.id)).where(
-                    Todo.user_id == db_user.id,
-                    Todo.is_completed == False,
-                    Todo.due_date < today
-                )
-            )).scalar()
+            # Получаем детальную статистику одним запросом
+            stats = await fetch_aggregates(
+                session,
+                select(
+                    func.count(Goal.id).filter(Goal.due_date < today).label("overdue_goals"),
+                    func.count(Goal.id).label("active_goals"),
+                ).where(
+                    Goal.user_id == user_profile.id,
+                    Goal.status == GoalStatus.active
+                ),
+                select(
+                    func.count(Todo.id).filter(Todo.due_date < today).label("overdue_todos"),
+                    func.count(Todo.id).label("open_todos"),
+                ).where(
+                    Todo.user_id == user_profile.id,
+                    Todo.is_completed == False
+                ),
+            )
+            overdue_goals_count = stats["overdue_goals"]
+            overdue_todos_count = stats["overdue_todos"]
             
             total_overdue = overdue_goals_count + overdue_todos_count
             
@@ -277,21 +249,7 @@ async def overdue_analysis(cb: types.CallbackQuery) -> None:
                 return
             
             # Рассчитываем процент просрочек
-            total_items = (await session.execute(
-                select(func.count(Goal.id)).where(
-                    Goal.user_id == db_user.id,
-                    Goal.status == GoalStatus.active
-                )
-            )).scalar()
-            
-
-            
-            total_items += (await session.execute(
-                select(func.count(Todo.id)).where(
-                    Todo.user_id == db_user.id,
-                    Todo.is_completed == False
-                )
-            )).scalar()
+            total_items = stats["active_goals"] + stats["open_todos"]
             
             overdue_percentage = (total_overdue / total_items * 100) if total_items > 0 else 0
             
@@ -8,12 +8,14 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from sqlalchemy import select
 
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import Goal, GoalScope, GoalStatus, ABAnalysis, User
 from app.db.models.goal import GoalReminder
 from app.db.session import session_scope
-from app.services.llm import deepseek_complete
+from app.services.llm import deepseek_complete, deepseek_stream
 from app.utils.timezone_utils import get_user_time_info
 from app.keyboards.common import back_main_menu
+from app.utils.stream_renderer import TelegramStreamRenderer
 
 
 router = Router()
@@ -42,7 +44,7 @@ MOTIVATION_MESSAGES = [
 ]
 
 
-@router.message(Command("goal_add"))
+@router.message(Command("goal_add"), flags={"db": "none"})
 async def add_goal(message: types.Message) -> None:
     """Add a simple daily goal from text after command."""
     user = message.from_user
@@ -53,7 +55,7 @@ async def add_goal(message: types.Message) -> None:
         await message.answer("Использование: /goal_add Ваша цель")
         return
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         goal = Goal(
             user_id=db_user.id,
             scope=GoalScope.day,
@@ -67,7 +69,7 @@ async def add_goal(message: types.Message) -> None:
     status_msg = await message.answer("⏳ Генерирую SMART-описание...")
     smart_prompt = f"Оцени цель пользователя и оформи SMART-описание кратко: '{text}'. Выведи 5 пунктов: S,M,A,R,T."
     try:
-        smart = await deepseek_complete(smart_prompt, system="Ты коуч по целям. Кратко и по делу.")
+        smart = await deepseek_complete(smart_prompt, system="Ты коуч по целям. Кратко и по делу.", hedge=True)
 
         await status_msg.edit_text("Цель добавлена ✅\nSMART:\n" + smart)
     except Exception:
@@ -80,7 +82,7 @@ async def list_goals(message: types.Message) -> None:
     if not user:
         return
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         goals = (await session.execute(select(Goal).where(Goal.user_id == db_user.id, Goal.status == GoalStatus.active))).scalars().all()
     if not goals:
         await message.answer("Активных целей нет")
@@ -89,7 +91,7 @@ async def list_goals(message: types.Message) -> None:
     await message.answer("Ваши цели:\n- " + "\n- ".join(lines))
 
 
-@router.message(Command("ab"))
+@router.message(Command("ab"), flags={"db": "none"})
 async def ab_analysis(message: types.Message) -> None:
     """Store quick A/B analysis: /ab сейчас | хочу."""
     user = message.from_user
@@ -101,21 +103,26 @@ async def ab_analysis(message: types.Message) -> None:
         return
     current, desired = [p.strip() for p in payload.split("|", 1)]
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         session.add(ABAnalysis(user_id=db_user.id, current_state=current, desired_state=desired))
     # AI: краткий план действий
     status_msg = await message.answer("⏳ Генерирую план перехода A → B...")
+    renderer = TelegramStreamRenderer(status_msg, header="A/B анализ сохранен ✅\nПлан:\n")
     try:
-        plan = await deepseek_complete(
-            f"Сформируй краткий пошаговый план перехода из состояния A='{current}' в B='{desired}'. Дай 5 шагов.",
-            system="Кратко, по делу, без воды.",
+        await renderer.render(
+            deepseek_stream(
+                f"Сформируй краткий пошаговый план перехода из состояния A='{current}' в B='{desired}'. Дай 5 шагов.",
+                system="Кратко, по делу, без воды.",
+            )
         )
-        await status_msg.edit_text("A/B анализ сохранен ✅\nПлан:\n" + plan)
     except Exception:
-        await status_msg.edit_text("A/B анализ сохранен ✅")
+        if renderer.text:
+            await renderer.finish(renderer.text)
+        else:
+            await status_msg.edit_text("A/B анализ сохранен ✅")
 
 
-@router.message(Command("smart"))
+@router.message(Command("smart"), flags={"db": "none"})
 async def smart_goal(message: types.Message) -> None:
     """Создать SMART-цель: /smart scope title | description | due_date(YYYY-MM-DD)"""
     user = message.from_user
@@ -131,7 +138,7 @@ async def smart_goal(message: types.Message) -> None:
     title, desc, *maybe_due = [p.strip() for p in rest.split("|")]
     due = date.fromisoformat(maybe_due[0]) if maybe_due else None
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         g = Goal(user_id=db_user.id, scope=scope, title=title, description=desc or None, start_date=date.today(), due_date=due)
         session.add(g)
     # AI: SMART-валидация
@@ -140,6 +147,7 @@ async def smart_goal(message: types.Message) -> None:
         smart_feedback = await deepseek_complete(
             f"Проверь SMART цель: title='{title}', desc='{desc}', due='{due}'. Дай улучшения в 3-5 пунктах.",
             system="Эксперт SMART",
+            hedge=True,
         )
         await status_msg.edit_text("SMART цель добавлена ✅\nРекомендации:\n" + smart_feedback)
     except Exception:
@@ -299,7 +307,7 @@ async def goals_add_due_date(message: types.Message, state: FSMContext) -> None:
     await message.answer(text, reply_markup=back_main_menu(), parse_mode=None)
 
 
-@router.message(GoalFSM.waiting_reminder_time)
+@router.message(GoalFSM.waiting_reminder_time, flags={"db": "none"})
 async def goals_add_reminder_time(message: types.Message, state: FSMContext) -> None:
     """Сохраняет время напоминания и создает цель."""
     reminder_time = message.text.strip().lower()
@@ -315,7 +323,7 @@ async def goals_add_reminder_time(message: types.Message, state: FSMContext) ->
     due_date = data.get("due_date")
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == message.from_user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(message.from_user.id))).scalar_one()
         
         # Создаем цель
         goal = Goal(
@@ -356,7 +364,7 @@ async def goals_add_reminder_time(message: types.Message, state: FSMContext) ->
     smart_prompt = f"Оцени цель пользователя и оформи SMART-описание: '{title}'. Выведи 5 пунктов с разметкой Markdown:\n\n**S (Конкретность):**\n**M (Измеримость):**\n**A (Достижимость):**\n**R (Релевантность):**\n**T (Ограниченность во времени):**"
     
     try:
-        smart = await deepseek_complete(smart_prompt, system="Ты коуч по целям. Кратко и по делу.")
+        smart = await deepseek_complete(smart_prompt, system="Ты коуч по целям. Кратко и по делу.", hedge=True)
         
 
         
@@ -392,7 +400,7 @@ async def goals_edit_start(cb: types.CallbackQuery) -> None:
         return
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         goals = (await session.execute(select(Goal).where(Goal.user_id == db_user.id, Goal.status == GoalStatus.active))).scalars().all()
     
     if not goals:
@@ -465,7 +473,7 @@ async def goals_reminders(cb: types.CallbackQuery) -> None:
         return
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         
         # Получаем цели с напоминаниями
         reminders = (
@@ -10,6 +10,7 @@ from sqlalchemy import select, desc
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 from app.db.session import session_scope
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import User, HealthMetric, HealthGoal, HealthDailyReminder
 from app.keyboards.common import health_menu, health_track_keyboard, back_main_menu
 from app.services.llm import deepseek_complete
@@ -317,7 +318,7 @@ async def health_connect_auth_command(message: types.Message) -> None:
         from app.services.health_connect import HealthConnectService
         
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Обмениваем код на токены
             health_service = HealthConnectService()
@@ -353,7 +354,7 @@ async def health_connect_sync_command(message: types.Message) -> None:
         from app.services.health_connect import HealthConnectService
         
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Здесь должна быть логика проверки подключения Health Connect
             # Пока что просто показываем сообщение
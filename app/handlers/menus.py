@@ -19,6 +19,7 @@ from app.keyboards.common import (
 )
 from sqlalchemy import select
 from app.db.session import session_scope
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import User, Goal, GoalStatus
 from app.services.exporters import export_user_data_to_excel
 from pathlib import Path
@@ -194,7 +195,7 @@ async def goals_help(cb: types.CallbackQuery) -> None:
     await cb.answer()
 
 
-@router.callback_query(F.data == "menu_finance")
+@router.callback_query(F.data == "menu_finance", flags={"db": "none"})
 async def menu_finance(cb: types.CallbackQuery) -> None:
     """Показать главное меню финансов с мини-отчетом"""
     user = cb.from_user
@@ -202,53 +203,19 @@ async def menu_finance(cb: types.CallbackQuery) -> None:
         await cb.answer()
         return
     
-    # Сначала показываем сообщение о том, что ИИ анализирует финансы
-    await cb.message.edit_text(
-        "🤖 <b>AI анализирует финансы...</b>\n\n"
-        "Пожалуйста, подождите, пока ИИ проанализирует ваши данные и даст рекомендации.",
-        reply_markup=back_main_menu(),
-        parse_mode="HTML"
-    )
-    
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         
         # Получить финансовые данные для отчета
         from app.services.finance_analytics import get_finance_summary
         summary = await get_finance_summary(session, db_user.id)
-        
-        # Получить совет от ИИ
-        from app.services.llm import deepseek_complete
-        try:
-            ai_advice = await deepseek_complete(
-                f"Дай краткий финансовый совет на основе данных: доходы {summary['monthly_income']}, расходы {summary['monthly_expenses']}, кредиторы {summary['total_creditors']}, должники {summary['total_debtors']}. Совет должен быть практичным и мотивирующим. Максимум 2-3 предложения.",
-                system="Ты финансовый консультант. Дай краткий, практичный совет в 2-3 предложения.",
-                max_tokens=100
-            )
-            # Заменить звездочки на HTML-теги для жирного текста
-            import re
-            ai_advice = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', ai_advice)
-            
-            # Ограничиваем длину совета и добавляем переносы строк
-            if len(ai_advice) > 300:
-                # Находим последнее полное предложение в пределах лимита
-                truncated = ai_advice[:300]
-                last_period = truncated.rfind('.')
-                if last_period > 250:  # Если точка найдена в разумных пределах
-                    ai_advice = truncated[:last_period + 1]
-                else:
-                    ai_advice = truncated + "..."
-            
-            # Добавляем переносы строк для лучшего форматирования
-            ai_advice = ai_advice.replace(". ", ".\n")
-            
-            # Убираем лишние переносы строк в конце
-            ai_advice = ai_advice.strip()
-            
-        except Exception:
-            ai_advice = "Не удалось получить совет от ИИ"
-        
-        report_text = f"""💰 <b>Финансовый отчет</b>
+    
+    # Совет ИИ берем из кеша, пока показатели почти не изменились. Ждем его уже
+    # после закрытия сессии, чтобы не держать соединение из пула
+    from app.services.finance_advice import get_finance_advice
+    ai_advice = await get_finance_advice(db_user.id, summary) or "⏳ Совет ИИ готовится, откройте отчет чуть позже"
+    
+    report_text = f"""💰 <b>Финансовый отчет</b>
 
 💵 <b>Текущий месяц:</b>
 📈 Доходы: {summary['monthly_income']:,.2f} ₽
@@ -260,11 +227,11 @@ async def menu_finance(cb: types.CallbackQuery) -> None:
 
 🤖 <b>Совет ИИ:</b>
 {ai_advice}"""
-        
-        # Проверяем длину сообщения (Telegram ограничивает 4096 символов)
-        if len(report_text) > 4000:
-            # Если сообщение слишком длинное, разделяем его
-            main_report = f"""💰 <b>Финансовый отчет</b>
+    
+    # Проверяем длину сообщения (Telegram ограничивает 4096 символов)
+    if len(report_text) > 4000:
+        # Если сообщение слишком длинное, разделяем его
+        main_report = f"""💰 <b>Финансовый отчет</b>
 
 💵 <b>Текущий месяц:</b>
 📈 Доходы: {summary['monthly_income']:,.2f} ₽
@@ -274,19 +241,19 @@ async def menu_finance(cb: types.CallbackQuery) -> None:
 💸 <b>Кредиторы:</b> {summary['total_creditors']:,.2f} ₽
 🏦 <b>Должники:</b> {summary['total_debtors']:,.2f} ₽"""
 
-            # Отправляем основной отчет
-            await cb.message.edit_text(main_report, reply_markup=finance_menu(), parse_mode="HTML")
-            
-            # Отправляем совет ИИ отдельным сообщением
-            await cb.message.answer(
-                f"🤖 <b>Совет ИИ:</b>\n\n{ai_advice}",
-                parse_mode="HTML"
-            )
-        else:
-            # Если сообщение помещается, отправляем всё вместе
-            await cb.message.edit_text(report_text, reply_markup=finance_menu(), parse_mode="HTML")
+        # Отправляем основной отчет
+        await cb.message.edit_text(main_report, reply_markup=finance_menu(), parse_mode="HTML")
         
-        await cb.answer()
+        # Отправляем совет ИИ отдельным сообщением
+        await cb.message.answer(
+            f"🤖 <b>Совет ИИ:</b>\n\n{ai_advice}",
+            parse_mode="HTML"
+        )
+    else:
+        # Если сообщение помещается, отправляем всё вместе
+        await cb.message.edit_text(report_text, reply_markup=finance_menu(), parse_mode="HTML")
+    
+    await cb.answer()
 
 
 @router.callback_query(F.data == "menu_nutrition")
@@ -308,7 +275,7 @@ async def goals_list(cb: types.CallbackQuery) -> None:
         await cb.answer()
         return
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         
         # Получаем обычные цели
         goals = (
@@ -383,7 +350,7 @@ async def finance_export_cb(cb: types.CallbackQuery) -> None:
         await cb.answer()
         return
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         out = Path("exports") / f"user_{db_user.id}.xlsx"
         await export_user_data_to_excel(session, db_user.id, out)
     try:
@@ -513,7 +480,7 @@ async def finance_creditors(cb: types.CallbackQuery) -> None:
         return
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         
         # Получить кредиторов
         from app.services.finance_analytics import get_creditors
@@ -596,7 +563,7 @@ async def finance_debtors(cb: types.CallbackQuery) -> None:
         return
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         
         # Получить должников
         from app.services.finance_analytics import get_debtors
@@ -7,6 +7,7 @@ from aiogram.filters import Command
 from sqlalchemy import select
 
 from app.db.session import session_scope
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import User, Motivation
 from app.keyboards.common import motivation_menu, back_main_menu, motivation_edit_menu
 from app.services.llm import deepseek_complete
@@ -25,14 +26,14 @@ async def _get_or_create_motivation(user_id: int) -> Motivation:
         return m
 
 
-@router.callback_query(F.data == "menu_motivation")
+@router.callback_query(F.data == "menu_motivation", flags={"db": "readonly"})
 async def menu_motivation(cb: types.CallbackQuery) -> None:
     user = cb.from_user
     if not user:
         await cb.answer()
         return
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         mot = (
             await session.execute(select(Motivation).where(Motivation.user_id == db_user.id))
         ).scalar_one_or_none()
@@ -69,14 +70,14 @@ async def mot_edit_year_goal(cb: types.CallbackQuery) -> None:
     await cb.answer()
 
 
-@router.callback_query(F.data == "mot_view")
+@router.callback_query(F.data == "mot_view", flags={"db": "readonly"})
 async def mot_view(cb: types.CallbackQuery) -> None:
     user = cb.from_user
     if not user:
         await cb.answer()
         return
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         mot = (
             await session.execute(select(Motivation).where(Motivation.user_id == db_user.id))
         ).scalar_one_or_none()
@@ -90,14 +91,14 @@ async def mot_view(cb: types.CallbackQuery) -> None:
     await cb.answer()
 
 
-@router.callback_query(F.data == "mot_year_goal")
+@router.callback_query(F.data == "mot_year_goal", flags={"db": "readonly"})
 async def mot_year_goal(cb: types.CallbackQuery) -> None:
     user = cb.from_user
     if not user:
         await cb.answer()
         return
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         mot = (
             await session.execute(select(Motivation).where(Motivation.user_id == db_user.id))
         ).scalar_one_or_none()
@@ -109,14 +110,14 @@ async def mot_year_goal(cb: types.CallbackQuery) -> None:
     await cb.answer()
 
 
-@router.callback_query(F.data == "mot_mission")
+@router.callback_query(F.data == "mot_mission", flags={"db": "readonly"})
 async def mot_mission(cb: types.CallbackQuery) -> None:
     user = cb.from_user
     if not user:
         await cb.answer()
         return
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         mot = (
             await session.execute(select(Motivation).where(Motivation.user_id == db_user.id))
         ).scalar_one_or_none()
@@ -125,14 +126,14 @@ async def mot_mission(cb: types.CallbackQuery) -> None:
     await cb.answer()
 
 
-@router.callback_query(F.data == "mot_values")
+@router.callback_query(F.data == "mot_values", flags={"db": "readonly"})
 async def mot_values(cb: types.CallbackQuery) -> None:
     user = cb.from_user
     if not user:
         await cb.answer()
         return
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         mot = (
             await session.execute(select(Motivation).where(Motivation.user_id == db_user.id))
         ).scalar_one_or_none()
@@ -140,7 +141,7 @@ async def mot_values(cb: types.CallbackQuery) -> None:
     await cb.message.edit_text(text, reply_markup=back_main_menu(), parse_mode=None)
     await cb.answer()
 
-@router.message(Command("set_vision"))
+@router.message(Command("set_vision"), flags={"db": "none"})
 async def set_vision(message: types.Message) -> None:
     user = message.from_user
     if not user:
@@ -150,7 +151,7 @@ async def set_vision(message: types.Message) -> None:
         await message.answer("Использование: /set_vision текст")
         return
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         mot = (
             await session.execute(select(Motivation).where(Motivation.user_id == db_user.id))
         ).scalar_one_or_none()
@@ -160,13 +161,13 @@ async def set_vision(message: types.Message) -> None:
         mot.vision = vision
     status_msg = await message.answer("⏳ Генерирую подсказку по видению...")
     try:
-        hint = await deepseek_complete(f"Улучшить и усилить видение: {vision}")
+        hint = await deepseek_complete(f"Улучшить и усилить видение: {vision}", hedge=True)
         await status_msg.edit_text("Видение сохранено ✅\nПодсказка ИИ:\n" + hint)
     except Exception:
         await status_msg.edit_text("Видение сохранено ✅")
 
 
-@router.message(Command("set_mission"))
+@router.message(Command("set_mission"), flags={"db": "none"})
 async def set_mission(message: types.Message) -> None:
     user = message.from_user
     if not user:
@@ -176,7 +177,7 @@ async def set_mission(message: types.Message) -> None:
         await message.answer("Использование: /set_mission текст")
         return
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         mot = (
             await session.execute(select(Motivation).where(Motivation.user_id == db_user.id))
         ).scalar_one_or_none()
@@ -186,7 +187,7 @@ async def set_mission(message: types.Message) -> None:
         mot.mission = mission
     status_msg = await message.answer("⏳ Генерирую подсказку по миссии...")
     try:
-        hint = await deepseek_complete(f"Улучшить миссию: {mission}")
+        hint = await deepseek_complete(f"Улучшить миссию: {mission}", hedge=True)
         await status_msg.edit_text("Миссия сохранена ✅\nПодсказка ИИ:\n" + hint)
     except Exception:
         await status_msg.edit_text("Миссия сохранена ✅")
@@ -202,7 +203,7 @@ async def set_values(message: types.Message) -> None:
         await message.answer("Использование: /set_values список через запятую")
         return
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         mot = (
             await session.execute(select(Motivation).where(Motivation.user_id == db_user.id))
         ).scalar_one_or_none()
@@ -225,7 +226,7 @@ async def set_year_goal(message: types.Message) -> None:
     year_str, goal = [p.strip() for p in payload.split("|", 1)]
     year = int(year_str)
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         mot = (
             await session.execute(select(Motivation).where(Motivation.user_id == db_user.id))
         ).scalar_one_or_none()
@@ -8,11 +8,13 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from sqlalchemy import select, desc
 
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import MealPlan, MealType, User, CookingSession, NutritionReminder
 from app.db.session import session_scope
 from app.keyboards.common import back_main_menu
 from app.services.llm import deepseek_complete
-from app.handlers.nutrition_budget import get_user_food_budget
+from app.services.job_queue import enqueue_job
+from app.services.llm_jobs import COOKING_PLAN_JOB
 from app.utils.timezone_utils import get_user_time_info
 
 router = Router()
@@ -39,7 +41,7 @@ async def plan_meal(message: types.Message) -> None:
         title = " ".join(parts[1:])
 
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         session.add(MealPlan(user_id=db_user.id, date=plan_date, type=meal_type, title=title))
     await message.answer("Прием пищи запланирован ✅")
 
@@ -67,57 +69,17 @@ async def nutrition_cooking_now(cb: types.CallbackQuery) -> None:
         await cb.message.edit_text("⏳ Генерирую план готовки...", reply_markup=back_main_menu())
     except Exception:
         pass
-        
+    
+    # План генерирует воркер очереди - соединение с БД не держим на время запроса к ИИ
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
-        
-        # Получаем информацию о бюджете питания пользователя
-        budget_info = await get_user_food_budget(session, db_user.id)
-        print(f"DEBUG: budget_info = {budget_info}")  # Временное логирование
-        
-        # Обновляем сообщение о прогрессе
-        try:
-            await cb.message.edit_text("🤖 Обращаюсь к ИИ для генерации плана...", reply_markup=back_main_menu())
-        except Exception:
-            pass
-        
-        # Генерируем план питания
-        try:
-            from app.services.nutrition_plan_generator import generate_cooking_plan, generate_fallback_plan
-            plan_text = await generate_cooking_plan(budget_info)
-            if not plan_text or len(plan_text.strip()) < 10:
-                plan_text = generate_fallback_plan(budget_info, "Пустой ответ от ИИ")
-        except Exception as e:
-            print(f"DEBUG: Ошибка в generate_cooking_plan: {e}")
-            plan_text = generate_fallback_plan(budget_info, str(e))
-        
-        # Сохраняем в базу
-        session.add(CookingSession(user_id=db_user.id, cooking_date=date.today(), instructions=plan_text))
-        await session.commit()
-    # Сначала заголовок с информацией о бюджете, затем контент двумя сообщениями
-    budget_text = f" (бюджет: {budget_info['description']})" if budget_info and budget_info["type"] else ""
-    header_text = f"👨‍🍳 План готовки на 2 дня{budget_text}:"
-    await cb.message.edit_text(header_text, reply_markup=back_main_menu(), parse_mode="HTML")
-    
-    # Конвертируем Markdown в HTML для корректного отображения
-    plan_text_html = _convert_markdown_to_html(plan_text)
-    
-    # Разбиваем на части и отправляем
-    print(f"DEBUG: Длина плана после HTML конвертации: {len(plan_text_html)} символов")
-    print(f"DEBUG: Первые 200 символов HTML плана: {plan_text_html[:200]}...")
-    print(f"DEBUG: Последние 200 символов HTML плана: ...{plan_text_html[-200:]}")
-    
-    parts = _split_into_multiple_messages(plan_text_html)
-    print(f"DEBUG: План разбит на {len(parts)} частей")
-    
-    # Отправляем все части
-    for i, part in enumerate(parts):
-        print(f"DEBUG: Отправляю часть {i+1} длиной {len(part)} символов")
-        print(f"DEBUG: Содержимое части {i+1}:")
-        print("-" * 40)
-        print(part)
-        print("-" * 40)
-        await cb.message.answer(part, parse_mode="HTML")
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
+        await enqueue_job(
+            session,
+            COOKING_PLAN_JOB,
+            chat_id=cb.message.chat.id,
+            payload={"message_id": cb.message.message_id},
+            user_id=db_user.id,
+        )
 
 
 @router.callback_query(F.data == "nutrition_body_recomp")
@@ -127,7 +89,7 @@ async def nutrition_body_recomp(cb: types.CallbackQuery) -> None:
         await cb.answer()
         return
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         reminder = (
             await session.execute(select(NutritionReminder).where(NutritionReminder.user_id == db_user.id))
         ).scalar_one_or_none()
@@ -160,7 +122,7 @@ async def nutrition_body_recomp_set(message: types.Message) -> None:
     goal = parts[0]
     calories = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else None
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         reminder = (
             await session.execute(select(NutritionReminder).where(NutritionReminder.user_id == db_user.id))
         ).scalar_one_or_none()
@@ -212,7 +174,7 @@ async def set_shop_time(message: types.Message, state: FSMContext) -> None:
     if not user:
         return
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         reminder = (
             await session.execute(select(NutritionReminder).where(NutritionReminder.user_id == db_user.id))
         ).scalar_one_or_none()
@@ -250,7 +212,7 @@ async def nutrition_history(cb: types.CallbackQuery) -> None:
         await cb.answer()
         return
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         sessions = (
             await session.execute(
                 select(CookingSession)
@@ -688,7 +650,7 @@ async def test_nutrition_settings(message: types.Message) -> None:
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Получаем настройки питания
             reminder = (await session.execute(
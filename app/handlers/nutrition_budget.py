@@ -7,6 +7,7 @@ from sqlalchemy import select
 from decimal import Decimal
 
 from app.db.session import session_scope
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import User, Income
 from app.keyboards.common import back_main_menu
 from app.services.finance_analytics import get_finance_summary
@@ -31,7 +32,7 @@ async def nutrition_budget_menu(cb: types.CallbackQuery) -> None:
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Получаем текущие настройки бюджета
             current_budget_text = ""
@@ -112,7 +113,7 @@ async def process_percentage(message: types.Message, state: FSMContext) -> None:
             return
         
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Сохраняем настройки
             db_user.food_budget_type = "percentage_income"
@@ -185,7 +186,7 @@ async def process_fixed_amount(message: types.Message, state: FSMContext) -> Non
             return
         
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Сохраняем настройки
             db_user.food_budget_type = "fixed_amount"
@@ -235,7 +236,7 @@ async def budget_reset(cb: types.CallbackQuery) -> None:
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Сбрасываем настройки
             db_user.food_budget_type = None
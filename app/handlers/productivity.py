@@ -6,6 +6,7 @@ from aiogram import Router, types
 from aiogram.filters import Command
 from sqlalchemy import select
 
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import PomodoroSession, User
 from app.db.session import session_scope
 
@@ -19,7 +20,7 @@ async def start_pomodoro(message: types.Message) -> None:
     if not user:
         return
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         session.add(PomodoroSession(user_id=db_user.id))
     await message.answer("Помодоро начат на 25 минут. Фокус!")
 
@@ -6,6 +6,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from app.db.session import session_scope
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import User, GeneralThought, Book, BookThought
 from app.keyboards.common import quick_actions_menu, back_main_menu
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
@@ -103,7 +104,7 @@ async def quick_quote_author_handler(message: types.Message, state: FSMContext)
     try:
         async with session_scope() as session:
             db_user = (await session.execute(
-                select(User).where(User.telegram_id == message.from_user.id)
+                user_by_telegram_id(message.from_user.id)
             )).scalar_one()
             
             from app.db.models.book import BookQuote
@@ -176,7 +177,7 @@ async def quick_thought_handler(message: types.Message, state: FSMContext) -> No
     try:
         async with session_scope() as session:
             db_user = (await session.execute(
-                select(User).where(User.telegram_id == message.from_user.id)
+                user_by_telegram_id(message.from_user.id)
             )).scalar_one()
             
             from app.db.models.book import GeneralThought
@@ -212,7 +213,7 @@ async def view_thoughts_handler(cb: types.CallbackQuery) -> None:
     user = cb.from_user
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         
         # Получаем общие мысли
         general_thoughts = (await session.execute(
@@ -299,7 +300,7 @@ async def view_all_thoughts_handler(cb: types.CallbackQuery) -> None:
     user = cb.from_user
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         
         # Получаем общие мысли
         general_thoughts = (await session.execute(
@@ -445,7 +446,7 @@ async def quick_expense_category_handler(cb: types.CallbackQuery, state: FSMCont
     try:
         async with session_scope() as session:
             db_user = (await session.execute(
-                select(User).where(User.telegram_id == cb.from_user.id)
+                user_by_telegram_id(cb.from_user.id)
             )).scalar_one()
             
             from app.db.models.finance import FinanceTransaction
@@ -839,7 +840,7 @@ async def quick_todo_description_handler(message: types.Message, state: FSMConte
     try:
         async with session_scope() as session:
             db_user = (await session.execute(
-                select(User).where(User.telegram_id == message.from_user.id)
+                user_by_telegram_id(message.from_user.id)
             )).scalar_one()
             
             from app.db.models.todo import Todo
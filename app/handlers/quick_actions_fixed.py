@@ -5,6 +5,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from app.db.session import session_scope
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import User
 from app.keyboards.common import quick_actions_menu, back_main_menu
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
@@ -104,7 +105,7 @@ async def quick_quote_author_handler(message: types.Message, state: FSMContext)
     try:
         async with session_scope() as session:
             db_user = (await session.execute(
-                select(User).where(User.telegram_id == message.from_user.id)
+                user_by_telegram_id(message.from_user.id)
             )).scalar_one()
             
             from app.db.models.book import BookQuote
@@ -184,7 +185,7 @@ async def quick_goal_description_handler(message: types.Message, state: FSMConte
     try:
         async with session_scope() as session:
             db_user = (await session.execute(
-                select(User).where(User.telegram_id == message.from_user.id)
+                user_by_telegram_id(message.from_user.id)
             )).scalar_one()
             
             from app.db.models.goal import Goal, GoalStatus, GoalScope
@@ -243,7 +244,7 @@ async def quick_thought_handler(message: types.Message, state: FSMContext) -> No
     try:
         async with session_scope() as session:
             db_user = (await session.execute(
-                select(User).where(User.telegram_id == message.from_user.id)
+                user_by_telegram_id(message.from_user.id)
             )).scalar_one()
             
             from app.db.models.book import BookThought
@@ -357,7 +358,7 @@ async def quick_expense_category_handler(cb: types.CallbackQuery, state: FSMCont
     try:
         async with session_scope() as session:
             db_user = (await session.execute(
-                select(User).where(User.telegram_id == cb.from_user.id)
+                user_by_telegram_id(cb.from_user.id)
             )).scalar_one()
             
             from app.db.models.finance import FinanceTransaction
@@ -749,7 +750,7 @@ async def quick_todo_description_handler(message: types.Message, state: FSMConte
     try:
         async with session_scope() as session:
             db_user = (await session.execute(
-                select(User).where(User.telegram_id == message.from_user.id)
+                user_by_telegram_id(message.from_user.id)
             )).scalar_one()
             
             from app.db.models.todo import Todo
@@ -6,6 +6,7 @@ from aiogram import Router, types
 from aiogram.filters import Command
 
 from app.db.session import session_scope
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import RoutineLog, RoutineItem, User
 
 router = Router()
@@ -29,7 +30,7 @@ async def check_item(message: types.Message) -> None:
         if item is None:
             await message.answer("Пункт не найден")
             return
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         session.add(RoutineLog(user_id=db_user.id, item_id=item_id, date=check_date, completed=True))
     await message.answer("Отмечено ✅")
 
@@ -6,6 +6,7 @@ from aiogram.fsm.context import FSMContext
 from sqlalchemy import select
 
 from app.db.session import session_scope
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import User, Book, BookStatus
 from app.keyboards.common import main_menu, start_keyboard, back_main_menu
 from app.db.models.motivation import Motivation
@@ -30,7 +31,7 @@ async def start_handler(message: types.Message) -> None:
     if not user:
         return
     async with session_scope() as session:
-        existing = await session.execute(select(User).where(User.telegram_id == user.id))
+        existing = await session.execute(user_by_telegram_id(user.id))
         instance = existing.scalar_one_or_none()
         if not instance:
             instance = User(
@@ -43,7 +44,7 @@ async def start_handler(message: types.Message) -> None:
 
     main_goal = None
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         mot = (
             await session.execute(select(Motivation).where(Motivation.user_id == db_user.id))
         ).scalar_one_or_none()
@@ -93,7 +94,7 @@ async def start_button_handler(message: types.Message) -> None:
     
     main_goal = None
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         mot = (
             await session.execute(select(Motivation).where(Motivation.user_id == db_user.id))
         ).scalar_one_or_none()
@@ -120,7 +121,7 @@ async def quick_quote_button_handler(message: types.Message, state: FSMContext)
         return
     
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         
         # Получаем книги пользователя (читает сейчас или прочитал)
         books = await session.execute(
@@ -266,7 +267,7 @@ async def main_menu_button_handler(message: types.Message) -> None:
     
     main_goal = None
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
         mot = (
             await session.execute(select(Motivation).where(Motivation.user_id == db_user.id))
         ).scalar_one_or_none()
@@ -8,6 +8,7 @@ from aiogram.filters import Command
 from sqlalchemy import select
 
 from app.db.session import session_scope
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import User
 from app.db.models.motivation import Motivation
 
@@ -34,7 +35,7 @@ async def test_reminders(message: types.Message) -> None:
         pass
 
     async with session_scope() as session:
-        db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+        db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
 
         # Motivation
         mot = (
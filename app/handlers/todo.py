@@ -10,14 +10,17 @@ from sqlalchemy import select, and_, or_
 from sqlalchemy.orm import selectinload
 from aiogram.filters import Command
 
-from app.db.models import Todo, User
+from app.db.hot_queries import completed_todos, open_todos, user_by_telegram_id
+from app.db.models import Todo, TodoOrigin, User
 from app.db.session import session_scope
 from app.keyboards.common import (
     todo_menu, todo_priority_menu, todo_edit_menu, 
     todo_list_keyboard, todo_view_keyboard, todo_daily_reminder_keyboard,
     todo_type_menu, back_main_menu
 )
+from app.services.todo_operations import copy_todos, delete_todos, toggle_todo
 from app.services.todo_reminders import send_test_todo_reminder
+from app.services.user_profile import UserProfile
 
 router = Router()
 
@@ -165,7 +168,7 @@ async def todo_date_handler(message: types.Message, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data.startswith("todo_priority_"))
-async def todo_priority_handler(cb: types.CallbackQuery, state: FSMContext) -> None:
+async def todo_priority_handler(cb: types.CallbackQuery, state: FSMContext, user_profile: UserProfile) -> None:
     """Обработка выбора приоритета"""
     priority = cb.data.replace("todo_priority_", "")
     
@@ -182,16 +185,11 @@ async def todo_priority_handler(cb: types.CallbackQuery, state: FSMContext) -> N
     if todo_id:
         # Редактируем существующую задачу
         async with session_scope() as session:
-            user = await session.execute(
-                select(User).where(User.telegram_id == cb.from_user.id)
-            )
-            db_user = user.scalar_one()
-            
             todo = await session.execute(
                 select(Todo).where(
                     and_(
                         Todo.id == todo_id,
-                        Todo.user_id == db_user.id
+                        Todo.user_id == user_profile.id
                     )
                 )
             )
@@ -292,7 +290,7 @@ async def create_todo_from_state(message_or_cb, state: FSMContext) -> None:
     
     async with session_scope() as session:
         user = await session.execute(
-            select(User).where(User.telegram_id == message_or_cb.from_user.id)
+            user_by_telegram_id(message_or_cb.from_user.id)
         )
         db_user = user.scalar_one()
         
@@ -370,25 +368,12 @@ async def create_todo_from_state(message_or_cb, state: FSMContext) -> None:
     await state.clear()
 
 
-@router.callback_query(F.data == "todo_list")
-async def todo_list_handler(cb: types.CallbackQuery) -> None:
+@router.callback_query(F.data == "todo_list", flags={"db": "readonly", "query_budget": 4})
+async def todo_list_handler(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Показать список задач пользователя"""
     async with session_scope() as session:
-        user = await session.execute(
-            select(User).where(User.telegram_id == cb.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
         # Получаем все НЕ выполненные задачи пользователя
-        todos = await session.execute(
-            select(Todo).where(
-                and_(
-                    Todo.user_id == db_user.id,
-                    Todo.is_completed == False
-                )
-            ).order_by(Todo.due_date, Todo.priority)
-        )
-        todos_list = todos.scalars().all()
+        todos_list = (await session.execute(open_todos(user_profile.id))).scalars().all()
     
     if not todos_list:
         await cb.message.edit_text(
@@ -436,25 +421,12 @@ async def todo_list_handler(cb: types.CallbackQuery) -> None:
     await cb.answer()
 
 
-@router.callback_query(F.data == "todo_completed")
-async def todo_completed_handler(cb: types.CallbackQuery) -> None:
+@router.callback_query(F.data == "todo_completed", flags={"db": "readonly", "query_budget": 4})
+async def todo_completed_handler(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Показать список выполненных задач пользователя"""
     async with session_scope() as session:
-        user = await session.execute(
-            select(User).where(User.telegram_id == cb.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
         # Получаем все выполненные задачи пользователя
-        completed_todos = await session.execute(
-            select(Todo).where(
-                and_(
-                    Todo.user_id == db_user.id,
-                    Todo.is_completed == True
-                )
-            ).order_by(Todo.due_date.desc(), Todo.priority)
-        )
-        completed_list = completed_todos.scalars().all()
+        completed_list = (await session.execute(completed_todos(user_profile.id))).scalars().all()
     
     if not completed_list:
         await cb.message.edit_text(
@@ -501,8 +473,8 @@ async def todo_completed_handler(cb: types.CallbackQuery) -> None:
     await cb.answer()
 
 
-@router.callback_query(F.data.startswith("todo_view:"))
-async def todo_view_handler(cb: types.CallbackQuery) -> None:
+@router.callback_query(F.data.startswith("todo_view:"), flags={"db": "readonly", "query_budget": 4})
+async def todo_view_handler(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Показать детали задачи"""
     todo_id = int(cb.data.split(":")[1])
     
@@ -517,12 +489,7 @@ async def todo_view_handler(cb: types.CallbackQuery) -> None:
             return
         
         # Проверяем, что задача принадлежит пользователю
-        user = await session.execute(
-            select(User).where(User.telegram_id == cb.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
-        if todo_obj.user_id != db_user.id:
+        if todo_obj.user_id != user_profile.id:
             await cb.answer("❌ Доступ запрещен")
             return
         
@@ -565,42 +532,27 @@ async def todo_view_handler(cb: types.CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.startswith("todo_mark_complete:"))
-async def todo_mark_complete_handler(cb: types.CallbackQuery) -> None:
+async def todo_mark_complete_handler(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Отметить задачу как выполненную"""
     todo_id = int(cb.data.split(":")[1])
     
     async with session_scope() as session:
-        todo = await session.execute(
-            select(Todo).where(Todo.id == todo_id)
-        )
-        todo_obj = todo.scalar_one_or_none()
+        # Переключаем статус одним UPDATE ... RETURNING (только задачи пользователя)
+        toggled = await toggle_todo(session, user_profile.id, todo_id)
         
-        if not todo_obj:
+        if toggled is None:
             await cb.answer("❌ Задача не найдена")
             return
         
-        # Проверяем, что задача принадлежит пользователю
-        user = await session.execute(
-            select(User).where(User.telegram_id == cb.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
-        if todo_obj.user_id != db_user.id:
-            await cb.answer("❌ Доступ запрещен")
-            return
-        
-        # Переключаем статус
-        todo_obj.is_completed = not todo_obj.is_completed
-        await session.commit()
-        
-        status_text = "✅ выполнена" if todo_obj.is_completed else "⭕ в процессе"
+        is_completed, title = toggled
+        status_text = "✅ выполнена" if is_completed else "⭕ в процессе"
         await cb.answer(f"Задача {status_text}")
         
         # Если задача выполнена, предлагаем удалить её
-        if todo_obj.is_completed:
+        if is_completed:
             await cb.message.edit_text(
                 f"✅ <b>Задача выполнена!</b>\n\n"
-                f"📝 <b>{todo_obj.title}</b>\n\n"
+                f"📝 <b>{title}</b>\n\n"
                 "Хотите удалить выполненную задачу из списка?",
                 reply_markup=types.InlineKeyboardMarkup(
                     inline_keyboard=[
@@ -615,7 +567,7 @@ async def todo_mark_complete_handler(cb: types.CallbackQuery) -> None:
             return
     
     # Обновляем сообщение
-    await todo_view_handler(cb)
+    await todo_view_handler(cb, user_profile)
 
 
 @router.callback_query(F.data.startswith("todo_delete_confirm:"))
@@ -640,55 +592,34 @@ async def todo_delete_confirm_handler(cb: types.CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.startswith("todo_delete:"))
-async def todo_delete_handler(cb: types.CallbackQuery) -> None:
+async def todo_delete_handler(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Удаление задачи"""
     todo_id = int(cb.data.split(":")[1])
     
     async with session_scope() as session:
-        todo = await session.execute(
-            select(Todo).where(Todo.id == todo_id)
-        )
-        todo_obj = todo.scalar_one_or_none()
-        
-        if not todo_obj:
-            await cb.answer("❌ Задача не найдена")
-            return
-        
-        # Проверяем, что задача принадлежит пользователю
-        user = await session.execute(
-            select(User).where(User.telegram_id == cb.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
-        if todo_obj.user_id != db_user.id:
-            await cb.answer("❌ Доступ запрещен")
-            return
-        
-        # Удаляем задачу
-        await session.delete(todo_obj)
-        await session.commit()
-        
-        await cb.answer("✅ Задача удалена")
+        # Удаляем одним DELETE (только задачи пользователя)
+        deleted_ids = await delete_todos(session, user_profile.id, [todo_id])
+    
+    if not deleted_ids:
+        await cb.answer("❌ Задача не найдена")
+        return
+    
+    await cb.answer("✅ Задача удалена")
     
     # Возвращаемся к списку задач
-    await todo_list_handler(cb)
+    await todo_list_handler(cb, user_profile)
 
 
 
 
 
-@router.callback_query(F.data == "todo_edit")
-async def todo_edit_start(cb: types.CallbackQuery) -> None:
+@router.callback_query(F.data == "todo_edit", flags={"db": "readonly"})
+async def todo_edit_start(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Начало редактирования задачи"""
     async with session_scope() as session:
-        user = await session.execute(
-            select(User).where(User.telegram_id == cb.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
         # Получаем все задачи пользователя для выбора
         todos = await session.execute(
-            select(Todo).where(Todo.user_id == db_user.id).order_by(Todo.due_date)
+            select(Todo).where(Todo.user_id == user_profile.id).order_by(Todo.due_date)
         )
         todos_list = todos.scalars().all()
     
@@ -724,18 +655,13 @@ async def todo_edit_start(cb: types.CallbackQuery) -> None:
     await cb.answer()
 
 
-@router.callback_query(F.data == "todo_delete")
-async def todo_delete_start(cb: types.CallbackQuery) -> None:
+@router.callback_query(F.data == "todo_delete", flags={"db": "readonly"})
+async def todo_delete_start(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Начало удаления задачи"""
     async with session_scope() as session:
-        user = await session.execute(
-            select(User).where(User.telegram_id == cb.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
         # Получаем все задачи пользователя для выбора
         todos = await session.execute(
-            select(Todo).where(Todo.user_id == db_user.id).order_by(Todo.due_date)
+            select(Todo).where(Todo.user_id == user_profile.id).order_by(Todo.due_date)
         )
         todos_list = todos.scalars().all()
     
@@ -771,20 +697,15 @@ async def todo_delete_start(cb: types.CallbackQuery) -> None:
     await cb.answer()
 
 
-@router.callback_query(F.data == "todo_complete")
-async def todo_complete_start(cb: types.CallbackQuery) -> None:
+@router.callback_query(F.data == "todo_complete", flags={"db": "readonly"})
+async def todo_complete_start(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Начало отметки задачи как выполненной"""
     async with session_scope() as session:
-        user = await session.execute(
-            select(User).where(User.telegram_id == cb.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
         # Получаем все невыполненные задачи пользователя
         todos = await session.execute(
             select(Todo).where(
                 and_(
-                    Todo.user_id == db_user.id,
+                    Todo.user_id == user_profile.id,
                     Todo.is_completed == False
                 )
             ).order_by(Todo.due_date)
@@ -823,21 +744,16 @@ async def todo_complete_start(cb: types.CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "todo_daily")
-async def todo_daily_handler(cb: types.CallbackQuery) -> None:
+async def todo_daily_handler(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Показать ежедневные задачи"""
     async with session_scope() as session:
-        user = await session.execute(
-            select(User).where(User.telegram_id == cb.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
         # Получаем обычные ежедневные задачи (не на основе целей)
         regular_todos = await session.execute(
             select(Todo).where(
                 and_(
-                    Todo.user_id == db_user.id,
+                    Todo.user_id == user_profile.id,
                     Todo.is_daily == True,
-                    Todo.description.notlike("Ежедневная задача для достижения цели:%")
+                    Todo.origin != TodoOrigin.goal
                 )
             ).order_by(Todo.priority)
         )
@@ -847,9 +763,9 @@ async def todo_daily_handler(cb: types.CallbackQuery) -> None:
         goal_based_todos = await session.execute(
             select(Todo).where(
                 and_(
-                    Todo.user_id == db_user.id,
+                    Todo.user_id == user_profile.id,
                     Todo.is_daily == True,
-                    Todo.description.like("Ежедневная задача для достижения цели:%")
+                    Todo.origin == TodoOrigin.goal
                 )
             ).order_by(Todo.priority)
         )
@@ -857,7 +773,7 @@ async def todo_daily_handler(cb: types.CallbackQuery) -> None:
         
         # Получаем сводки
         from app.services.daily_tasks_manager import get_separate_daily_tasks_summary
-        summary = await get_separate_daily_tasks_summary(session, db_user.id)
+        summary = await get_separate_daily_tasks_summary(session, user_profile.id)
     
     if not regular_list and not goal_based_list:
         await cb.message.edit_text(
@@ -931,22 +847,17 @@ async def todo_add_tomorrow_handler(cb: types.CallbackQuery, state: FSMContext)
     await cb.answer()
 
 
-@router.callback_query(F.data == "todo_view_tomorrow")
-async def todo_view_tomorrow_handler(cb: types.CallbackQuery) -> None:
+@router.callback_query(F.data == "todo_view_tomorrow", flags={"db": "readonly"})
+async def todo_view_tomorrow_handler(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Посмотреть задачи на завтра"""
     tomorrow = date.today() + timedelta(days=1)
     
     async with session_scope() as session:
-        user = await session.execute(
-            select(User).where(User.telegram_id == cb.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
         # Получаем задачи на завтра
         tomorrow_todos = await session.execute(
             select(Todo).where(
                 and_(
-                    Todo.user_id == db_user.id,
+                    Todo.user_id == user_profile.id,
                     Todo.due_date == tomorrow
                 )
             ).order_by(Todo.priority)
@@ -982,52 +893,23 @@ async def todo_view_tomorrow_handler(cb: types.CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "todo_copy_today")
-async def todo_copy_today_handler(cb: types.CallbackQuery) -> None:
+async def todo_copy_today_handler(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Скопировать сегодняшние задачи на завтра"""
     today = date.today()
     tomorrow = date.today() + timedelta(days=1)
     
     async with session_scope() as session:
-        user = await session.execute(
-            select(User).where(User.telegram_id == cb.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
-        # Получаем сегодняшние задачи
-        today_todos = await session.execute(
-            select(Todo).where(
-                and_(
-                    Todo.user_id == db_user.id,
-                    Todo.due_date == today
-                )
-            )
-        )
-        today_list = today_todos.scalars().all()
+        # Одним INSERT ... SELECT
+        copied_ids = await copy_todos(session, user_profile.id, today, today, tomorrow)
     
-    if not today_list:
+    if not copied_ids:
         await cb.answer("❌ У вас нет задач на сегодня")
         return
     
-    # Копируем задачи на завтра
-    copied_count = 0
-    for todo in today_list:
-        new_todo = Todo(
-            user_id=db_user.id,
-            title=todo.title,
-            description=todo.description,
-            due_date=tomorrow,
-            priority=todo.priority,
-            is_daily=todo.is_daily
-        )
-        session.add(new_todo)
-        copied_count += 1
-    
-    await session.commit()
-    
-    await cb.answer(f"✅ Скопировано {copied_count} задач на завтра")
+    await cb.answer(f"✅ Скопировано {len(copied_ids)} задач на завтра")
     
     # Показываем обновленный список задач на завтра
-    await todo_view_tomorrow_handler(cb)
+    await todo_view_tomorrow_handler(cb, user_profile)
 
 
 @router.callback_query(F.data == "todo_remind_later")
@@ -1057,24 +939,24 @@ async def todo_menu_handler(cb: types.CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "todo_priority_high")
-async def todo_priority_high_handler(cb: types.CallbackQuery, state: FSMContext) -> None:
+async def todo_priority_high_handler(cb: types.CallbackQuery, state: FSMContext, user_profile: UserProfile) -> None:
     """Установка высокого приоритета для задачи"""
     await state.update_data(priority="high")
-    await todo_priority_handler(cb, state)
+    await todo_priority_handler(cb, state, user_profile)
 
 
 @router.callback_query(F.data == "todo_priority_medium")
-async def todo_priority_medium_handler(cb: types.CallbackQuery, state: FSMContext) -> None:
+async def todo_priority_medium_handler(cb: types.CallbackQuery, state: FSMContext, user_profile: UserProfile) -> None:
     """Установка среднего приоритета для задачи"""
     await state.update_data(priority="medium")
-    await todo_priority_handler(cb, state)
+    await todo_priority_handler(cb, state, user_profile)
 
 
 @router.callback_query(F.data == "todo_priority_low")
-async def todo_priority_low_handler(cb: types.CallbackQuery, state: FSMContext) -> None:
+async def todo_priority_low_handler(cb: types.CallbackQuery, state: FSMContext, user_profile: UserProfile) -> None:
     """Установка низкого приоритета для задачи"""
     await state.update_data(priority="low")
-    await todo_priority_handler(cb, state)
+    await todo_priority_handler(cb, state, user_profile)
 
 
 @router.callback_query(F.data.startswith("todo_edit_title:"))
@@ -1139,21 +1021,16 @@ async def todo_edit_priority_handler(cb: types.CallbackQuery, state: FSMContext)
 
 
 @router.callback_query(F.data.startswith("todo_toggle_daily:"))
-async def todo_toggle_daily_handler(cb: types.CallbackQuery) -> None:
+async def todo_toggle_daily_handler(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Переключение ежедневного статуса задачи"""
     todo_id = int(cb.data.split(":")[1])
     
     async with session_scope() as session:
-        user = await session.execute(
-            select(User).where(User.telegram_id == cb.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
         todo = await session.execute(
             select(Todo).where(
                 and_(
                     Todo.id == todo_id,
-                    Todo.user_id == db_user.id
+                    Todo.user_id == user_profile.id
                 )
             )
         )
@@ -1179,22 +1056,17 @@ async def todo_toggle_daily_handler(cb: types.CallbackQuery) -> None:
         )
 
 
-@router.callback_query(F.data.startswith("todo_edit_menu:"))
-async def todo_edit_menu_handler(cb: types.CallbackQuery) -> None:
+@router.callback_query(F.data.startswith("todo_edit_menu:"), flags={"db": "readonly"})
+async def todo_edit_menu_handler(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Показать меню редактирования задачи"""
     todo_id = int(cb.data.split(":")[1])
     
     async with session_scope() as session:
-        user = await session.execute(
-            select(User).where(User.telegram_id == cb.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
         todo = await session.execute(
             select(Todo).where(
                 and_(
                     Todo.id == todo_id,
-                    Todo.user_id == db_user.id
+                    Todo.user_id == user_profile.id
                 )
             )
         )
@@ -1216,21 +1088,16 @@ async def todo_edit_menu_handler(cb: types.CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "todo_goal_based")
-async def todo_goal_based_handler(cb: types.CallbackQuery) -> None:
+async def todo_goal_based_handler(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Показать задачи на основе целей"""
     async with session_scope() as session:
-        user = await session.execute(
-            select(User).where(User.telegram_id == cb.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
         # Получаем задачи на основе целей
         goal_based_todos = await session.execute(
             select(Todo).where(
                 and_(
-                    Todo.user_id == db_user.id,
+                    Todo.user_id == user_profile.id,
                     Todo.is_daily == True,
-                    Todo.description.like("Ежедневная задача для достижения цели:%")
+                    Todo.origin == TodoOrigin.goal
                 )
             ).order_by(Todo.priority)
         )
@@ -1238,7 +1105,7 @@ async def todo_goal_based_handler(cb: types.CallbackQuery) -> None:
         
         # Получаем сводку
         from app.services.daily_tasks_manager import get_goal_based_tasks_summary
-        summary = await get_goal_based_tasks_summary(session, db_user.id)
+        summary = await get_goal_based_tasks_summary(session, user_profile.id)
     
     if not goal_based_list:
         await cb.message.edit_text(
@@ -1292,17 +1159,12 @@ async def todo_goal_based_handler(cb: types.CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "todo_create_from_goals")
-async def todo_create_from_goals_handler(cb: types.CallbackQuery) -> None:
+async def todo_create_from_goals_handler(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Создать задачи на основе активных целей"""
     async with session_scope() as session:
-        user = await session.execute(
-            select(User).where(User.telegram_id == cb.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
         # Создаем задачи на основе целей
         from app.services.daily_tasks_manager import create_goal_based_tasks
-        created_tasks = await create_goal_based_tasks(session, db_user.id)
+        created_tasks = await create_goal_based_tasks(session, user_profile.id)
     
     if not created_tasks:
         await cb.message.edit_text(
@@ -1346,17 +1208,12 @@ async def todo_create_from_goals_handler(cb: types.CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "todo_cleanup_goal_tasks")
-async def todo_cleanup_goal_tasks_handler(cb: types.CallbackQuery) -> None:
+async def todo_cleanup_goal_tasks_handler(cb: types.CallbackQuery, user_profile: UserProfile) -> None:
     """Очистить старые выполненные задачи на основе целей"""
     async with session_scope() as session:
-        user = await session.execute(
-            select(User).where(User.telegram_id == cb.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
         # Очищаем старые задачи
         from app.services.daily_tasks_manager import cleanup_old_goal_tasks
-        deleted_count = await cleanup_old_goal_tasks(session, db_user.id, days_to_keep=7)
+        deleted_count = await cleanup_old_goal_tasks(session, user_profile.id, days_to_keep=7)
     
     if deleted_count == 0:
         await cb.answer("🗑️ Нет старых выполненных задач для удаления")
@@ -1365,12 +1222,12 @@ async def todo_cleanup_goal_tasks_handler(cb: types.CallbackQuery) -> None:
     await cb.answer(f"🗑️ Удалено {deleted_count} старых выполненных задач")
     
     # Возвращаемся к списку задач на основе целей
-    await todo_goal_based_handler(cb)
+    await todo_goal_based_handler(cb, user_profile)
 
 
 # Обработчики для состояний редактирования
 @router.message(TodoStates.edit_title)
-async def todo_edit_title_message_handler(message: types.Message, state: FSMContext) -> None:
+async def todo_edit_title_message_handler(message: types.Message, state: FSMContext, user_profile: UserProfile) -> None:
     """Обработка нового названия задачи"""
     if len(message.text) > 500:
         await message.answer("❌ Название слишком длинное. Максимум 500 символов.")
@@ -1380,16 +1237,11 @@ async def todo_edit_title_message_handler(message: types.Message, state: FSMCont
     todo_id = data.get("todo_id")
     
     async with session_scope() as session:
-        user = await session.execute(
-            select(User).where(User.telegram_id == message.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
         todo = await session.execute(
             select(Todo).where(
                 and_(
                     Todo.id == todo_id,
-                    Todo.user_id == db_user.id
+                    Todo.user_id == user_profile.id
                 )
             )
         )
@@ -1417,7 +1269,7 @@ async def todo_edit_title_message_handler(message: types.Message, state: FSMCont
 
 
 @router.message(TodoStates.edit_description)
-async def todo_edit_description_message_handler(message: types.Message, state: FSMContext) -> None:
+async def todo_edit_description_message_handler(message: types.Message, state: FSMContext, user_profile: UserProfile) -> None:
     """Обработка нового описания задачи"""
     description = message.text if message.text != "-" else None
     
@@ -1425,16 +1277,11 @@ async def todo_edit_description_message_handler(message: types.Message, state: F
     todo_id = data.get("todo_id")
     
     async with session_scope() as session:
-        user = await session.execute(
-            select(User).where(User.telegram_id == message.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
         todo = await session.execute(
             select(Todo).where(
                 and_(
                     Todo.id == todo_id,
-                    Todo.user_id == db_user.id
+                    Todo.user_id == user_profile.id
                 )
             )
         )
@@ -1462,7 +1309,7 @@ async def todo_edit_description_message_handler(message: types.Message, state: F
 
 
 @router.message(TodoStates.edit_date)
-async def todo_edit_date_message_handler(message: types.Message, state: FSMContext) -> None:
+async def todo_edit_date_message_handler(message: types.Message, state: FSMContext, user_profile: UserProfile) -> None:
     """Обработка новой даты задачи"""
     date_text = message.text.lower().strip()
     
@@ -1491,16 +1338,11 @@ async def todo_edit_date_message_handler(message: types.Message, state: FSMConte
     todo_id = data.get("todo_id")
     
     async with session_scope() as session:
-        user = await session.execute(
-            select(User).where(User.telegram_id == message.from_user.id)
-        )
-        db_user = user.scalar_one()
-        
         todo = await session.execute(
             select(Todo).where(
                 and_(
                     Todo.id == todo_id,
-                    Todo.user_id == db_user.id
+                    Todo.user_id == user_profile.id
                 )
             )
         )
@@ -1551,7 +1393,7 @@ async def test_goal_tasks(message: types.Message) -> None:
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Создаем задачи на основе целей
             from app.services.daily_tasks_manager import create_goal_based_tasks
@@ -1581,7 +1423,7 @@ async def reset_goal_tasks(message: types.Message) -> None:
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Сбрасываем задачи на основе целей
             from app.services.daily_tasks_manager import GoalTasksManager
@@ -1609,7 +1451,7 @@ async def test_nutrition_todos(message: types.Message) -> None:
     
     try:
         async with session_scope() as session:
-            db_user = (await session.execute(select(User).where(User.telegram_id == user.id))).scalar_one()
+            db_user = (await session.execute(user_by_telegram_id(user.id))).scalar_one()
             
             # Создаем задачи питания
             from app.services.nutrition_todo_manager import create_nutrition_todos_for_user
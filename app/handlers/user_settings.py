@@ -9,6 +9,7 @@ from aiogram.fsm.state import State
 
 from sqlalchemy import select
 from app.db.session import session_scope
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import User
 from app.utils.timezone_utils import COMMON_TIMEZONES, validate_timezone, get_timezone_display_name
 from app.keyboards.common import settings_menu
@@ -157,7 +158,7 @@ async def show_current_timezone(message: types.Message) -> None:
     """Показать текущий часовой пояс пользователя"""
     async with session_scope() as session:
         user = (await session.execute(
-            select(User).where(User.telegram_id == message.from_user.id)
+            user_by_telegram_id(message.from_user.id)
         )).scalar_one()
         
         if user.timezone:
@@ -211,7 +212,7 @@ async def save_user_timezone(telegram_id: int, timezone_str: str) -> None:
     """Сохраняет часовой пояс пользователя в базе данных"""
     async with session_scope() as session:
         user = (await session.execute(
-            select(User).where(User.telegram_id == telegram_id)
+            user_by_telegram_id(telegram_id)
         )).scalar_one()
         
         user.timezone = timezone_str
@@ -14,6 +14,7 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from sqlalchemy import select
 
 from app.db.session import session_scope
+from app.db.hot_queries import user_by_telegram_id
 from app.db.models import User
 from app.services.zip_importer import ZipImporterService
 from app.keyboards.common import back_main_menu
@@ -89,7 +90,7 @@ async def handle_zip_upload(message: types.Message, state: FSMContext) -> None:
         
         async with session_scope() as session:
             db_user = (await session.execute(
-                select(User).where(User.telegram_id == user.id)
+                user_by_telegram_id(user.id)
             )).scalar_one()
             
             if not db_user:
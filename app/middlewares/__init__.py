@@ -1,9 +1,6 @@
+from .db_session import DbSessionMiddleware
 from .logging import InteractionLoggingMiddleware
+from .query_tracking import QueryTrackingMiddleware
+from .user_profile import UserProfileMiddleware
 
-__all__ = ["InteractionLoggingMiddleware"]
-
-
-
-
-
-
+__all__ = ["DbSessionMiddleware", "InteractionLoggingMiddleware", "QueryTrackingMiddleware", "UserProfileMiddleware"]
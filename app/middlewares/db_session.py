@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import TelegramObject
+
+from app.db.session import unit_of_work, writer_key
+
+# Значения флага обработчика db: flags={"db": DB_READONLY}
+DB_READONLY = "readonly"
+# Без общей сессии: обработчики, которые долго ждут ИИ, не должны держать соединение
+DB_NONE = "none"
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """Открывает одну сессию на апдейт и передает ее обработчику в data["session"].
+
+    session_scope() внутри обработчика и вызываемых им сервисов присоединяется
+    к этой сессии, и все изменения фиксируются одним commit после обработчика.
+    Флаг обработчика ``db``: "readonly" - без flush/commit, чтение с реплики,
+    если она настроена (экраны просмотра), "none" - по-старому, каждый
+    session_scope() со своей транзакцией.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        mode = get_flag(data, "db")
+        from_user = data.get("event_from_user")
+        with writer_key(from_user.id if from_user else None):
+            if mode == DB_NONE:
+                return await handler(event, data)
+            async with unit_of_work(readonly=mode == DB_READONLY) as session:
+                data["session"] = session
+                return await handler(event, data)
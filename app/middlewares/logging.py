@@ -4,14 +4,22 @@ from typing import Any, Callable, Dict, Awaitable
 
 from aiogram import BaseMiddleware
 from aiogram.types import Message
-from sqlalchemy import select
 
 from app.db.session import session_scope
-from app.db.models import User, Interaction
+from app.services.interaction_log import InteractionLogBuffer
+from app.services.user_profile import resolve_user_profile
 
 
 class InteractionLoggingMiddleware(BaseMiddleware):
-    """Middleware to persist all incoming messages as interactions."""
+    """Middleware to persist all incoming messages as interactions.
+
+    Records are handed to the write-behind InteractionLogBuffer, so the handler
+    does not wait for the insert. Expects UserProfileMiddleware to run first;
+    falls back to resolving the profile itself.
+    """
+
+    def __init__(self, buffer: InteractionLogBuffer) -> None:
+        self.buffer = buffer
 
     async def __call__(
         self,
@@ -20,30 +28,24 @@ class InteractionLoggingMiddleware(BaseMiddleware):
         data: Dict[str, Any],
     ) -> Any:
         if event.from_user:
-            async with session_scope() as session:
-                db_user = (
-                    await session.execute(select(User).where(User.telegram_id == event.from_user.id))
-                ).scalar_one_or_none()
-                if db_user is None:
-                    db_user = User(
-                        telegram_id=event.from_user.id,
+            profile = data.get("user_profile")
+            if profile is None:
+                async with session_scope() as session:
+                    profile = await resolve_user_profile(
+                        session,
+                        event.from_user.id,
                         username=event.from_user.username,
                         first_name=event.from_user.first_name,
                         last_name=event.from_user.last_name,
                     )
-                    session.add(db_user)
-                    await session.flush()
-                session.add(
-                    Interaction(
-                        user_id=db_user.id,
-                        message_text=event.text or "",
-                        command=event.text.split()[0] if event.text and event.text.startswith("/") else None,
-                        meta={
-                            "chat_id": event.chat.id,
-                            "message_id": event.message_id,
-                        },
-                    )
-                )
+                data["user_profile"] = profile
+            self.buffer.log(
+                user_id=profile.id,
+                message_text=event.text or "",
+                command=event.text.split()[0] if event.text and event.text.startswith("/") else None,
+                meta={
+                    "chat_id": event.chat.id,
+                    "message_id": event.message_id,
+                },
+            )
         return await handler(event, data)
-
-
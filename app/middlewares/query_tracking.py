@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import TelegramObject
+
+from app.db.query_metrics import track_queries
+
+# Флаг обработчика: максимум SQL-запросов за апдейт, flags={"query_budget": 3}
+QUERY_BUDGET_FLAG = "query_budget"
+
+
+class QueryTrackingMiddleware(BaseMiddleware):
+    """Относит все SQL-запросы апдейта к обработчику (для лога медленных запросов и N+1).
+
+    Регистрируется первым, чтобы учитывать и запросы остальных middleware.
+    Бюджет задается флагом обработчика query_budget; при превышении -
+    предупреждение, а с DB_QUERY_BUDGET_STRICT (CI) - QueryBudgetExceeded.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        callback = getattr(handler_object, "callback", None)
+        name = (
+            f"{callback.__module__.rsplit('.', 1)[-1]}.{callback.__qualname__}"
+            if callback is not None else type(event).__name__
+        )
+        with track_queries(name, budget=get_flag(data, QUERY_BUDGET_FLAG)):
+            return await handler(event, data)
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User as TelegramUser
+
+from app.db.session import session_scope
+from app.services.user_profile import resolve_user_profile
+
+
+class UserProfileMiddleware(BaseMiddleware):
+    """Определяет пользователя один раз на апдейт и кладет профиль в data["user_profile"].
+
+    Профиль берется из кеша (app.services.user_profile), поэтому обработчикам
+    и InteractionLoggingMiddleware не нужно отдельно искать User по telegram_id.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        from_user: TelegramUser | None = data.get("event_from_user")
+        if from_user is not None and "user_profile" not in data:
+            async with session_scope() as session:
+                data["user_profile"] = await resolve_user_profile(
+                    session,
+                    from_user.id,
+                    username=from_user.username,
+                    first_name=from_user.first_name,
+                    last_name=from_user.last_name,
+                )
+        return await handler(event, data)
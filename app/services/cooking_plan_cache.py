@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import bisect
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.models import CookingPlanVariant, NutritionReminder
+from app.db.session import session_scope
+from app.services.llm import deepseek_breaker
+from app.services.nutrition_plan_generator import (
+    CookingPlanUnavailable,
+    generate_fallback_plan,
+    request_cooking_plan,
+)
+from app.utils.circuit_breaker import BreakerState
+
+logger = logging.getLogger(__name__)
+
+# Границы дневного бюджета (₽) и представитель каждого диапазона
+DAILY_BUDGET_EDGES = [200, 300, 400, 500, 700, 1000, 1500]
+DAILY_BUDGET_REPRESENTATIVES = [150, 250, 350, 450, 600, 850, 1250, 1800]
+CALORIES_STEP = 250
+
+
+def cooking_plan_bucket(budget_info: Optional[dict]) -> Tuple[str, dict]:
+    """Нормализует параметры плана: возвращает ключ бакета и budget_info для промпта.
+
+    Промпт строится только из нормализованных значений, поэтому один план
+    подходит всем пользователям бакета и не содержит чужих точных сумм.
+    """
+    budget_info = budget_info or {}
+    normalized: dict = {"type": None, "amount": None, "description": "без ограничений"}
+    budget_part = "none"
+    if budget_info.get("type") and budget_info.get("amount"):
+        index = bisect.bisect_right(DAILY_BUDGET_EDGES, budget_info["amount"] / 30)
+        monthly = DAILY_BUDGET_REPRESENTATIVES[index] * 30
+        normalized = {"type": "fixed", "amount": float(monthly), "description": f"~{monthly:,.0f} ₽/месяц"}
+        budget_part = str(index)
+
+    goal = (budget_info.get("body_goal") or "").strip().lower()[:40]
+    if goal:
+        normalized["body_goal"] = goal
+
+    calories = budget_info.get("target_calories")
+    if calories:
+        calories = int(round(calories / CALORIES_STEP) * CALORIES_STEP)
+        normalized["target_calories"] = calories
+
+    key = f"budget:{budget_part}|goal:{goal or '-'}|kcal:{calories or '-'}"
+    return key, normalized
+
+
+async def get_cooking_plan_params(session: AsyncSession, user_id: int, rem: Optional[NutritionReminder] = None) -> dict:
+    """Бюджет питания пользователя вместе с целью и калориями из настроек напоминаний."""
+    from app.handlers.nutrition_budget import get_user_food_budget
+
+    budget_info = await get_user_food_budget(session, user_id)
+    if rem is None:
+        rem = (
+            await session.execute(select(NutritionReminder).where(NutritionReminder.user_id == user_id))
+        ).scalar_one_or_none()
+    if rem is not None:
+        if rem.body_goal:
+            budget_info["body_goal"] = rem.body_goal
+        if rem.target_calories:
+            budget_info["target_calories"] = rem.target_calories
+    return budget_info
+
+
+def _fresh_since() -> datetime:
+    return datetime.utcnow() - timedelta(days=settings.COOKING_PLAN_CACHE_TTL_DAYS)
+
+
+async def _store_variant(key: str, variant: int, plan: str) -> None:
+    try:
+        async with session_scope() as session:
+            row = (await session.execute(
+                select(CookingPlanVariant).where(
+                    CookingPlanVariant.bucket_key == key, CookingPlanVariant.variant == variant
+                )
+            )).scalar_one_or_none()
+            if row is None:
+                session.add(CookingPlanVariant(bucket_key=key, variant=variant, plan=plan))
+            else:
+                row.plan = plan
+                row.created_at = datetime.utcnow()
+    except IntegrityError:
+        # Параллельный промах по тому же бакету уже сохранил вариант
+        pass
+
+
+async def get_cooking_plan(budget_info: Optional[dict], user_id: int) -> str:
+    """План готовки из общего кеша; при промахе генерирует и сохраняет первый вариант.
+
+    Пользователи одного бакета получают варианты по кругу (смещение по
+    user_id и дате), так что соседи и соседние дни видят разные меню.
+    """
+    key, normalized = cooking_plan_bucket(budget_info)
+    async with session_scope() as session:
+        plans: List[str] = list((await session.execute(
+            select(CookingPlanVariant.plan)
+            .where(CookingPlanVariant.bucket_key == key, CookingPlanVariant.created_at >= _fresh_since())
+            .order_by(CookingPlanVariant.variant)
+        )).scalars().all())
+    if plans:
+        return plans[(user_id + date.today().toordinal()) % len(plans)]
+
+    try:
+        plan = await request_cooking_plan(normalized)
+    except CookingPlanUnavailable as e:
+        return generate_fallback_plan(budget_info, e.reason)
+    await _store_variant(key, 0, plan)
+    return plan
+
+
+async def prefill_cooking_plan_cache() -> int:
+    """Догенерирует недостающие и устаревшие варианты для всех бакетов активных пользователей.
+
+    Запускается в непиковое время; возвращает число сгенерированных планов.
+    """
+    demand: Dict[str, dict] = {}
+    async with session_scope() as session:
+        reminders = (await session.execute(
+            select(NutritionReminder).where(NutritionReminder.is_active.is_(True))
+        )).scalars().all()
+        for rem in reminders:
+            key, normalized = cooking_plan_bucket(await get_cooking_plan_params(session, rem.user_id, rem))
+            demand.setdefault(key, normalized)
+        if not demand:
+            return 0
+        fresh: Set[Tuple[str, int]] = set((await session.execute(
+            select(CookingPlanVariant.bucket_key, CookingPlanVariant.variant).where(
+                CookingPlanVariant.bucket_key.in_(demand.keys()),
+                CookingPlanVariant.created_at >= _fresh_since(),
+            )
+        )).all())
+
+    generated = 0
+    for key, normalized in demand.items():
+        for variant in range(settings.COOKING_PLAN_CACHE_VARIANTS):
+            if (key, variant) in fresh:
+                continue
+            try:
+                plan = await request_cooking_plan(normalized, variant)
+            except CookingPlanUnavailable as e:
+                logger.warning("Cooking plan prefill: %s variant %d failed: %s", key, variant, e.reason)
+                if deepseek_breaker.state == BreakerState.open:
+                    logger.warning("Cooking plan prefill stopped: LLM is unavailable")
+                    return generated
+                continue
+            await _store_variant(key, variant, plan)
+            generated += 1
+    logger.info("Cooking plan prefill: %d buckets, %d plans generated", len(demand), generated)
+    return generated
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from datetime import datetime, time, timedelta, date
-from typing import Iterable
+from typing import Iterable, Optional
+import hashlib
 import random
 
 from aiogram import Bot
@@ -10,9 +11,10 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.db.models import User, Motivation, Todo
+from app.db.models import User, Motivation, Todo, TodoOrigin, PerfectDayPlan
 from app.db.models.goal import Goal, GoalStatus, GoalScope
 from app.services.llm import deepseek_complete
+from app.services.llm_context import ContextBuilder, compact_text
 
 
 LAWS_OF_ARENA: list[str] = [
@@ -49,14 +51,18 @@ def daily_reminder_keyboard() -> InlineKeyboardMarkup:
     )
 
 
-def perfect_day_keyboard() -> InlineKeyboardMarkup:
+def perfect_day_keyboard(pregen_enabled: bool = False) -> InlineKeyboardMarkup:
     """Клавиатура для планирования идеального дня"""
+    pregen_text = "🌙 Готовить план ночью: вкл" if pregen_enabled else "🌙 Готовить план ночью: выкл"
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [
                 InlineKeyboardButton(text="⚔️ Создать план", callback_data="create_perfect_day"),
                 InlineKeyboardButton(text="📋 Шаблоны дня", callback_data="day_templates")
             ],
+            [
+                InlineKeyboardButton(text=pregen_text, callback_data="toggle_perfect_day_pregen")
+            ],
             [
                 InlineKeyboardButton(text="⬅️ Назад", callback_data="back_main")
             ]
@@ -144,116 +150,107 @@ async def send_daily_motivation(bot: Bot, session: AsyncSession, user_id: int =
             continue
 
 
-async def generate_perfect_day_plan(user_id: int, session: AsyncSession) -> str:
-    """Генерирует план идеального дня с помощью ИИ в стиле гладиаторского ланисты"""
-    try:
-        # Получаем информацию о пользователе
-        user = (await session.execute(select(User).where(User.id == user_id))).scalar_one()
-        if not user:
-            return "Не удалось получить информацию о пользователе."
-        
-        # Получаем мотивацию пользователя
-        motivation = (await session.execute(select(Motivation).where(Motivation.user_id == user_id))).scalar_one_or_none()
-        
-        # Получаем активные цели пользователя
-        goals = (await session.execute(
-            select(Goal).where(
-                Goal.user_id == user_id,
-                Goal.status == GoalStatus.active
-            ).order_by(Goal.scope.desc())
-        )).scalars().all()
-        
-        # Получаем задачи на сегодня с учетом времени напоминаний
-        today = date.today()
-        today_todos = (await session.execute(
-            select(Todo).where(
-                Todo.user_id == user_id,
-                Todo.due_date == today,
-                Todo.is_completed == False
-            ).order_by(Todo.reminder_time.asc().nullslast(), Todo.priority.desc())
-        )).scalars().all()
-        
-        # Предварительная обработка задач для лучшего планирования
-        scheduled_tasks = []
-        unscheduled_tasks = []
-        
-        for todo in today_todos:
-            if todo.reminder_time and todo.is_reminder_active:
-                # Задачи с напоминаниями - планируем точно в указанное время
-                scheduled_tasks.append({
-                    'todo': todo,
-                    'scheduled_time': todo.reminder_time,
-                    'type': 'scheduled'
-                })
-            else:
-                # Задачи без напоминаний - планируем по приоритету
-                unscheduled_tasks.append({
-                    'todo': todo,
-                    'type': 'unscheduled'
-                })
-        
-        # Сортируем запланированные задачи по времени
-        scheduled_tasks.sort(key=lambda x: x['scheduled_time'])
-        
-        # Сортируем незапланированные задачи по приоритету
-        priority_order = {'high': 3, 'medium': 2, 'low': 1}
-        unscheduled_tasks.sort(key=lambda x: priority_order.get(x['todo'].priority, 0), reverse=True)
-        
-        # Формируем контекст для ИИ
-        context_parts = []
-        
-        # Добавляем мотивацию
-        if motivation:
-            if motivation.main_year_goal:
-                context_parts.append(f"🎯 Главная цель года: {motivation.main_year_goal}")
-            if motivation.vision:
-                context_parts.append(f"👁️ Видение: {motivation.vision}")
-            if motivation.mission:
-                context_parts.append(f"⚔️ Миссия: {motivation.mission}")
-        
-        # Добавляем цели
-        if goals:
-            context_parts.append("🎯 Активные цели:")
-            for goal in goals[:7]:  # Берем первые 5 целей
-                scope_text = {
-                    GoalScope.five_years: "5 лет",
-                    GoalScope.year: "год",
-                    GoalScope.month: "месяц",
-                    GoalScope.week: "неделя",
-                    GoalScope.day: "день"
-                }.get(goal.scope, goal.scope)
-                context_parts.append(f"  • {goal.title} ({scope_text})")
-        
-        # Добавляем задачи на сегодня с учетом времени напоминаний
-        if today_todos:
-            context_parts.append("📝 Задачи на сегодня:")
-            
-            # Сначала показываем запланированные задачи
-            if scheduled_tasks:
-                context_parts.append("  ⏰ Запланированные задачи:")
-                for task_info in scheduled_tasks[:5]:
-                    todo = task_info['todo']
-                    priority_emoji = {"high": "🔴", "medium": "🟡", "low": "🟢"}.get(todo.priority, "⚪")
-                    description_info = ""
-                    if todo.description:
-                        description_info = f" - {todo.description}"
-                    context_parts.append(f"    • {priority_emoji} {todo.title} ⏰{task_info['scheduled_time']}{description_info}")
-            
-            # Затем показываем незапланированные задачи
-            if unscheduled_tasks:
-                context_parts.append("  📋 Остальные задачи:")
-                for task_info in unscheduled_tasks[:5]:
-                    todo = task_info['todo']
-                    priority_emoji = {"high": "🔴", "medium": "🟡", "low": "🟢"}.get(todo.priority, "⚪")
-                    description_info = ""
-                    if todo.description:
-                        description_info = f" - {todo.description}"
-                    context_parts.append(f"    • {priority_emoji} {todo.title}{description_info}")
-        
-        context = "\n".join(context_parts) if context_parts else "Нет дополнительного контекста"
-        
-        # Формируем промпт для ИИ в стиле ланисты
-        prompt = f"""Ты - опытный ланиста (тренер гладиаторов), который составляет план тренировок для своего гладиатора. 
+PERFECT_DAY_HEADER = "⚔️ <b>ПРИКАЗ ЛАНИСТЫ ГЛАДИАТОРУ</b>\n\n"
+PERFECT_DAY_FOOTER = "\n\n💪 <b>Помни: каждый день - это битва за свою судьбу. Сражайся достойно!</b>"
+PERFECT_DAY_MAX_TOKENS = 3000
+# Бюджет токенов на контекст гладиатора (мотивация, цели, задачи)
+PERFECT_DAY_CONTEXT_TOKENS = 900
+
+
+async def build_perfect_day_prompt(user_id: int, session: AsyncSession, day: Optional[date] = None) -> str:
+    """Собирает промпт для плана идеального дня из мотивации, целей и задач пользователя"""
+    # Получаем информацию о пользователе
+    user = (await session.execute(select(User).where(User.id == user_id))).scalar_one()
+    
+    # Получаем мотивацию пользователя
+    motivation = (await session.execute(select(Motivation).where(Motivation.user_id == user_id))).scalar_one_or_none()
+    
+    # Получаем активные цели пользователя
+    goals = (await session.execute(
+        select(Goal).where(
+            Goal.user_id == user_id,
+            Goal.status == GoalStatus.active
+        ).order_by(Goal.scope.desc())
+    )).scalars().all()
+    
+    # Получаем задачи на сегодня (или на day - локальную дату пользователя) с учетом времени напоминаний
+    today = day or date.today()
+    today_todos = (await session.execute(
+        select(Todo).where(
+            Todo.user_id == user_id,
+            Todo.due_date == today,
+            Todo.is_completed == False
+        ).order_by(Todo.reminder_time.asc().nullslast(), Todo.priority.desc())
+    )).scalars().all()
+    
+    # Предварительная обработка задач для лучшего планирования
+    scheduled_tasks = []
+    unscheduled_tasks = []
+    
+    for todo in today_todos:
+        if todo.reminder_time and todo.is_reminder_active:
+            # Задачи с напоминаниями - планируем точно в указанное время
+            scheduled_tasks.append({
+                'todo': todo,
+                'scheduled_time': todo.reminder_time,
+                'type': 'scheduled'
+            })
+        else:
+            # Задачи без напоминаний - планируем по приоритету
+            unscheduled_tasks.append({
+                'todo': todo,
+                'type': 'unscheduled'
+            })
+    
+    # Сортируем запланированные задачи по времени
+    scheduled_tasks.sort(key=lambda x: x['scheduled_time'])
+    
+    # Сортируем незапланированные задачи по приоритету
+    priority_order = {'high': 3, 'medium': 2, 'low': 1}
+    unscheduled_tasks.sort(key=lambda x: priority_order.get(x['todo'].priority, 0), reverse=True)
+    
+    # Формируем контекст для ИИ; при нехватке бюджета первыми урезаются цели
+    builder = ContextBuilder(PERFECT_DAY_CONTEXT_TOKENS)
+    
+    # Добавляем мотивацию
+    if motivation:
+        builder.add("⚔️ Мотивация:", [
+            f"🎯 Главная цель года: {motivation.main_year_goal}" if motivation.main_year_goal else "",
+            f"👁️ Видение: {motivation.vision}" if motivation.vision else "",
+            f"⚔️ Миссия: {motivation.mission}" if motivation.mission else "",
+        ], priority=80, min_lines=1, max_line_chars=300)
+    
+    # Добавляем цели
+    scope_names = {
+        GoalScope.five_years: "5 лет",
+        GoalScope.year: "год",
+        GoalScope.month: "месяц",
+        GoalScope.week: "неделя",
+        GoalScope.day: "день"
+    }
+    builder.add("🎯 Активные цели:", [
+        f"{goal.title} ({scope_names.get(goal.scope, goal.scope)})" for goal in goals
+    ], priority=40, max_line_chars=120)
+    
+    # Добавляем задачи на сегодня с учетом времени напоминаний
+    def _todo_line(todo: Todo, scheduled_time: str = "") -> str:
+        priority_emoji = {"high": "🔴", "medium": "🟡", "low": "🟢"}.get(todo.priority, "⚪")
+        time_info = f" ⏰{scheduled_time}" if scheduled_time else ""
+        description_info = f" - {compact_text(todo.description, 80)}" if todo.description else ""
+        return f"{priority_emoji} {todo.title}{time_info}{description_info}"
+    
+    # Сначала запланированные задачи - они жестко привязаны ко времени
+    builder.add("📝 Задачи на сегодня, ⏰ Запланированные:", [
+        _todo_line(task_info['todo'], task_info['scheduled_time']) for task_info in scheduled_tasks
+    ], priority=90, min_lines=5)
+    builder.add("📝 Задачи на сегодня, 📋 Остальные:", [
+        _todo_line(task_info['todo']) for task_info in unscheduled_tasks
+    ], priority=60, min_lines=3)
+    
+    context = builder.build() or "Нет дополнительного контекста"
+    
+    # Формируем промпт для ИИ в стиле ланисты
+    prompt = f"""Ты - опытный ланиста (тренер гладиаторов), который составляет план тренировок для своего гладиатора. 
 
 Контекст гладиатора:
 {context}
@@ -292,34 +289,92 @@ async def generate_perfect_day_plan(user_id: int, session: AsyncSession) -> str:
 - Избегай сложных HTML-тегов
 
 Начни с обращения к гладиатору и закончи мотивирующим призывом к действию."""
+    return prompt
 
-        # Генерируем план с помощью ИИ
-        plan = await deepseek_complete(prompt, max_tokens=3000)
-        
-        # Добавляем заголовок в стиле гладиатора
-        header = "⚔️ <b>ПРИКАЗ ЛАНИСТЫ ГЛАДИАТОРУ</b>\n\n"
-        footer = "\n\n💪 <b>Помни: каждый день - это битва за свою судьбу. Сражайся достойно!</b>"
-        
-        # Очищаем план от лишних HTML-тегов, которые могут мешать отображению
-        import re
-        clean_plan = re.sub(r'<[^>]+>', '', plan)  # Убираем HTML-теги
-        clean_plan = re.sub(r'\*\*([^*]+)\*\*', r'<b>\1</b>', clean_plan)  # Заменяем ** на <b>
-        clean_plan = re.sub(r'\*([^*]+)\*', r'<i>\1</i>', clean_plan)  # Заменяем * на <i>
-        
-        # Убираем упоминания конкретных дат и дней
-        clean_plan = re.sub(r'на \d{1,2} [а-яё]+', 'на завтра', clean_plan, flags=re.IGNORECASE)
-        clean_plan = re.sub(r'Боевой план на \d{1,2} [а-яё]+', '⚔️ Боевой план', clean_plan, flags=re.IGNORECASE)
-        clean_plan = re.sub(r'План на \d{1,2} [а-яё]+', '⚔️ План дня', clean_plan, flags=re.IGNORECASE)
-        clean_plan = re.sub(r'Устав на \d{1,2} [а-яё]+', '⚔️ Устав дня', clean_plan, flags=re.IGNORECASE)
+
+def format_perfect_day_plan(plan: str) -> str:
+    """Очищает ответ ИИ для отображения в Telegram (без заголовка и подписи)"""
+    import re
+    clean_plan = re.sub(r'<[^>]+>', '', plan)  # Убираем HTML-теги
+    clean_plan = re.sub(r'\*\*([^*]+)\*\*', r'<b>\1</b>', clean_plan)  # Заменяем ** на <b>
+    clean_plan = re.sub(r'\*([^*]+)\*', r'<i>\1</i>', clean_plan)  # Заменяем * на <i>
+    
+    # Убираем упоминания конкретных дат и дней
+    clean_plan = re.sub(r'на \d{1,2} [а-яё]+', 'на завтра', clean_plan, flags=re.IGNORECASE)
+    clean_plan = re.sub(r'Боевой план на \d{1,2} [а-яё]+', '⚔️ Боевой план', clean_plan, flags=re.IGNORECASE)
+    clean_plan = re.sub(r'План на \d{1,2} [а-яё]+', '⚔️ План дня', clean_plan, flags=re.IGNORECASE)
+    clean_plan = re.sub(r'Устав на \d{1,2} [а-яё]+', '⚔️ Устав дня', clean_plan, flags=re.IGNORECASE)
+    
+    # Проверяем длину сообщения (Telegram ограничение ~4096 символов).
+    # План должен помещаться в одно сообщение: из него потом создаются задачи To-Do
+    max_plan_length = 4000 - len(PERFECT_DAY_HEADER) - len(PERFECT_DAY_FOOTER) - 50  # Оставляем запас
+    if len(clean_plan) > max_plan_length:
+        clean_plan = clean_plan[:max_plan_length] + "\n\n... (план продолжается)"
+    
+    return clean_plan
+
+
+async def perfect_day_context_hash(session: AsyncSession, user_id: int, day: date) -> str:
+    """Отпечаток набора задач пользователя на день, по которому готовится план.
+
+    Учитываются только невыполненные разовые задачи, созданные пользователем
+    вручную: план пересоздается, если пользователь добавил, изменил, выполнил
+    или удалил такую задачу. Ежедневные задачи и задачи по целям, финансам и
+    питанию сбрасывает и создает планировщик в 06:00 - их изменение не
+    обесценивает план, подготовленный ночью (как и задачи, созданные из плана).
+    """
+    rows = (await session.execute(
+        select(Todo.id, Todo.title, Todo.description, Todo.priority, Todo.reminder_time, Todo.is_reminder_active)
+        .where(
+            Todo.user_id == user_id,
+            Todo.due_date == day,
+            Todo.is_completed == False,
+            Todo.is_daily == False,
+            Todo.origin == TodoOrigin.manual,
+        )
+        .order_by(Todo.id)
+    )).all()
+    fingerprint = "\n".join(repr(tuple(row)) for row in rows)
+    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+
+async def get_prepared_perfect_day_plan(
+    session: AsyncSession, user_id: int, plan_date: date, context_hash: str
+) -> Optional[str]:
+    """Заранее подготовленный план, если контекст с тех пор не изменился."""
+    return (await session.execute(
+        select(PerfectDayPlan.plan).where(
+            PerfectDayPlan.user_id == user_id,
+            PerfectDayPlan.plan_date == plan_date,
+            PerfectDayPlan.context_hash == context_hash,
+        )
+    )).scalar_one_or_none()
+
+
+async def save_perfect_day_plan(
+    session: AsyncSession, user_id: int, plan_date: date, context_hash: str, plan: str
+) -> None:
+    """Сохраняет (или заменяет) план пользователя на дату."""
+    row = (await session.execute(
+        select(PerfectDayPlan).where(PerfectDayPlan.user_id == user_id, PerfectDayPlan.plan_date == plan_date)
+    )).scalar_one_or_none()
+    if row is None:
+        session.add(PerfectDayPlan(user_id=user_id, plan_date=plan_date, context_hash=context_hash, plan=plan))
+    else:
+        row.context_hash = context_hash
+        row.plan = plan
+        row.created_at = datetime.utcnow()
+
+
+async def generate_perfect_day_plan(user_id: int, session: AsyncSession) -> str:
+    """Генерирует план идеального дня с помощью ИИ в стиле гладиаторского ланисты"""
+    try:
+        prompt = await build_perfect_day_prompt(user_id, session)
         
-        # Проверяем длину сообщения (Telegram ограничение ~4096 символов)
-        full_message = f"{header}{clean_plan}{footer}"
-        if len(full_message) > 4000:
-            # Обрезаем план, если он слишком длинный
-            max_plan_length = 4000 - len(header) - len(footer) - 50  # Оставляем запас
-            clean_plan = clean_plan[:max_plan_length] + "\n\n... (план продолжается)"
+        # Генерируем план с помощью ИИ
+        plan = await deepseek_complete(prompt, max_tokens=PERFECT_DAY_MAX_TOKENS)
         
-        return f"{header}{clean_plan}{footer}"
+        return f"{PERFECT_DAY_HEADER}{format_perfect_day_plan(plan)}{PERFECT_DAY_FOOTER}"
         
     except Exception as e:
         return f"❌ <b>Ошибка при создании плана</b>\n\nНе удалось сгенерировать план: {str(e)}"
@@ -396,7 +451,8 @@ async def create_todo_from_perfect_day(user_id: int, plan_text: str, session: As
                             priority=priority,
                             is_daily=False,
                             reminder_time=task_time,
-                            is_reminder_active=bool(task_time)
+                            is_reminder_active=bool(task_time),
+                            origin=TodoOrigin.perfect_day
                         )
                         session.add(new_todo)
                         tasks_created += 1
@@ -5,8 +5,9 @@ from typing import List
 from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Todo, User
+from app.db.models import Todo, TodoOrigin, User
 from app.services.goal_tasks_manager import GoalTasksManager
+from app.services.todo_operations import reset_daily_todos
 
 
 async def reset_daily_tasks(session: AsyncSession, user_id: int) -> None:
@@ -19,37 +20,19 @@ async def reset_daily_tasks(session: AsyncSession, user_id: int) -> None:
     3. Создает новые задачи на основе активных целей
     """
     try:
-        # Сбрасываем обычные ежедневные задачи
-        daily_todos = await session.execute(
-            select(Todo).where(
-                and_(
-                    Todo.user_id == user_id,
-                    Todo.is_daily == True,
-                    Todo.description.notlike("Ежедневная задача для достижения цели:%")
-                )
-            )
-        )
-        daily_todos_list = daily_todos.scalars().all()
-        
         today = date.today()
         
-        for todo in daily_todos_list:
-            # Сбрасываем статус выполнения
-            todo.is_completed = False
-            
-            # Обновляем дату на сегодня
-            todo.due_date = today
+        # Сбрасываем обычные ежедневные задачи одним UPDATE
+        reset = await reset_daily_todos(session, [user_id], today)
         
         # Сбрасываем задачи на основе целей
         await GoalTasksManager.reset_daily_goal_tasks(session, user_id)
+        await session.commit()
         
         # Создаем новые задачи на основе активных целей
         await GoalTasksManager.create_daily_tasks_from_goals(session, user_id)
         
-        # Сохраняем изменения
-        await session.commit()
-        
-        print(f"Сброшено {len(daily_todos_list)} обычных ежедневных задач для пользователя {user_id}")
+        print(f"Сброшено {reset.get(user_id, 0)} обычных ежедневных задач для пользователя {user_id}")
         
     except Exception as e:
         print(f"Ошибка при сбросе ежедневных задач: {e}")
@@ -85,6 +68,8 @@ async def create_daily_task_copy(session: AsyncSession, user_id: int, original_t
         due_date=date.today(),
         priority=original_todo.priority,
         is_daily=False,  # Копия не является ежедневной
+        origin=original_todo.origin,
+        origin_ref_id=original_todo.origin_ref_id,
         created_at=datetime.now()
     )
     
@@ -222,7 +207,7 @@ async def get_separate_daily_tasks_summary(session: AsyncSession, user_id: int)
                 Todo.user_id == user_id,
                 Todo.is_daily == True,
                 Todo.due_date == today,
-                Todo.description.notlike("Ежедневная задача для достижения цели:%")
+                Todo.origin != TodoOrigin.goal
             )
         )
     )
@@ -235,7 +220,7 @@ async def get_separate_daily_tasks_summary(session: AsyncSession, user_id: int)
                 Todo.user_id == user_id,
                 Todo.is_daily == True,
                 Todo.due_date == today,
-                Todo.description.like("Ежедневная задача для достижения цели:%")
+                Todo.origin == TodoOrigin.goal
             )
         )
     )
@@ -249,7 +234,7 @@ async def get_separate_daily_tasks_summary(session: AsyncSession, user_id: int)
                 Todo.is_daily == True,
                 Todo.due_date == today,
                 Todo.is_completed == True,
-                Todo.description.notlike("Ежедневная задача для достижения цели:%")
+                Todo.origin != TodoOrigin.goal
             )
         )
     )
@@ -263,7 +248,7 @@ async def get_separate_daily_tasks_summary(session: AsyncSession, user_id: int)
                 Todo.is_daily == True,
                 Todo.due_date == today,
                 Todo.is_completed == True,
-                Todo.description.like("Ежедневная задача для достижения цели:%")
+                Todo.origin == TodoOrigin.goal
             )
         )
     )
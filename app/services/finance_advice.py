@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+from app.services.llm import deepseek_complete
+
+logger = logging.getLogger(__name__)
+
+# Совет ИИ зависит только от этих показателей сводки
+ADVICE_FIGURES = ("monthly_income", "monthly_expenses", "total_creditors", "total_debtors")
+
+
+@dataclass
+class CachedAdvice:
+    figures: Tuple[float, ...]
+    advice: str
+    created_at: float
+
+
+# user_id -> последний совет; живет в памяти процесса
+_advice_cache: Dict[int, CachedAdvice] = {}
+# user_id -> выполняющееся обновление (не запускаем два запроса к ИИ для одного пользователя)
+_refreshing: Dict[int, asyncio.Task] = {}
+
+
+def _figures(summary: Dict[str, float]) -> Tuple[float, ...]:
+    return tuple(float(summary.get(name) or 0.0) for name in ADVICE_FIGURES)
+
+
+def figures_within_tolerance(old: Tuple[float, ...], new: Tuple[float, ...], tolerance: float) -> bool:
+    """Все показатели отличаются не более чем на tolerance относительно большего из значений."""
+    return all(abs(a - b) <= tolerance * max(abs(a), abs(b)) for a, b in zip(old, new))
+
+
+def _format_advice(ai_advice: str) -> str:
+    # Заменить звездочки на HTML-теги для жирного текста
+    ai_advice = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', ai_advice)
+
+    # Ограничиваем длину совета и добавляем переносы строк
+    if len(ai_advice) > 300:
+        # Находим последнее полное предложение в пределах лимита
+        truncated = ai_advice[:300]
+        last_period = truncated.rfind('.')
+        if last_period > 250:  # Если точка найдена в разумных пределах
+            ai_advice = truncated[:last_period + 1]
+        else:
+            ai_advice = truncated + "..."
+
+    # Добавляем переносы строк для лучшего форматирования
+    ai_advice = ai_advice.replace(". ", ".\n")
+
+    # Убираем лишние переносы строк в конце
+    return ai_advice.strip()
+
+
+async def request_finance_advice(summary: Dict[str, float]) -> str:
+    """Запрашивает у ИИ краткий финансовый совет по сводке."""
+    ai_advice = await deepseek_complete(
+        f"Дай краткий финансовый совет на основе данных: доходы {summary['monthly_income']}, расходы {summary['monthly_expenses']}, кредиторы {summary['total_creditors']}, должники {summary['total_debtors']}. Совет должен быть практичным и мотивирующим. Максимум 2-3 предложения.",
+        system="Ты финансовый консультант. Дай краткий, практичный совет в 2-3 предложения.",
+        max_tokens=100,
+        hedge=True,
+    )
+    return _format_advice(ai_advice)
+
+
+async def _refresh(user_id: int, summary: Dict[str, float]) -> str:
+    try:
+        advice = await request_finance_advice(summary)
+        _advice_cache[user_id] = CachedAdvice(_figures(summary), advice, time.monotonic())
+        return advice
+    finally:
+        _refreshing.pop(user_id, None)
+
+
+def _log_refresh_error(task: asyncio.Task) -> None:
+    # Ошибку фонового обновления только логируем - в кеше остается прежний совет
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Finance advice refresh failed: %s", task.exception())
+
+
+def _start_refresh(user_id: int, summary: Dict[str, float]) -> asyncio.Task:
+    task = _refreshing.get(user_id)
+    if task is None:
+        task = asyncio.create_task(_refresh(user_id, summary))
+        task.add_done_callback(_log_refresh_error)
+        _refreshing[user_id] = task
+    return task
+
+
+async def get_finance_advice(user_id: int, summary: Dict[str, float]) -> Optional[str]:
+    """Совет ИИ для финансового отчета с допуском на устаревание.
+
+    Пока показатели в пределах FINANCE_ADVICE_TOLERANCE от тех, по которым
+    совет получен, он отдается из кеша. Если показатели ушли дальше (или
+    совет старше FINANCE_ADVICE_MAX_AGE_HOURS), отдается прежний совет, а
+    новый запрашивается в фоне. Без кеша ждем ответ ИИ не дольше
+    FINANCE_ADVICE_WAIT_SECONDS; None - совета пока нет.
+    """
+    figures = _figures(summary)
+    cached = _advice_cache.get(user_id)
+    if cached is not None:
+        fresh = time.monotonic() - cached.created_at < settings.FINANCE_ADVICE_MAX_AGE_HOURS * 3600
+        if not (fresh and figures_within_tolerance(cached.figures, figures, settings.FINANCE_ADVICE_TOLERANCE)):
+            _start_refresh(user_id, summary)
+        return cached.advice
+
+    task = _start_refresh(user_id, summary)
+    try:
+        # shield: по таймауту запрос продолжает выполняться и заполнит кеш к следующему открытию
+        return await asyncio.wait_for(asyncio.shield(task), timeout=settings.FINANCE_ADVICE_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        return None
+    except Exception:
+        return None
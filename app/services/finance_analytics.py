@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import csv
 from io import StringIO
 
+from app.db.aggregates import fetch_aggregates
 from app.db.models import FinanceTransaction, User, Creditor, Debtor, Income
 
 # Основные группы категорий для группировки доходов и расходов
@@ -60,70 +61,49 @@ def get_group_color(group: str) -> str:
 
 
 async def get_finance_summary(session: AsyncSession, user_id: int) -> Dict[str, float]:
-    """Получить сводку по финансам пользователя"""
+    """Получить сводку по финансам пользователя (один запрос к базе)"""
     # Текущий месяц
     now = datetime.now()
     month_start = date(now.year, now.month, 1)
     month_end = date(now.year, now.month + 1, 1) if now.month < 12 else date(now.year + 1, 1, 1)
     
-    # Доходы текущего месяца
-    monthly_income_result = await session.execute(
-        select(func.sum(FinanceTransaction.amount))
-        .where(
+    totals = await fetch_aggregates(
+        session,
+        # Доходы и расходы текущего месяца
+        select(
+            func.sum(FinanceTransaction.amount).filter(FinanceTransaction.amount > 0).label("monthly_income"),
+            func.sum(FinanceTransaction.amount).filter(FinanceTransaction.amount < 0).label("monthly_expenses"),
+        ).where(
             and_(
                 FinanceTransaction.user_id == user_id,
-                FinanceTransaction.amount > 0,
                 FinanceTransaction.date >= month_start,
                 FinanceTransaction.date < month_end
             )
-        )
-    )
-    monthly_income = monthly_income_result.scalar() or 0.0
-    
-    # Расходы текущего месяца
-    monthly_expenses_result = await session.execute(
-        select(func.sum(FinanceTransaction.amount))
-        .where(
-            and_(
-                FinanceTransaction.user_id == user_id,
-                FinanceTransaction.amount < 0,
-                FinanceTransaction.date >= month_start,
-                FinanceTransaction.date < month_end
-            )
-        )
-    )
-    monthly_expenses = abs(monthly_expenses_result.scalar() or 0.0)
-    
-    # Приводим к float для корректных вычислений
-    monthly_income = float(monthly_income)
-    monthly_expenses = float(monthly_expenses)
-    
-    # Баланс текущего месяца
-    monthly_balance = monthly_income - monthly_expenses
-    
-    # Общие кредиторы
-    creditors_result = await session.execute(
-        select(func.sum(Creditor.amount))
-        .where(
+        ),
+        # Общие кредиторы
+        select(func.sum(Creditor.amount).label("total_creditors")).where(
             and_(
                 Creditor.user_id == user_id,
                 Creditor.is_active.is_(True)
             )
-        )
-    )
-    total_creditors = float(creditors_result.scalar() or 0.0)
-    
-    # Общие должники
-    debtors_result = await session.execute(
-        select(func.sum(Debtor.amount))
-        .where(
+        ),
+        # Общие должники
+        select(func.sum(Debtor.amount).label("total_debtors")).where(
             and_(
                 Debtor.user_id == user_id,
                 Debtor.is_active.is_(True)
             )
-        )
+        ),
     )
-    total_debtors = float(debtors_result.scalar() or 0.0)
+    
+    # Приводим к float для корректных вычислений
+    monthly_income = float(totals["monthly_income"] or 0.0)
+    monthly_expenses = abs(float(totals["monthly_expenses"] or 0.0))
+    
+    # Баланс текущего месяца
+    monthly_balance = monthly_income - monthly_expenses
+    total_creditors = float(totals["total_creditors"] or 0.0)
+    total_debtors = float(totals["total_debtors"] or 0.0)
     
     return {
         "monthly_income": monthly_income,
@@ -4,9 +4,10 @@ from datetime import datetime, date, time, timedelta
 from typing import List, Tuple, Dict
 import random
 
-from sqlalchemy import select, and_
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.hot_queries import overdue_creditors, overdue_debtors, upcoming_creditors, upcoming_debtors
 from app.db.models import Creditor, Debtor, User
 from app.utils.timezone_utils import get_user_time_info
 
@@ -31,73 +32,27 @@ FINANCE_MOTIVATION_MESSAGES = [
 
 async def get_overdue_creditors(session: AsyncSession, user_id: int) -> List[Creditor]:
     """Получает просроченных кредиторов пользователя."""
-    today = date.today()
-    result = await session.execute(
-        select(Creditor)
-        .where(
-            and_(
-                Creditor.user_id == user_id,
-                Creditor.is_active == True,
-                Creditor.due_date < today
-            )
-        )
-        .order_by(Creditor.due_date)
-    )
+    result = await session.execute(overdue_creditors(user_id, date.today()))
     return result.scalars().all()
 
 
 async def get_overdue_debtors(session: AsyncSession, user_id: int) -> List[Debtor]:
     """Получает просроченных должников пользователя."""
-    today = date.today()
-    result = await session.execute(
-        select(Debtor)
-        .where(
-            and_(
-                Debtor.user_id == user_id,
-                Debtor.is_active == True,
-                Debtor.due_date < today
-            )
-        )
-        .order_by(Debtor.due_date)
-    )
+    result = await session.execute(overdue_debtors(user_id, date.today()))
     return result.scalars().all()
 
 
 async def get_upcoming_creditors(session: AsyncSession, user_id: int, days_ahead: int = 3) -> List[Creditor]:
     """Получает кредиторов с приближающимися сроками выплат."""
     today = date.today()
-    future_date = today + timedelta(days=days_ahead)
-    result = await session.execute(
-        select(Creditor)
-        .where(
-            and_(
-                Creditor.user_id == user_id,
-                Creditor.is_active == True,
-                Creditor.due_date >= today,
-                Creditor.due_date <= future_date
-            )
-        )
-        .order_by(Creditor.due_date)
-    )
+    result = await session.execute(upcoming_creditors(user_id, today, today + timedelta(days=days_ahead)))
     return result.scalars().all()
 
 
 async def get_upcoming_debtors(session: AsyncSession, user_id: int, days_ahead: int = 3) -> List[Debtor]:
     """Получает должников с приближающимися сроками выплат."""
     today = date.today()
-    future_date = today + timedelta(days=days_ahead)
-    result = await session.execute(
-        select(Debtor)
-        .where(
-            and_(
-                Debtor.user_id == user_id,
-                Debtor.is_active == True,
-                Debtor.due_date >= today,
-                Debtor.due_date <= future_date
-            )
-        )
-        .order_by(Debtor.due_date)
-    )
+    result = await session.execute(upcoming_debtors(user_id, today, today + timedelta(days=days_ahead)))
     return result.scalars().all()
 
 
@@ -1,11 +1,107 @@
 from __future__ import annotations
 
-from datetime import date, datetime
-from typing import List
-from sqlalchemy import select, and_
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Collection, Dict, List
+from sqlalchemy import String, and_, cast, delete, func, insert, literal, select, true, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Creditor, Debtor, Todo, User
+from app.db.models import Creditor, Debtor, Todo, TodoOrigin, User, FINANCE_TODO_ORIGINS
+
+
+def _insert_for(dialect: str) -> Any:
+    """insert() с поддержкой ON CONFLICT для PostgreSQL и SQLite."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert
+    return dialect_insert
+
+
+def _format_amount(amount: Any, dialect: str) -> Any:
+    """Сумма как в f"{amount:,.2f}": 1,234.50 (в SQLite без разделителя тысяч)."""
+    if dialect == "postgresql":
+        return func.to_char(amount, "FM999,999,999,990.00")
+    return func.printf("%.2f", amount)
+
+
+def _obligation_todos(model: Any, origin: TodoOrigin, user_ids: Collection[int], today: date, dialect: str) -> Any:
+    """SELECT строк задач для обязательств model со сроком today, у которых задачи еще нет."""
+    if origin == TodoOrigin.creditor:
+        title = literal("Получить долг от ") + model.name
+        description = (
+            literal("Финансовое обязательство: Кредитор ID:") + cast(model.id, String) + " - " + model.name
+            + " должен " + _format_amount(model.amount, dialect) + " ₽. Описание: "
+            + func.coalesce(model.description, "Не указано")
+        )
+    else:
+        title = literal("Отдать долг ") + model.name
+        description = (
+            literal("Финансовое обязательство: Должник ID:") + cast(model.id, String) + " - вы должны " + model.name
+            + " " + _format_amount(model.amount, dialect) + " ₽. Описание: "
+            + func.coalesce(model.description, "Не указано")
+        )
+    existing = select(Todo.id).where(
+        and_(
+            Todo.origin == origin,
+            Todo.origin_ref_id == model.id,
+            Todo.due_date == today
+        )
+    )
+    return select(
+        model.user_id,
+        title,
+        description,
+        literal(today),
+        literal("high"),  # Высокий приоритет для финансовых обязательств
+        literal(False),
+        literal(False),
+        literal(False),
+        cast(literal(origin.value), Todo.origin.type),
+        model.id,
+        literal(datetime.utcnow()),
+    ).where(
+        and_(
+            model.user_id.in_(user_ids),
+            model.is_active == True,
+            model.due_date == today,
+            ~existing.exists()
+        )
+    )
+
+
+async def create_financial_todos_for_users(
+    session: AsyncSession, user_ids: Collection[int], today: date
+) -> Dict[int, int]:
+    """
+    Создает задачи для кредиторов и должников со сроком today сразу для всех user_ids.
+    
+    Один INSERT ... SELECT по обеим таблицам; повторный запуск и параллельные
+    вставки отсекает уникальный индекс uq_todos_finance_origin_due
+    (ON CONFLICT DO NOTHING).
+    
+    Returns:
+        Число созданных задач по user_id
+    """
+    if not user_ids:
+        return {}
+    dialect = session.bind.dialect.name
+    source = union_all(
+        _obligation_todos(Creditor, TodoOrigin.creditor, user_ids, today, dialect),
+        _obligation_todos(Debtor, TodoOrigin.debtor, user_ids, today, dialect),
+    ).subquery()
+    columns = [
+        "user_id", "title", "description", "due_date", "priority", "is_daily", "is_completed",
+        "is_reminder_active", "origin", "origin_ref_id", "created_at",
+    ]
+    # WHERE нужен SQLite, чтобы ON CONFLICT не принимался за часть SELECT
+    statement = _insert_for(dialect)(Todo).from_select(columns, select(source).where(true()))
+    if dialect in ("postgresql", "sqlite"):
+        statement = statement.on_conflict_do_nothing()
+    result = await session.execute(statement.returning(Todo.user_id))
+    return dict(Counter(result.scalars().all()))
 
 
 async def create_todo_for_financial_obligations(session: AsyncSession, user_id: int) -> None:
@@ -13,93 +109,10 @@ async def create_todo_for_financial_obligations(session: AsyncSession, user_id:
     Создает задачи в To-Do для финансовых обязательств, срок которых наступил сегодня.
     """
     try:
-        today = date.today()
-        
-        # Получаем кредиторов с сегодняшней датой
-        creditors_due_today = await session.execute(
-            select(Creditor)
-            .where(
-                and_(
-                    Creditor.user_id == user_id,
-                    Creditor.is_active == True,
-                    Creditor.due_date == today
-                )
-            )
-        )
-        creditors_list = creditors_due_today.scalars().all()
-        
-        # Получаем должников с сегодняшней датой
-        debtors_due_today = await session.execute(
-            select(Debtor)
-            .where(
-                and_(
-                    Debtor.user_id == user_id,
-                    Debtor.is_active == True,
-                    Debtor.due_date == today
-                )
-            )
-        )
-        debtors_list = debtors_due_today.scalars().all()
-        
-        # Проверяем, не созданы ли уже задачи для этих обязательств сегодня
-        existing_todos = await session.execute(
-            select(Todo)
-            .where(
-                and_(
-                    Todo.user_id == user_id,
-                    Todo.due_date == today,
-                    Todo.description.like("Финансовое обязательство:%")
-                )
-            )
-        )
-        existing_todos_list = existing_todos.scalars().all()
-        
-        # Создаем множество уже созданных задач для избежания дублирования
-        existing_task_ids = set()
-        for todo in existing_todos_list:
-            if todo.description and "Финансовое обязательство:" in todo.description:
-                # Извлекаем ID из описания
-                try:
-                    task_id = int(todo.description.split("ID:")[1].split()[0])
-                    existing_task_ids.add(task_id)
-                except (IndexError, ValueError):
-                    continue
-        
-        tasks_created = 0
-        
-        # Создаем задачи для кредиторов
-        for creditor in creditors_list:
-            if creditor.id not in existing_task_ids:
-                todo = Todo(
-                    user_id=user_id,
-                    title=f"Получить долг от {creditor.name}",
-                    description=f"Финансовое обязательство: Кредитор ID:{creditor.id} - {creditor.name} должен {float(creditor.amount):,.2f} ₽. Описание: {creditor.description or 'Не указано'}",
-                    due_date=today,
-                    priority="high",  # Высокий приоритет для финансовых обязательств
-                    is_daily=False,
-                    is_completed=False
-                )
-                session.add(todo)
-                tasks_created += 1
-        
-        # Создаем задачи для должников
-        for debtor in debtors_list:
-            if debtor.id not in existing_task_ids:
-                todo = Todo(
-                    user_id=user_id,
-                    title=f"Отдать долг {debtor.name}",
-                    description=f"Финансовое обязательство: Должник ID:{debtor.id} - вы должны {debtor.name} {float(debtor.amount):,.2f} ₽. Описание: {debtor.description or 'Не указано'}",
-                    due_date=today,
-                    priority="high",  # Высокий приоритет для финансовых обязательств
-                    is_daily=False,
-                    is_completed=False
-                )
-                session.add(todo)
-                tasks_created += 1
-        
-        if tasks_created > 0:
+        created = await create_financial_todos_for_users(session, [user_id], date.today())
+        if created:
             await session.commit()
-            print(f"✅ Создано {tasks_created} задач для финансовых обязательств пользователя {user_id}")
+            print(f"✅ Создано {created[user_id]} задач для финансовых обязательств пользователя {user_id}")
         
     except Exception as e:
         print(f"❌ Ошибка при создании задач для финансовых обязательств: {e}")
@@ -110,11 +123,11 @@ async def create_todos_for_all_users(session: AsyncSession) -> None:
     Создает задачи для финансовых обязательств всех пользователей.
     """
     try:
-        # Получаем всех пользователей
-        users = (await session.execute(select(User))).scalars().all()
-        
-        for user in users:
-            await create_todo_for_financial_obligations(session, user.id)
+        user_ids = (await session.execute(select(User.id))).scalars().all()
+        created = await create_financial_todos_for_users(session, user_ids, date.today())
+        if created:
+            await session.commit()
+            print(f"✅ Создано {sum(created.values())} задач для финансовых обязательств {len(created)} пользователей")
             
     except Exception as e:
         print(f"❌ Ошибка при создании задач для всех пользователей: {e}")
@@ -122,32 +135,28 @@ async def create_todos_for_all_users(session: AsyncSession) -> None:
 
 async def cleanup_old_financial_todos(session: AsyncSession, user_id: int) -> None:
     """
-    Удаляет старые задачи для финансовых обязательств (старше 7 дней).
+    Удаляет старые выполненные задачи для финансовых обязательств (старше 7 дней).
     """
     try:
-        today = date.today()
-        week_ago = today - datetime.timedelta(days=7)
+        week_ago = date.today() - timedelta(days=7)
         
-        # Удаляем старые задачи для финансовых обязательств
-        old_todos = await session.execute(
-            select(Todo)
+        # Один DELETE вместо загрузки и удаления задач по одной
+        result = await session.execute(
+            delete(Todo)
             .where(
                 and_(
                     Todo.user_id == user_id,
+                    Todo.origin.in_(FINANCE_TODO_ORIGINS),
                     Todo.due_date < week_ago,
-                    Todo.description.like("Финансовое обязательство:%"),
                     Todo.is_completed == True  # Удаляем только выполненные
                 )
             )
+            .execution_options(synchronize_session=False)
         )
-        old_todos_list = old_todos.scalars().all()
-        
-        for todo in old_todos_list:
-            await session.delete(todo)
         
-        if old_todos_list:
+        if result.rowcount:
             await session.commit()
-            print(f"🗑️ Удалено {len(old_todos_list)} старых задач для финансовых обязательств пользователя {user_id}")
+            print(f"🗑️ Удалено {result.rowcount} старых задач для финансовых обязательств пользователя {user_id}")
         
     except Exception as e:
         print(f"❌ Ошибка при очистке старых задач: {e}")
@@ -163,7 +172,7 @@ async def get_financial_todos_for_user(session: AsyncSession, user_id: int) -> L
             .where(
                 and_(
                     Todo.user_id == user_id,
-                    Todo.description.like("Финансовое обязательство:%")
+                    Todo.origin.in_(FINANCE_TODO_ORIGINS)
                 )
             )
             .order_by(Todo.due_date.desc())
@@ -1,26 +1,33 @@
 from __future__ import annotations
 
-from datetime import date, datetime
-from typing import List, Optional
-from sqlalchemy import select, and_
+import json
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import delete, select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Goal, Todo, User
+from app.db.models import Goal, Todo, TodoOrigin, User
 from app.db.models.goal import GoalStatus, GoalScope
 from app.services.llm import deepseek_complete
+from app.services.todo_operations import reset_goal_todos
 
 
 class GoalTasksManager:
     """Менеджер для создания ежедневных задач на основе целей пользователя."""
     
     @staticmethod
-    async def create_daily_tasks_from_goals(session: AsyncSession, user_id: int) -> List[Todo]:
+    async def create_daily_tasks_from_goals(
+        session: AsyncSession, user_id: int, batched: bool = True
+    ) -> List[Todo]:
         """
         Создает ежедневные задачи на основе активных целей пользователя.
         
         Args:
             session: Сессия базы данных
             user_id: ID пользователя
+            batched: Генерировать названия всех задач одним запросом к ИИ
+                и проверять дубликаты одним запросом к БД
             
         Returns:
             Список созданных задач
@@ -42,15 +49,21 @@ class GoalTasksManager:
         created_tasks = []
         today = date.today()
         
-        for goal in goals_list:
-            # Генерируем ежедневную задачу на основе цели
-            daily_task = await GoalTasksManager._generate_daily_task_from_goal(
-                session, goal, today
+        if batched:
+            created_tasks = await GoalTasksManager._generate_daily_tasks_batched(
+                session, user_id, goals_list, today
             )
-            
-            if daily_task:
-                session.add(daily_task)
-                created_tasks.append(daily_task)
+            session.add_all(created_tasks)
+        else:
+            for goal in goals_list:
+                # Генерируем ежедневную задачу на основе цели
+                daily_task = await GoalTasksManager._generate_daily_task_from_goal(
+                    session, goal, today
+                )
+                
+                if daily_task:
+                    session.add(daily_task)
+                    created_tasks.append(daily_task)
         
         if created_tasks:
             await session.commit()
@@ -58,6 +71,56 @@ class GoalTasksManager:
         
         return created_tasks
     
+    @staticmethod
+    async def _generate_daily_tasks_batched(
+        session: AsyncSession,
+        user_id: int,
+        goals: List[Goal],
+        task_date: date
+    ) -> List[Todo]:
+        """
+        Генерирует задачи для всех целей одним запросом к ИИ.
+        
+        Цели, для которых задача на эту дату уже есть, отсекаются одним
+        запросом к БД по origin_ref_id еще до обращения к ИИ.
+        """
+        existing_goal_ids = set(
+            (await session.execute(
+                select(Todo.origin_ref_id).where(
+                    and_(
+                        Todo.user_id == user_id,
+                        Todo.origin == TodoOrigin.goal,
+                        Todo.due_date == task_date
+                    )
+                )
+            )).scalars().all()
+        )
+        goals = [goal for goal in goals if goal.id not in existing_goal_ids]
+        if not goals:
+            return []
+        
+        titles = await GoalTasksManager._generate_task_titles_from_goals(goals)
+        
+        tasks = []
+        for goal in goals:
+            task_title = titles[goal.id]
+            tasks.append(
+                Todo(
+                    user_id=goal.user_id,
+                    title=task_title,
+                    description=f"Ежедневная задача для достижения цели: {goal.title}",
+                    due_date=task_date,
+                    priority=GoalTasksManager._get_priority_from_goal_scope(goal.scope),
+                    is_daily=True,
+                    is_completed=False,
+                    reminder_time=None,  # Напоминания будут через систему целей
+                    is_reminder_active=False,
+                    origin=TodoOrigin.goal,
+                    origin_ref_id=goal.id
+                )
+            )
+        return tasks
+    
     @staticmethod
     async def _generate_daily_task_from_goal(
         session: AsyncSession, 
@@ -78,25 +141,25 @@ class GoalTasksManager:
         # Все задачи на основе целей получают высокий приоритет
         priority = GoalTasksManager._get_priority_from_goal_scope(goal.scope)
         
-        # Генерируем название задачи на основе цели
-        task_title = await GoalTasksManager._generate_task_title_from_goal(goal)
-        
-        # Проверяем, не существует ли уже такая задача на сегодня
+        # Проверяем, не существует ли уже задача по этой цели на сегодня
         existing_task = await session.execute(
-            select(Todo).where(
+            select(Todo.id).where(
                 and_(
                     Todo.user_id == goal.user_id,
-                    Todo.title == task_title,
-                    Todo.due_date == task_date,
-                    Todo.is_daily == True
+                    Todo.origin == TodoOrigin.goal,
+                    Todo.origin_ref_id == goal.id,
+                    Todo.due_date == task_date
                 )
-            )
+            ).limit(1)
         )
         
         if existing_task.scalar_one_or_none():
             # Задача уже существует, не создаем дубликат
             return None
         
+        # Генерируем название задачи на основе цели
+        task_title = await GoalTasksManager._generate_task_title_from_goal(goal)
+        
         # Создаем новую задачу
         daily_task = Todo(
             user_id=goal.user_id,
@@ -107,7 +170,9 @@ class GoalTasksManager:
             is_daily=True,
             is_completed=False,
             reminder_time=None,  # Напоминания будут через систему целей
-            is_reminder_active=False
+            is_reminder_active=False,
+            origin=TodoOrigin.goal,
+            origin_ref_id=goal.id
         )
         
         return daily_task
@@ -159,14 +224,86 @@ class GoalTasksManager:
             
             # Если AI не сработал, создаем базовое название
             if not task_title or len(task_title) < 3:
-                task_title = f"Работать над целью: {goal.title[:50]}"
+                task_title = GoalTasksManager._fallback_task_title(goal)
             
             return task_title
             
         except Exception as e:
             print(f"Ошибка генерации названия задачи для цели {goal.id}: {e}")
             # Fallback - создаем базовое название
-            return f"Работать над целью: {goal.title[:50]}"
+            return GoalTasksManager._fallback_task_title(goal)
+    
+    @staticmethod
+    def _fallback_task_title(goal: Goal) -> str:
+        """Базовое название задачи, если ИИ не ответил или ответ не подошел."""
+        return f"Работать над целью: {goal.title[:50]}"
+    
+    @staticmethod
+    def _parse_task_titles(response: str) -> Dict[int, str]:
+        """Разбирает JSON-список вида [{"goal_id": 1, "task": "..."}] из ответа ИИ."""
+        match = re.search(r"\[.*\]", response, flags=re.DOTALL)
+        if not match:
+            return {}
+        items = json.loads(match.group(0))
+        titles: Dict[int, str] = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            try:
+                goal_id = int(item.get("goal_id"))
+            except (TypeError, ValueError):
+                continue
+            title = str(item.get("task") or "").strip().strip('"').strip("'").strip()
+            if len(title) >= 3:
+                titles[goal_id] = title[:500]
+        return titles
+    
+    @staticmethod
+    async def _generate_task_titles_from_goals(goals: List[Goal]) -> Dict[int, str]:
+        """
+        Генерирует названия ежедневных задач для нескольких целей одним запросом к ИИ.
+        Для целей, по которым ИИ не вернул задачу, используется базовое название.
+        """
+        titles: Dict[int, str] = {}
+        try:
+            goals_text = "\n".join(
+                f"- goal_id={goal.id}; Цель: {goal.title}; "
+                f"Описание: {goal.description or 'Не указано'}; "
+                f"Срок: {goal.due_date.strftime('%d.%m.%Y') if goal.due_date else 'Не указан'}"
+                for goal in goals
+            )
+            prompt = f"""
+            Цели пользователя:
+            {goals_text}
+            
+            Для КАЖДОЙ цели создай одну конкретную ежедневную задачу.
+            Задача должна быть:
+            - Конкретной и измеримой
+            - Выполнимой за день
+            - Начинаться с глагола действия
+            
+            Примеры:
+            - Цель: "Выучить английский" → Задача: "Заниматься английским 30 минут"
+            - Цель: "Похудеть" → Задача: "Сделать 30 минут кардио"
+            - Цель: "Прочитать 12 книг" → Задача: "Читать книгу 20 минут"
+            
+            Верни только JSON-массив без пояснений в формате:
+            [{{"goal_id": <goal_id>, "task": "<название задачи>"}}]
+            """
+            
+            response = await deepseek_complete(
+                prompt,
+                system="Ты помощник по постановке целей. Создавай конкретные ежедневные задачи. Отвечай только валидным JSON.",
+                max_tokens=max(512, 80 * len(goals))
+            )
+            titles = GoalTasksManager._parse_task_titles(response)
+        except Exception as e:
+            print(f"Ошибка пакетной генерации задач для целей {[goal.id for goal in goals]}: {e}")
+        
+        return {
+            goal.id: titles.get(goal.id) or GoalTasksManager._fallback_task_title(goal)
+            for goal in goals
+        }
     
     @staticmethod
     async def reset_daily_goal_tasks(session: AsyncSession, user_id: int) -> None:
@@ -177,27 +314,11 @@ class GoalTasksManager:
             session: Сессия базы данных
             user_id: ID пользователя
         """
-        today = date.today()
-        
-        # Находим все ежедневные задачи пользователя, созданные на основе целей
-        daily_tasks = await session.execute(
-            select(Todo).where(
-                and_(
-                    Todo.user_id == user_id,
-                    Todo.is_daily == True,
-                    Todo.description.like("Ежедневная задача для достижения цели:%"),
-                    Todo.due_date == today
-                )
-            )
-        )
-        daily_tasks_list = daily_tasks.scalars().all()
+        reset = await reset_goal_todos(session, [user_id], date.today())
         
-        for task in daily_tasks_list:
-            task.is_completed = False
-        
-        if daily_tasks_list:
+        if reset:
             await session.commit()
-            print(f"Сброшено {len(daily_tasks_list)} ежедневных задач на основе целей для пользователя {user_id}")
+            print(f"Сброшено {reset[user_id]} ежедневных задач на основе целей для пользователя {user_id}")
     
     @staticmethod
     async def get_daily_goal_tasks_summary(session: AsyncSession, user_id: int) -> dict:
@@ -219,7 +340,7 @@ class GoalTasksManager:
                 and_(
                     Todo.user_id == user_id,
                     Todo.is_daily == True,
-                    Todo.description.like("Ежедневная задача для достижения цели:%"),
+                    Todo.origin == TodoOrigin.goal,
                     Todo.due_date == today
                 )
             )
@@ -232,7 +353,7 @@ class GoalTasksManager:
                 and_(
                     Todo.user_id == user_id,
                     Todo.is_daily == True,
-                    Todo.description.like("Ежедневная задача для достижения цели:%"),
+                    Todo.origin == TodoOrigin.goal,
                     Todo.due_date == today,
                     Todo.is_completed == True
                 )
@@ -260,26 +381,21 @@ class GoalTasksManager:
         Returns:
             Количество удаленных задач
         """
-        cutoff_date = date.today() - datetime.timedelta(days=days_to_keep)
+        cutoff_date = date.today() - timedelta(days=days_to_keep)
         
-        # Находим старые выполненные задачи на основе целей
-        old_tasks = await session.execute(
-            select(Todo).where(
+        # Один DELETE вместо загрузки и удаления задач по одной
+        result = await session.execute(
+            delete(Todo).where(
                 and_(
                     Todo.user_id == user_id,
+                    Todo.origin == TodoOrigin.goal,
                     Todo.is_daily == True,
-                    Todo.description.like("Ежедневная задача для достижения цели:%"),
                     Todo.due_date < cutoff_date,
                     Todo.is_completed == True
                 )
-            )
+            ).execution_options(synchronize_session=False)
         )
-        old_tasks_list = old_tasks.scalars().all()
-        
-        deleted_count = 0
-        for task in old_tasks_list:
-            await session.delete(task)
-            deleted_count += 1
+        deleted_count = result.rowcount or 0
         
         if deleted_count > 0:
             await session.commit()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.models import Interaction
+
+logger = logging.getLogger(__name__)
+
+
+class InteractionLogBuffer:
+    """Отложенная запись истории взаимодействий пачками.
+
+    Middleware только кладет запись в очередь (без ожидания БД), а фоновая
+    задача сбрасывает накопленное одним многострочным INSERT каждые
+    INTERACTION_LOG_FLUSH_MS мс или по достижении INTERACTION_LOG_BATCH_SIZE
+    записей. При переполнении очереди записи отбрасываются с предупреждением,
+    чтобы логирование никогда не тормозило обработчики.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_queue: Optional[int] = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.INTERACTION_LOG_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.INTERACTION_LOG_FLUSH_MS / 1000
+        self._queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue(maxsize=max_queue or settings.INTERACTION_LOG_QUEUE_SIZE)
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+
+    def log(self, user_id: int, message_text: str, command: Optional[str], meta: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait({
+                "user_id": user_id,
+                "message_text": message_text,
+                "command": command,
+                "meta": meta,
+                "created_at": datetime.utcnow(),
+            })
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                logger.warning("Interaction log: queue is full, %d records dropped so far", self.dropped)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Interaction log: batching up to %d records every %.0f ms",
+                        self.batch_size, self.flush_interval * 1000)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Дописываем остаток очереди перед выходом
+        while not self._queue.empty():
+            await self._write(self._take(self.batch_size))
+
+    def _take(self, limit: int) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        batch: List[Dict[str, Any]] = []
+        writing: Optional[asyncio.Future] = None
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+                    except asyncio.TimeoutError:
+                        break
+                batch.extend(self._take(self.batch_size - len(batch)))
+                # Пачка передается записи целиком: отмена во время INSERT не
+                # прерывает его и не приводит к повторной записи тех же строк
+                writing = asyncio.ensure_future(self._write(batch))
+                batch = []
+                await asyncio.shield(writing)
+                writing = None
+        except asyncio.CancelledError:
+            if writing is not None:
+                await writing
+            # Уже вынутые из очереди, но еще не записанные записи не теряем при остановке
+            await self._write(batch)
+            raise
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+        try:
+            async with self.session_factory() as session:  # type: ignore[misc]
+                # executemany: драйвер отправляет пачку одним многострочным INSERT
+                await session.execute(insert(Interaction), batch)
+                await session.commit()
+            self.written += len(batch)
+        except Exception as e:
+            logger.error("Interaction log: failed to write %d records: %s", len(batch), e)
+
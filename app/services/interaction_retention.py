@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.config import settings
+from app.db.models import Interaction
+from app.services.retention import purge_in_batches
+
+logger = logging.getLogger(__name__)
+
+# Месячные партиции: interaction_p202610 хранит [2026-10-01, 2026-11-01)
+PARTITION_PREFIX = "interaction_p"
+_PARTITION_RE = re.compile(rf"^{PARTITION_PREFIX}(\d{{4}})(\d{{2}})$")
+
+
+@dataclass
+class RetentionReport:
+    """Итог обслуживания истории взаимодействий."""
+    partitioned: bool = False
+    created_partitions: List[str] = field(default_factory=list)
+    dropped_partitions: List[str] = field(default_factory=list)
+    # Для удаленных партиций - оценка по статистике (reltuples), без подсчета строк
+    dropped_rows_estimate: int = 0
+    deleted_rows: int = 0
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+
+def retention_cutoff(today: date, retention_months: int) -> date:
+    """Граница хранения: текущий месяц и retention_months предыдущих сохраняются."""
+    return add_months(month_start(today), -retention_months)
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool((await conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('interaction'))"
+    ))).scalar())
+
+
+async def list_partitions(conn: AsyncConnection) -> List[Tuple[str, date]]:
+    """Месячные партиции interaction (без default) в порядке возрастания месяца."""
+    rows = (await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('interaction')"
+    ))).scalars().all()
+    partitions = []
+    for name in rows:
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+async def default_partition(conn: AsyncConnection) -> Optional[str]:
+    """Имя DEFAULT-партиции interaction (создается миграцией 012), если она есть."""
+    return (await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('interaction') "
+        "AND pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT'"
+    ))).scalar_one_or_none()
+
+
+async def create_partition(conn: AsyncConnection, month: date) -> int:
+    """Создает партицию месяца; возвращает число строк, перенесенных в нее из DEFAULT.
+
+    Если в DEFAULT-партиции уже есть строки этого месяца, PostgreSQL не даст
+    создать партицию. Тогда DEFAULT отсоединяется, строки месяца переносятся
+    в новую партицию, и DEFAULT присоединяется обратно - все в транзакции conn.
+    """
+    name = partition_name(month)
+    bounds = {"start": datetime.combine(month, datetime.min.time()),
+              "end": datetime.combine(add_months(month, 1), datetime.min.time())}
+    create = (
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF interaction "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+    default = await default_partition(conn)
+    has_rows = default is not None and (await conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {default} WHERE created_at >= :start AND created_at < :end)"
+    ), bounds)).scalar()
+    if not has_rows:
+        await conn.execute(text(create))
+        return 0
+    await conn.execute(text(f"ALTER TABLE interaction DETACH PARTITION {default}"))
+    await conn.execute(text(create))
+    moved = (await conn.execute(text(
+        f"WITH moved AS (DELETE FROM {default} WHERE created_at >= :start AND created_at < :end RETURNING *) "
+        f"INSERT INTO interaction SELECT * FROM moved"
+    ), bounds)).rowcount
+    await conn.execute(text(f"ALTER TABLE interaction ATTACH PARTITION {default} DEFAULT"))
+    return moved
+
+
+async def ensure_partitions(engine: AsyncEngine, today: date, months_ahead: int) -> List[str]:
+    """Создает партиции на текущий месяц и months_ahead следующих, если их еще нет.
+
+    Каждый месяц - в своей транзакции: ошибка одного месяца (например, не
+    дождались блокировки) логируется и не мешает остальным и удалению старой
+    истории.
+    """
+    created = []
+    async with engine.connect() as conn:
+        existing = {name for name, _ in await list_partitions(conn)}
+    for offset in range(months_ahead + 1):
+        month = add_months(month_start(today), offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+                moved = await create_partition(conn, month)
+        except Exception as e:
+            logger.error("Interaction retention: failed to create partition %s: %s", name, e)
+            continue
+        if moved:
+            logger.warning("Interaction retention: moved %d rows from the default partition to %s", moved, name)
+        created.append(name)
+    return created
+
+
+async def drop_expired_partitions(engine: AsyncEngine, cutoff: date) -> Tuple[List[str], int]:
+    """Отсоединяет и удаляет партиции, целиком лежащие до cutoff.
+
+    DROP партиции не зависит от числа строк в ней, в отличие от DELETE.
+    Каждая партиция - в своей короткой транзакции с lock_timeout, чтобы
+    не задерживать вставки надолго.
+    """
+    dropped: List[str] = []
+    rows_estimate = 0
+    async with engine.connect() as conn:
+        partitions = await list_partitions(conn)
+    for name, month in partitions:
+        if add_months(month, 1) > cutoff:
+            break
+        async with engine.begin() as conn:
+            await conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+            reltuples = (await conn.execute(
+                text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"), {"name": name}
+            )).scalar()
+            await conn.execute(text(f"ALTER TABLE interaction DETACH PARTITION {name}"))
+            await conn.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+        rows_estimate += max(int(reltuples or 0), 0)
+    return dropped, rows_estimate
+
+
+async def delete_expired_rows(engine: AsyncEngine, cutoff: date, batch_size: int) -> int:
+    """Удаляет строки старше cutoff пачками по batch_size, каждая пачка - отдельная транзакция.
+
+    Режим для таблицы без партиций (SQLite, база без миграций). На
+    PostgreSQL с партициями сюда попадают только строки из default-партиции.
+    """
+    cutoff_at = datetime.combine(cutoff, datetime.min.time())
+    return await purge_in_batches(engine, Interaction, (Interaction.created_at < cutoff_at,), batch_size)
+
+
+async def maintain_interaction_storage(
+    engine: AsyncEngine,
+    today: Optional[date] = None,
+    retention_months: Optional[int] = None,
+    months_ahead: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> RetentionReport:
+    """Готовит партиции на будущие месяцы и удаляет историю старше срока хранения."""
+    today = today or datetime.utcnow().date()
+    retention_months = settings.INTERACTION_RETENTION_MONTHS if retention_months is None else retention_months
+    months_ahead = settings.INTERACTION_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    batch_size = batch_size or settings.INTERACTION_RETENTION_BATCH_SIZE
+
+    report = RetentionReport()
+    async with engine.connect() as conn:
+        report.partitioned = await is_partitioned(conn)
+    if report.partitioned:
+        report.created_partitions = await ensure_partitions(engine, today, months_ahead)
+    if retention_months > 0:
+        cutoff = retention_cutoff(today, retention_months)
+        if report.partitioned:
+            report.dropped_partitions, report.dropped_rows_estimate = await drop_expired_partitions(engine, cutoff)
+        report.deleted_rows = await delete_expired_rows(engine, cutoff, batch_size)
+    logger.info(
+        "Interaction retention: partitioned=%s, created=%s, dropped=%s (~%d rows), deleted %d rows",
+        report.partitioned, report.created_partitions, report.dropped_partitions,
+        report.dropped_rows_estimate, report.deleted_rows,
+    )
+    return report
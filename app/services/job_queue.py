@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from aiogram import Bot
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter
+from sqlalchemy import event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import BackgroundJob, JobStatus
+from app.db.query_metrics import track_queries
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Bot, BackgroundJob], Awaitable[None]]
+
+# Реестр обработчиков: kind -> coroutine(bot, job)
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+# Будит воркеры сразу после коммита транзакции, поставившей задачу в этом
+# процессе (иначе - опрос БД)
+_job_enqueued = asyncio.Event()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers(session: Session) -> None:
+    if session.info.pop("jobs_enqueued", False):
+        _job_enqueued.set()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_enqueued(session: Session) -> None:
+    session.info.pop("jobs_enqueued", None)
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Регистрирует обработчик фоновой задачи указанного типа."""
+
+    def decorator(func: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = func
+        return func
+
+    return decorator
+
+
+async def enqueue_job(
+    session: AsyncSession,
+    kind: str,
+    chat_id: int,
+    payload: Optional[Dict[str, Any]] = None,
+    user_id: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+) -> BackgroundJob:
+    """Ставит задачу в очередь. Задача видна воркерам после коммита сессии.
+
+    payload["silent"] = True отключает сообщение пользователю об окончательной ошибке.
+    """
+    job = BackgroundJob(
+        user_id=user_id,
+        chat_id=chat_id,
+        kind=kind,
+        payload=payload or {},
+        status=JobStatus.pending,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        available_at=datetime.utcnow(),
+    )
+    session.add(job)
+    await session.flush()
+    # До коммита воркер задачу не увидит - будим его из after_commit
+    session.info["jobs_enqueued"] = True
+    return job
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Ошибки, после которых задачу имеет смысл повторить."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(
+        exc,
+        (httpx.TimeoutException, httpx.TransportError, TelegramNetworkError, TelegramRetryAfter, asyncio.TimeoutError),
+    )
+
+
+async def get_job_queue_stats(session: AsyncSession, since: Optional[datetime] = None) -> Dict[str, Any]:
+    """Сводка по очереди: количество задач по статусам и задержки выполнения."""
+    since = since or datetime.utcnow() - timedelta(hours=1)
+    counts = dict(
+        (await session.execute(
+            select(BackgroundJob.status, func.count()).group_by(BackgroundJob.status)
+        )).all()
+    )
+    finished = (await session.execute(
+        select(BackgroundJob.created_at, BackgroundJob.started_at, BackgroundJob.finished_at).where(
+            BackgroundJob.status == JobStatus.done,
+            BackgroundJob.finished_at >= since,
+        )
+    )).all()
+    waits = sorted((started - created).total_seconds() for created, started, _ in finished if started)
+    totals = sorted((done - created).total_seconds() for created, _, done in finished if done)
+
+    def _p95(values: List[float]) -> Optional[float]:
+        return values[min(len(values) - 1, int(len(values) * 0.95))] if values else None
+
+    return {
+        "counts": {status.value: counts.get(status, 0) for status in JobStatus},
+        "completed": len(finished),
+        "avg_wait_seconds": sum(waits) / len(waits) if waits else None,
+        "p95_wait_seconds": _p95(waits),
+        "avg_total_seconds": sum(totals) / len(totals) if totals else None,
+        "p95_total_seconds": _p95(totals),
+    }
+
+
+async def log_job_queue_stats(session: AsyncSession) -> Dict[str, Any]:
+    stats = await get_job_queue_stats(session)
+    logger.info("Job queue stats: %s", stats)
+    return stats
+
+
+class JobWorkerPool:
+    """Пул воркеров, выполняющих фоновые задачи из таблицы backgroundjob.
+
+    Задачи переживают перезапуск: задача, прерванная остановкой пула,
+    сразу возвращается в очередь, а "зависшие" задачи (running дольше
+    JOB_LEASE_SECONDS, например после падения процесса) возвращаются при
+    старте и затем периодически.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        session_factory: Callable[[], AsyncSession],
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+    ) -> None:
+        self.bot = bot
+        self.session_factory = session_factory
+        self.concurrency = concurrency or settings.JOB_WORKERS
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    async def start(self) -> None:
+        recovered = await self._recover_stale_jobs()
+        if recovered:
+            logger.info("Job queue: %d stale jobs returned to the queue", recovered)
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._recovery_loop()))
+        logger.info("Job queue: started %d workers", self.concurrency)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        _job_enqueued.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _recover_stale_jobs(self) -> int:
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+        async with self.session_factory() as session:  # type: ignore[misc]
+            result = await session.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.status == JobStatus.running, BackgroundJob.started_at < cutoff)
+                .values(status=JobStatus.pending, available_at=datetime.utcnow())
+            )
+            await session.commit()
+            return result.rowcount or 0
+
+    async def _recovery_loop(self) -> None:
+        """Периодически возвращает в очередь задачи с истекшей арендой."""
+        interval = max(settings.JOB_LEASE_SECONDS / 2, self.poll_interval)
+        while not self._stopping:
+            await asyncio.sleep(interval)
+            try:
+                recovered = await self._recover_stale_jobs()
+            except Exception as e:
+                logger.error("Job queue: failed to recover stale jobs: %s", e)
+                continue
+            if recovered:
+                logger.warning("Job queue: %d stale jobs returned to the queue", recovered)
+
+    async def _requeue_cancelled(self, job: BackgroundJob) -> None:
+        """Возвращает прерванную остановкой задачу в очередь, не засчитывая попытку."""
+        async with self.session_factory() as session:  # type: ignore[misc]
+            await session.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id == job.id, BackgroundJob.status == JobStatus.running)
+                .values(
+                    status=JobStatus.pending,
+                    attempts=BackgroundJob.attempts - 1,
+                    available_at=datetime.utcnow(),
+                )
+            )
+            await session.commit()
+
+    async def _worker(self, number: int) -> None:
+        while not self._stopping:
+            # Сбрасываем сигнал до выборки: задача, закоммиченная во время
+            # выборки, снова взведет его, и ожидание ниже сразу завершится
+            _job_enqueued.clear()
+            try:
+                job = await self._claim_next_job()
+            except Exception as e:
+                logger.error("Job worker %d: failed to claim job: %s", number, e)
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(_job_enqueued.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run_job(job)
+
+    async def _claim_next_job(self) -> Optional[BackgroundJob]:
+        """Атомарно забирает ближайшую готовую задачу (SKIP LOCKED на Postgres)."""
+        async with self.session_factory() as session:  # type: ignore[misc]
+            candidate_id = (await session.execute(
+                select(BackgroundJob.id)
+                .where(BackgroundJob.status == JobStatus.pending, BackgroundJob.available_at <= datetime.utcnow())
+                .order_by(BackgroundJob.available_at, BackgroundJob.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )).scalar_one_or_none()
+            if candidate_id is None:
+                await session.rollback()
+                return None
+            # Условный UPDATE защищает от гонки там, где SKIP LOCKED недоступен (SQLite)
+            claimed = await session.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id == candidate_id, BackgroundJob.status == JobStatus.pending)
+                .values(
+                    status=JobStatus.running,
+                    attempts=BackgroundJob.attempts + 1,
+                    started_at=datetime.utcnow(),
+                )
+            )
+            await session.commit()
+            if claimed.rowcount != 1:
+                return None
+            return await session.get(BackgroundJob, candidate_id)
+
+    async def _run_job(self, job: BackgroundJob) -> None:
+        handler = JOB_HANDLERS.get(job.kind)
+        started = time.monotonic()
+        wait_seconds = (job.started_at - job.created_at).total_seconds() if job.started_at else 0.0
+        if handler is None:
+            await self._finish(job, JobStatus.failed, error=f"Unknown job kind: {job.kind}")
+            logger.error("Job %d: no handler for kind %s", job.id, job.kind)
+            return
+        try:
+            with track_queries(f"job.{job.kind}"):
+                await handler(self.bot, job)
+        except asyncio.CancelledError:
+            # Остановка пула посреди задачи: без этого строка осталась бы running
+            # до истечения аренды, и пользователь не получил бы ответ
+            try:
+                await asyncio.shield(self._requeue_cancelled(job))
+            except Exception as e:
+                logger.error("Job %d (%s): failed to requeue after cancellation: %s", job.id, job.kind, e)
+            else:
+                logger.info("Job %d (%s) interrupted by shutdown, returned to the queue", job.id, job.kind)
+            raise
+        except Exception as e:
+            run_seconds = time.monotonic() - started
+            if is_transient_error(e) and job.attempts < job.max_attempts:
+                delay = settings.JOB_RETRY_BASE_DELAY * (2 ** (job.attempts - 1))
+                await self._finish(
+                    job, JobStatus.pending, error=str(e), available_at=datetime.utcnow() + timedelta(seconds=delay)
+                )
+                logger.warning(
+                    "Job %d (%s) attempt %d/%d failed after %.2fs, retry in %.0fs: %s",
+                    job.id, job.kind, job.attempts, job.max_attempts, run_seconds, delay, e,
+                )
+                return
+            await self._finish(job, JobStatus.failed, error=str(e))
+            logger.error("Job %d (%s) failed after %d attempts: %s", job.id, job.kind, job.attempts, e)
+            await self._notify_failure(job)
+            return
+        await self._finish(job, JobStatus.done)
+        logger.info(
+            "Job %d (%s) done: wait=%.2fs run=%.2fs attempts=%d",
+            job.id, job.kind, wait_seconds, time.monotonic() - started, job.attempts,
+        )
+
+    async def _finish(
+        self,
+        job: BackgroundJob,
+        status: JobStatus,
+        error: Optional[str] = None,
+        available_at: Optional[datetime] = None,
+    ) -> None:
+        values: Dict[str, Any] = {"status": status, "error": error}
+        if status == JobStatus.pending:
+            values["available_at"] = available_at or datetime.utcnow()
+        else:
+            values["finished_at"] = datetime.utcnow()
+        async with self.session_factory() as session:  # type: ignore[misc]
+            await session.execute(update(BackgroundJob).where(BackgroundJob.id == job.id).values(**values))
+            await session.commit()
+
+    async def _notify_failure(self, job: BackgroundJob) -> None:
+        # Фоновая подготовка (ночные планы и т.п.) - пользователь ничего не ждет
+        if job.payload.get("silent"):
+            return
+        try:
+            await self.bot.send_message(
+                job.chat_id,
+                "❌ Не удалось выполнить запрос к ИИ. Попробуйте позже.",
+            )
+        except Exception:
+            pass
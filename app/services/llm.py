@@ -1,17 +1,53 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import time
 import httpx
-from typing import Optional
+from typing import AsyncIterator, Awaitable, Callable, Optional
 
 from app.config import settings
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
 
 
-async def deepseek_complete(prompt: str, system: Optional[str] = None, max_tokens: int = 512) -> str:
-    """Call DeepSeek completion endpoint to generate helpful text."""
-    headers = {
+DEEPSEEK_CHAT_URL = f"{settings.DEEPSEEK_BASE_URL.rstrip('/')}/chat/completions"
+SSE_DONE = "[DONE]"
+
+# Общий предохранитель для всех обращений к DeepSeek
+deepseek_breaker = CircuitBreaker(
+    "deepseek",
+    failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.LLM_BREAKER_RESET_SECONDS,
+)
+
+
+class LLMUnavailableError(CircuitOpenError):
+    """ИИ временно недоступен - вызывающий код должен сразу перейти к резервному варианту."""
+
+
+def _is_service_failure(exc: BaseException) -> bool:
+    """Ошибки, говорящие о деградации сервиса (а не о некорректном запросе)."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(exc, (httpx.TimeoutException, httpx.TransportError))
+
+
+def _acquire_breaker() -> None:
+    try:
+        deepseek_breaker.before_call()
+    except CircuitOpenError as e:
+        raise LLMUnavailableError(e.name, e.retry_in) from None
+
+
+def _build_headers() -> dict:
+    return {
         "Authorization": f"Bearer {settings.DEEPSEEK_API_KEY}",
         "Content-Type": "application/json",
     }
+
+
+def _build_payload(prompt: str, system: Optional[str], max_tokens: int, stream: bool = False) -> dict:
     payload = {
         "model": "deepseek-chat",
         "messages": ([{"role": "system", "content": system}] if system else [])
@@ -19,14 +55,124 @@ async def deepseek_complete(prompt: str, system: Optional[str] = None, max_token
         "max_tokens": max_tokens,
         "temperature": 0.7,
     }
-    async with httpx.AsyncClient(timeout=120) as client:  # Увеличиваем таймаут до 2 минут
-        r = await client.post("https://api.deepseek.com/chat/completions", headers=headers, json=payload)
-        r.raise_for_status()
-        data = r.json()
-        return data["choices"][0]["message"]["content"].strip()
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+async def _request_completion(payload: dict) -> str:
+    """Один запрос к DeepSeek с учетом результата в предохранителе."""
+    started = time.monotonic()
+    try:
+        async with httpx.AsyncClient(timeout=settings.LLM_TIMEOUT) as client:
+            r = await client.post(DEEPSEEK_CHAT_URL, headers=_build_headers(), json=payload)
+            r.raise_for_status()
+            data = r.json()
+            content = data["choices"][0]["message"]["content"].strip()
+    except Exception as e:
+        if _is_service_failure(e):
+            deepseek_breaker.record_failure()
+        else:
+            deepseek_breaker.release()
+        raise
+    except asyncio.CancelledError:
+        deepseek_breaker.release()
+        raise
+    deepseek_breaker.record_success(time.monotonic() - started)
+    return content
+
+
+async def _hedged(request: Callable[[], Awaitable[str]], delay: float) -> str:
+    """Запускает второй такой же запрос, если первый не уложился в delay секунд.
+
+    Возвращает первый успешный ответ, оставшийся запрос отменяется.
+    """
+    first = asyncio.ensure_future(request())
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done:
+        return first.result()
+    pending = {first, asyncio.ensure_future(request())}
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error  # type: ignore[misc]
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def deepseek_complete(
+    prompt: str, system: Optional[str] = None, max_tokens: int = 512, hedge: bool = False
+) -> str:
+    """Call DeepSeek completion endpoint to generate helpful text.
+
+    При разомкнутом предохранителе сразу бросает LLMUnavailableError.
+    ``hedge=True`` (для интерактивных запросов) дублирует запрос, если
+    ответ задерживается дольше p95 последних вызовов.
+    """
+    _acquire_breaker()
+    payload = _build_payload(prompt, system, max_tokens)
+    hedge_delay = deepseek_breaker.latency_percentile(0.95) if hedge and settings.LLM_HEDGE_ENABLED else None
+    if hedge_delay is None:
+        return await _request_completion(payload)
+    return await _hedged(lambda: _request_completion(payload), hedge_delay)
+
 
+def _parse_sse_line(line: str) -> Optional[str]:
+    """Извлекает полезную нагрузку из строки server-sent events.
 
+    Возвращает None для служебных строк (пустые, комментарии, keep-alive).
+    """
+    if not line or not line.startswith("data:"):
+        return None
+    return line[len("data:"):].strip()
 
 
+def _extract_delta(data: str) -> str:
+    """Достает текстовый фрагмент из JSON-чанка потокового ответа."""
+    try:
+        chunk = json.loads(data)
+    except json.JSONDecodeError:
+        return ""
+    choices = chunk.get("choices") or []
+    if not choices:
+        return ""
+    delta = choices[0].get("delta") or {}
+    return delta.get("content") or ""
 
 
+async def deepseek_stream(prompt: str, system: Optional[str] = None, max_tokens: int = 512) -> AsyncIterator[str]:
+    """Stream DeepSeek completion as text fragments (server-sent events)."""
+    _acquire_breaker()
+    headers = _build_headers()
+    payload = _build_payload(prompt, system, max_tokens, stream=True)
+    try:
+        async with httpx.AsyncClient(timeout=settings.LLM_TIMEOUT) as client:
+            async with client.stream("POST", DEEPSEEK_CHAT_URL, headers=headers, json=payload) as r:
+                r.raise_for_status()
+                async for line in r.aiter_lines():
+                    data = _parse_sse_line(line)
+                    if data is None:
+                        continue
+                    if data == SSE_DONE:
+                        break
+                    piece = _extract_delta(data)
+                    if piece:
+                        yield piece
+    except Exception as e:
+        if _is_service_failure(e):
+            deepseek_breaker.record_failure()
+        else:
+            deepseek_breaker.release()
+        raise
+    except BaseException:
+        # Потребитель прервал чтение потока (отмена/закрытие генератора)
+        deepseek_breaker.release()
+        raise
+    # Длительность потока зависит от объема ответа - в окно задержек ее не пишем
+    deepseek_breaker.record_success(None)
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Iterable, List, Optional, Union
+
+# Грубая оценка для DeepSeek: в смешанном русско-английском тексте ~3 символа на токен
+CHARS_PER_TOKEN = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """Оценка числа токенов без токенизатора (с запасом для кириллицы)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def compact_text(value: Optional[str], max_chars: int = 200) -> str:
+    """Схлопывает пробелы/переносы и обрезает текст по границе слова."""
+    if not value:
+        return ""
+    text = re.sub(r"\s+", " ", str(value)).strip()
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[:cut if cut > max_chars // 2 else max_chars].rstrip(" ,.;:") + "…"
+
+
+def format_amount(value: Union[int, float, Decimal, None]) -> str:
+    """Сумма без копеек и Decimal-repr: 12 345 ₽."""
+    return f"{float(value or 0):,.0f}".replace(",", " ") + " ₽"
+
+
+@dataclass
+class ContextSection:
+    title: str
+    lines: List[str]
+    priority: int = 0
+    min_lines: int = 0
+    dropped: int = 0
+
+    def render(self) -> str:
+        body = "\n".join(f"  • {line}" for line in self.lines)
+        more = f"\n  • … и еще {self.dropped}" if self.dropped else ""
+        if not self.title:
+            return "\n".join(self.lines)
+        return f"{self.title}\n{body}{more}" if self.lines else ""
+
+
+@dataclass
+class ContextBuilder:
+    """Собирает контекст промпта из секций с приоритетами под бюджет токенов.
+
+    Строки внутри секции добавляются по убыванию важности и дедуплицируются.
+    Если контекст не помещается в ``budget_tokens``, строки по одной убираются
+    с конца секций с наименьшим приоритетом, пока в секции не останется
+    ``min_lines`` (вместо убранных выводится "… и еще N"). Целиком пропадает
+    только секция с ``min_lines=0``, у которой убраны все строки. Если и после
+    этого бюджет превышен, текст обрезается по длине. Секции выводятся в
+    порядке добавления.
+    """
+
+    budget_tokens: int
+    sections: List[ContextSection] = field(default_factory=list)
+
+    def add(
+        self,
+        title: str,
+        lines: Iterable[str],
+        priority: int = 0,
+        min_lines: int = 0,
+        max_line_chars: int = 200,
+    ) -> "ContextBuilder":
+        seen = set()
+        unique: List[str] = []
+        for line in lines:
+            line = compact_text(line, max_line_chars)
+            key = line.casefold()
+            if line and key not in seen:
+                seen.add(key)
+                unique.append(line)
+        if unique:
+            self.sections.append(ContextSection(title, unique, priority, min_lines))
+        return self
+
+    def add_text(self, text: str, priority: int = 0, max_chars: int = 600) -> "ContextBuilder":
+        """Секция из одной строки без заголовка (например, ответ пользователя)."""
+        return self.add("", [text], priority=priority, min_lines=1, max_line_chars=max_chars)
+
+    def render(self) -> str:
+        return "\n".join(part for part in (s.render() for s in self.sections) if part)
+
+    def build(self) -> str:
+        text = self.render()
+        while estimate_tokens(text) > self.budget_tokens:
+            if not self._trim_once():
+                # Урезать по секциям больше нечего - обрезаем текст по бюджету
+                return text[: self.budget_tokens * CHARS_PER_TOKEN].rstrip() + "…"
+            text = self.render()
+        return text
+
+    def _trim_once(self) -> bool:
+        for section in sorted(self.sections, key=lambda s: s.priority):
+            if len(section.lines) > section.min_lines:
+                section.lines.pop()
+                section.dropped += 1
+                if not section.lines:
+                    self.sections.remove(section)
+                return True
+        return False
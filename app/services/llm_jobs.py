@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import select, update
+
+from aiogram import Bot
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from app.db.models import BackgroundJob, CookingSession
+from app.db.session import session_scope
+from app.keyboards.common import back_main_menu
+from app.services.job_queue import job_handler
+from app.services.gladiator_punishments import generate_gladiator_punishment
+from app.services.llm import deepseek_complete
+
+
+COOKING_PLAN_JOB = "cooking_plan"
+COOKING_PLAN_PREPARE_JOB = "cooking_plan_prepare"
+PERFECT_DAY_PLAN_JOB = "perfect_day_plan"
+GLADIATOR_PUNISHMENT_JOB = "gladiator_punishment"
+
+
+def arena_punishment_keyboard() -> InlineKeyboardMarkup:
+    """Клавиатура действий под приговором арены"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="⚔️ Принять наказание", callback_data="accept_punishment"),
+            InlineKeyboardButton(text="🛡️ Исправить дела", callback_data="fix_overdue_items")
+        ],
+        [
+            InlineKeyboardButton(text="📊 Детальный анализ", callback_data="overdue_analysis")
+        ]
+    ])
+
+
+async def _edit_or_send(bot: Bot, job: BackgroundJob, text: str, **kwargs) -> None:
+    """Заменяет сообщение-индикатор результатом, либо отправляет новое сообщение."""
+    message_id = job.payload.get("message_id")
+    if message_id:
+        try:
+            await bot.edit_message_text(text, chat_id=job.chat_id, message_id=message_id, **kwargs)
+            return
+        except Exception:
+            pass
+    await bot.send_message(job.chat_id, text, **kwargs)
+
+
+def _job_progress_update(job: BackgroundJob, **progress):
+    """UPDATE, запоминающий в payload задачи уже выполненные шаги: повтор продолжит с них"""
+    job.payload = {**job.payload, **progress}
+    return update(BackgroundJob).where(BackgroundJob.id == job.id).values(payload=job.payload)
+
+
+@job_handler(COOKING_PLAN_JOB)
+async def run_cooking_plan_job(bot: Bot, job: BackgroundJob) -> None:
+    """Генерирует план готовки и отправляет его пользователю.
+
+    Повтор после ошибки не создает вторую CookingSession и не отправляет уже
+    доставленные сообщения: id сессии и число отправленных сообщений хранятся
+    в payload задачи.
+    """
+    from app.services.cooking_plan_cache import get_cooking_plan, get_cooking_plan_params
+    from app.services.nutrition_reminders import _convert_markdown_to_html, _split_into_multiple_messages
+
+    cooking_session_id = job.payload.get("cooking_session_id")
+    if cooking_session_id is None:
+        # Короткая транзакция только на чтение настроек - соединение не держим во время запроса к ИИ
+        async with session_scope() as session:
+            budget_info = await get_cooking_plan_params(session, job.user_id)
+
+        plan_text = await get_cooking_plan(budget_info, job.user_id)
+        budget_text = f" (бюджет: {budget_info['description']})" if budget_info and budget_info["type"] else ""
+
+        # Сессия готовки и отметка о ней в задаче фиксируются одной транзакцией
+        async with session_scope() as session:
+            cooking_session = CookingSession(user_id=job.user_id, cooking_date=date.today(), instructions=plan_text)
+            session.add(cooking_session)
+            await session.flush()
+            await session.execute(_job_progress_update(
+                job, cooking_session_id=cooking_session.id, budget_text=budget_text, sent_messages=0
+            ))
+    else:
+        async with session_scope() as session:
+            plan_text = (await session.execute(
+                select(CookingSession.instructions).where(CookingSession.id == cooking_session_id)
+            )).scalar_one()
+        budget_text = job.payload.get("budget_text", "")
+
+    parts = _split_into_multiple_messages(_convert_markdown_to_html(plan_text))
+    for index in range(job.payload.get("sent_messages", 0), len(parts) + 1):
+        if index == 0:
+            await _edit_or_send(
+                bot, job, f"👨‍🍳 План готовки на 2 дня{budget_text}:", reply_markup=back_main_menu(), parse_mode="HTML"
+            )
+        else:
+            await bot.send_message(job.chat_id, parts[index - 1], parse_mode="HTML")
+        async with session_scope() as session:
+            await session.execute(_job_progress_update(job, sent_messages=index + 1))
+
+
+@job_handler(COOKING_PLAN_PREPARE_JOB)
+async def run_cooking_plan_prepare_job(bot: Bot, job: BackgroundJob) -> None:
+    """Заранее готовит план к напоминанию о готовке: сохраняет его, ничего не отправляя"""
+    from app.services.cooking_plan_cache import get_cooking_plan, get_cooking_plan_params
+
+    cooking_date = date.fromisoformat(job.payload["cooking_date"])
+    async with session_scope() as session:
+        budget_info = await get_cooking_plan_params(session, job.user_id)
+
+    plan_text = await get_cooking_plan(budget_info, job.user_id)
+
+    async with session_scope() as session:
+        exists = (await session.execute(
+            select(CookingSession.id).where(
+                CookingSession.user_id == job.user_id, CookingSession.cooking_date == cooking_date
+            ).limit(1)
+        )).scalar_one_or_none()
+        if exists is None:
+            session.add(CookingSession(user_id=job.user_id, cooking_date=cooking_date, instructions=plan_text))
+
+
+@job_handler(PERFECT_DAY_PLAN_JOB)
+async def run_perfect_day_plan_job(bot: Bot, job: BackgroundJob) -> None:
+    """Ночная подготовка плана идеального дня по снимку задач пользователя"""
+    from app.services.daily_reminders import (
+        build_perfect_day_prompt,
+        get_prepared_perfect_day_plan,
+        perfect_day_context_hash,
+        save_perfect_day_plan,
+        PERFECT_DAY_MAX_TOKENS,
+    )
+
+    plan_date = date.fromisoformat(job.payload["plan_date"])
+    async with session_scope() as session:
+        context_hash = await perfect_day_context_hash(session, job.user_id, plan_date)
+        if await get_prepared_perfect_day_plan(session, job.user_id, plan_date, context_hash):
+            return
+        prompt = await build_perfect_day_prompt(job.user_id, session, day=plan_date)
+
+    plan = await deepseek_complete(prompt, max_tokens=PERFECT_DAY_MAX_TOKENS)
+
+    async with session_scope() as session:
+        await save_perfect_day_plan(session, job.user_id, plan_date, context_hash, plan)
+
+
+@job_handler(GLADIATOR_PUNISHMENT_JOB)
+async def run_gladiator_punishment_job(bot: Bot, job: BackgroundJob) -> None:
+    """Генерирует наказание арены и заменяет им сообщение о проверке"""
+    punishment = await generate_gladiator_punishment(
+        overdue_goals=job.payload.get("overdue_goals", []),
+        overdue_todos=job.payload.get("overdue_todos", []),
+    )
+    await _edit_or_send(
+        bot,
+        job,
+        f"⚔️ <b>ПРИГОВОР АРЕНЫ ВЫНЕСЕН!</b>\n\n{punishment}",
+        reply_markup=arena_punishment_keyboard(),
+        parse_mode="HTML",
+    )
@@ -1,10 +1,32 @@
 from __future__ import annotations
 
-from app.services.llm import deepseek_complete
+from typing import Optional, Tuple
+
+from app.services.llm import LLMUnavailableError, deepseek_complete
+
+
+class CookingPlanUnavailable(Exception):
+    """ИИ не дал пригодного плана; reason - текст для резервного плана."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
 
 
 async def generate_cooking_plan(budget_info: dict = None) -> str:
     """Генерирует план готовки на 2 дня с помощью ИИ"""
+    try:
+        return await request_cooking_plan(budget_info)
+    except CookingPlanUnavailable as e:
+        return generate_fallback_plan(budget_info, e.reason)
+
+
+def build_cooking_plan_prompt(budget_info: dict = None, variant: Optional[int] = None) -> Tuple[str, str]:
+    """Собирает (system, prompt) запроса плана готовки.
+
+    variant - номер варианта меню для кеша планов: разные номера просят у ИИ
+    разные блюда при одинаковых параметрах.
+    """
     # Формируем системный промпт с учетом бюджета
     budget_context = ""
     if budget_info and budget_info["type"]:
@@ -67,8 +89,15 @@ async def generate_cooking_plan(budget_info: dict = None) -> str:
         prompt_parts.append(f"Целевые калории: {budget_info['target_calories']} в день.")
     
     prompt_parts.append("Формат: Покупки с ценами, Инструкции, Калории/день.")
+    if variant:
+        prompt_parts.append(f"Вариант меню №{variant + 1}: выбери блюда, отличные от самых типовых.")
     
-    prompt = " ".join(prompt_parts)
+    return system, " ".join(prompt_parts)
+
+
+async def request_cooking_plan(budget_info: dict = None, variant: Optional[int] = None) -> str:
+    """Запрашивает план у ИИ; при ошибке или неполном ответе бросает CookingPlanUnavailable."""
+    system, prompt = build_cooking_plan_prompt(budget_info, variant)
     
     try:
         print(f"DEBUG: Отправляю запрос к ИИ с prompt='{prompt[:100]}...' и system='{system[:100]}...'")
@@ -76,30 +105,9 @@ async def generate_cooking_plan(budget_info: dict = None) -> str:
         
         # Сразу используем максимальные параметры для получения полного плана
         result = await deepseek_complete(prompt, system=system, max_tokens=5000)
-        
-        print(f"DEBUG: Получен ответ от ИИ длиной {len(result) if result else 0}")
-        
-        if result and len(result.strip()) > 100:
-            # Проверяем качество ответа
-            quality_score = check_response_quality(result)
-            print(f"DEBUG: Качество ответа: {quality_score}/100")
-            
-            if quality_score >= 70:
-                print(f"DEBUG: Успешно получили качественный план от ИИ")
-                print(f"DEBUG: Первые 200 символов ответа: {result[:200]}...")
-                print(f"DEBUG: Последние 200 символов ответа: ...{result[-200:]}")
-                print(f"DEBUG: Полный ответ от ИИ:")
-                print("=" * 80)
-                print(result)
-                print("=" * 80)
-                return result
-            else:
-                print(f"DEBUG: Ответ неполный (качество {quality_score}/100), используем резервный план")
-                return generate_fallback_plan(budget_info, "Ответ от ИИ неполный")
-        else:
-            print(f"DEBUG: Получен пустой или слишком короткий ответ от ИИ")
-            return generate_fallback_plan(budget_info, "Пустой ответ от ИИ")
-            
+    except LLMUnavailableError:
+        # Предохранитель разомкнут - не ждем таймаута, сразу отдаем резервный план
+        raise CookingPlanUnavailable("ИИ временно недоступен")
     except Exception as e:
         error_msg = str(e)
         print(f"DEBUG: Ошибка при обращении к ИИ: {error_msg}")
@@ -107,13 +115,32 @@ async def generate_cooking_plan(budget_info: dict = None) -> str:
         # Проверяем тип ошибки
         if "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
             print(f"DEBUG: Обнаружен таймаут, используем резервный план")
-            return generate_fallback_plan(budget_info, "Превышено время ожидания ответа от ИИ")
+            raise CookingPlanUnavailable("Превышено время ожидания ответа от ИИ")
         elif "rate limit" in error_msg.lower() or "429" in error_msg:
             print(f"DEBUG: Обнаружен rate limit, используем резервный план")
-            return generate_fallback_plan(budget_info, "Превышен лимит запросов к ИИ")
+            raise CookingPlanUnavailable("Превышен лимит запросов к ИИ")
         else:
             print(f"DEBUG: Неизвестная ошибка, используем резервный план")
-            return generate_fallback_plan(budget_info, f"Ошибка ИИ: {error_msg}")
+            raise CookingPlanUnavailable(f"Ошибка ИИ: {error_msg}")
+    
+    print(f"DEBUG: Получен ответ от ИИ длиной {len(result) if result else 0}")
+    
+    if not result or len(result.strip()) <= 100:
+        print(f"DEBUG: Получен пустой или слишком короткий ответ от ИИ")
+        raise CookingPlanUnavailable("Пустой ответ от ИИ")
+    
+    # Проверяем качество ответа
+    quality_score = check_response_quality(result)
+    print(f"DEBUG: Качество ответа: {quality_score}/100")
+    
+    if quality_score < 70:
+        print(f"DEBUG: Ответ неполный (качество {quality_score}/100), используем резервный план")
+        raise CookingPlanUnavailable("Ответ от ИИ неполный")
+    
+    print(f"DEBUG: Успешно получили качественный план от ИИ")
+    print(f"DEBUG: Первые 200 символов ответа: {result[:200]}...")
+    print(f"DEBUG: Последние 200 символов ответа: ...{result[-200:]}")
+    return result
 
 
 def check_response_quality(text: str) -> int:
@@ -12,6 +12,9 @@ from app.db.models import User, NutritionReminder, CookingSession
 from app.services.llm import deepseek_complete
 
 
+_WEEKDAY_NAMES = {"sunday", "wednesday", "monday", "tuesday", "thursday", "friday", "saturday"}
+
+
 def _weekday_str_to_int(name: str) -> int:
     # Monday=0 ... Sunday=6
     mapping = {
@@ -65,35 +68,26 @@ async def send_cooking_day_reminders(bot: Bot, session: AsyncSession, user_id: i
         if user_now.strftime("%H:%M") != rem.reminder_time:
             continue
         
-        # Генерируем план питания с помощью ИИ
+        # План заранее готовит фоновая задача (за COOKING_PLAN_LEAD_MINUTES до напоминания)
         try:
-            # Получаем информацию о бюджете питания пользователя
+            prepared = (await session.execute(
+                select(CookingSession)
+                .where(CookingSession.user_id == user.id, CookingSession.cooking_date == user_now.date())
+                .order_by(CookingSession.id.desc())
+                .limit(1)
+            )).scalar_one_or_none()
+            if prepared is None or not prepared.instructions:
+                # Заготовки нет - генерацию с отправкой отдаем воркерам, тик планировщика не блокируем
+                from app.services.job_queue import enqueue_job
+                from app.services.llm_jobs import COOKING_PLAN_JOB
+                await enqueue_job(session, COOKING_PLAN_JOB, chat_id=user.telegram_id, user_id=user.id)
+                await session.commit()
+                continue
+            plan_text = prepared.instructions
+            
             from app.handlers.nutrition_budget import get_user_food_budget
             budget_info = await get_user_food_budget(session, user.id)
             
-            # Добавляем информацию о целях пользователя к budget_info
-            if rem.body_goal:
-                budget_info = budget_info or {}
-                budget_info["body_goal"] = rem.body_goal
-            if rem.target_calories:
-                budget_info = budget_info or {}
-                budget_info["target_calories"] = rem.target_calories
-            
-            # Генерируем план питания
-            from app.services.nutrition_plan_generator import generate_cooking_plan, generate_fallback_plan
-            try:
-                plan_text = await generate_cooking_plan(budget_info)
-                if not plan_text or len(plan_text.strip()) < 10:
-                    plan_text = generate_fallback_plan(budget_info, "Пустой ответ от ИИ")
-            except Exception as e:
-                plan_text = generate_fallback_plan(budget_info, str(e))
-            
-            # Сохраняем в базу
-            from app.db.models import CookingSession
-            from datetime import date
-            session.add(CookingSession(user_id=user.id, cooking_date=date.today(), instructions=plan_text))
-            await session.commit()
-            
             # Отправляем заголовок с информацией о бюджете
             budget_text = f" (бюджет: {budget_info['description']})" if budget_info and budget_info["type"] else ""
             header_text = f"👨‍🍳 План готовки на 2 дня{budget_text}:"
@@ -117,6 +111,77 @@ async def send_cooking_day_reminders(bot: Bot, session: AsyncSession, user_id: i
                 continue
 
 
+def _is_cooking_day(rem: NutritionReminder, weekday: int) -> bool:
+    days = [d.strip().lower() for d in (rem.cooking_days or "").split(",") if d.strip()]
+    return weekday in [_weekday_str_to_int(d) for d in days if d in _WEEKDAY_NAMES]
+
+
+async def schedule_cooking_plan_pregeneration(session: AsyncSession, now_utc: datetime | None = None) -> int:
+    """Ставит в очередь подготовку плана для тех, у кого сегодня день готовки.
+
+    Окно - COOKING_PLAN_LEAD_MINUTES до reminder_time по местному времени
+    пользователя; пользователи с уже готовым планом или задачей в очереди
+    пропускаются. Возвращает число поставленных задач.
+    """
+    from app.db.models import BackgroundJob, JobStatus
+    from app.services.job_queue import enqueue_job
+    from app.services.llm_jobs import COOKING_PLAN_PREPARE_JOB
+
+    now_utc = now_utc or datetime.now(timezone.utc)
+    lead = timedelta(minutes=settings.COOKING_PLAN_LEAD_MINUTES)
+    rows = (await session.execute(
+        select(User, NutritionReminder)
+        .join(NutritionReminder, NutritionReminder.user_id == User.id)
+        .where(NutritionReminder.is_active.is_(True))
+    )).all()
+
+    candidates = {}
+    for user, rem in rows:
+        try:
+            user_now = now_utc.astimezone(ZoneInfo(user.timezone or settings.DEFAULT_TIMEZONE))
+        except Exception:
+            user_now = now_utc.astimezone(ZoneInfo(settings.DEFAULT_TIMEZONE))
+        if not _is_cooking_day(rem, user_now.weekday()):
+            continue
+        try:
+            hour, minute = (int(part) for part in rem.reminder_time.split(":"))
+        except (AttributeError, ValueError):
+            continue
+        remind_at = user_now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if remind_at - lead <= user_now < remind_at:
+            candidates[user.id] = (user, user_now.date())
+    if not candidates:
+        return 0
+
+    prepared = set((await session.execute(
+        select(CookingSession.user_id, CookingSession.cooking_date).where(
+            CookingSession.user_id.in_(candidates.keys()),
+            CookingSession.cooking_date.in_({day for _, day in candidates.values()}),
+        )
+    )).all())
+    queued = set((await session.execute(
+        select(BackgroundJob.user_id).where(
+            BackgroundJob.kind == COOKING_PLAN_PREPARE_JOB,
+            BackgroundJob.status.in_([JobStatus.pending, JobStatus.running]),
+            BackgroundJob.user_id.in_(candidates.keys()),
+        )
+    )).scalars().all())
+
+    scheduled = 0
+    for user_id, (user, cooking_date) in candidates.items():
+        if (user_id, cooking_date) in prepared or user_id in queued:
+            continue
+        await enqueue_job(
+            session,
+            COOKING_PLAN_PREPARE_JOB,
+            chat_id=user.telegram_id,
+            user_id=user_id,
+            payload={"cooking_date": cooking_date.isoformat(), "silent": True},
+        )
+        scheduled += 1
+    return scheduled
+
+
 async def send_shopping_day_reminders(bot: Bot, session: AsyncSession, user_id: int = None) -> None:
     now_utc = datetime.now(timezone.utc)
     if user_id:
@@ -159,26 +224,10 @@ async def send_shopping_day_reminders(bot: Bot, session: AsyncSession, user_id:
             continue
         # Generate shopping list and calories using AI
         try:
-            # Получаем информацию о бюджете питания пользователя
-            from app.handlers.nutrition_budget import get_user_food_budget
-            budget_info = await get_user_food_budget(session, user.id)
-            
-            # Добавляем информацию о целях пользователя к budget_info
-            if rem.body_goal:
-                budget_info = budget_info or {}
-                budget_info["body_goal"] = rem.body_goal
-            if rem.target_calories:
-                budget_info = budget_info or {}
-                budget_info["target_calories"] = rem.target_calories
-            
-            # Используем тот же генератор планов для консистентности
-            from app.services.nutrition_plan_generator import generate_cooking_plan, generate_fallback_plan
-            try:
-                ai_text = await generate_cooking_plan(budget_info)
-                if not ai_text or len(ai_text.strip()) < 10:
-                    ai_text = generate_fallback_plan(budget_info, "Пустой ответ от ИИ")
-            except Exception as e:
-                ai_text = generate_fallback_plan(budget_info, str(e))
+            # Используем тот же кеш планов, что и напоминание о готовке - список покупок совпадет с планом
+            from app.services.cooking_plan_cache import get_cooking_plan, get_cooking_plan_params
+            budget_info = await get_cooking_plan_params(session, user.id, rem)
+            ai_text = await get_cooking_plan(budget_info, user.id)
         except Exception as e:
             ai_text = f"Не удалось получить список покупок от ИИ: {e}"
         try:
@@ -4,11 +4,11 @@ from datetime import date, datetime, timedelta, timezone
 from typing import List
 from zoneinfo import ZoneInfo
 
-from sqlalchemy import select, and_
+from sqlalchemy import delete, select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.db.models import User, Todo, NutritionReminder
+from app.db.models import User, Todo, TodoOrigin, NutritionReminder, NUTRITION_TODO_ORIGINS
 
 
 def _weekday_str_to_int(name: str) -> int:
@@ -56,22 +56,22 @@ async def create_nutrition_todos_for_user(session: AsyncSession, user_id: int) -
         cooking_weekdays = [_weekday_str_to_int(d) for d in days if d in {"sunday", "wednesday", "monday", "tuesday", "thursday", "friday", "saturday"}]
         
         # Проверяем, есть ли уже задачи на сегодня
-        existing_todos = await session.execute(
-            select(Todo).where(
-                and_(
-                    Todo.user_id == user_id,
-                    Todo.due_date == today,
-                    Todo.description.like("Задача питания:%")
+        existing_origins = set(
+            (await session.execute(
+                select(Todo.origin).where(
+                    and_(
+                        Todo.user_id == user_id,
+                        Todo.origin.in_(NUTRITION_TODO_ORIGINS),
+                        Todo.due_date == today
+                    )
                 )
-            )
+            )).scalars().all()
         )
-        existing_todos_list = existing_todos.scalars().all()
-        existing_titles = [todo.title for todo in existing_todos_list]
         
         # Создаем задачи для времени готовки
         if user_now.weekday() in cooking_weekdays:
             cooking_task_title = f"👨‍🍳 Готовка в {nutrition_reminder.cooking_time}"
-            if cooking_task_title not in existing_titles:
+            if TodoOrigin.nutrition_cooking not in existing_origins:
                 todo = Todo(
                     user_id=user_id,
                     title=cooking_task_title,
@@ -81,7 +81,9 @@ async def create_nutrition_todos_for_user(session: AsyncSession, user_id: int) -
                     is_daily=False,
                     is_completed=False,
                     reminder_time=nutrition_reminder.cooking_time,
-                    is_reminder_active=True
+                    is_reminder_active=True,
+                    origin=TodoOrigin.nutrition_cooking,
+                    origin_ref_id=nutrition_reminder.id
                 )
                 session.add(todo)
                 tasks_created += 1
@@ -93,7 +95,7 @@ async def create_nutrition_todos_for_user(session: AsyncSession, user_id: int) -
         
         if tomorrow_weekday in cooking_weekdays:
             shopping_task_title = f"🛒 Покупки в {nutrition_reminder.shopping_reminder_time}"
-            if shopping_task_title not in existing_titles:
+            if TodoOrigin.nutrition_shopping not in existing_origins:
                 todo = Todo(
                     user_id=user_id,
                     title=shopping_task_title,
@@ -103,7 +105,9 @@ async def create_nutrition_todos_for_user(session: AsyncSession, user_id: int) -
                     is_daily=False,
                     is_completed=False,
                     reminder_time=nutrition_reminder.shopping_reminder_time,
-                    is_reminder_active=True
+                    is_reminder_active=True,
+                    origin=TodoOrigin.nutrition_shopping,
+                    origin_ref_id=nutrition_reminder.id
                 )
                 session.add(todo)
                 tasks_created += 1
@@ -134,32 +138,28 @@ async def create_nutrition_todos_for_all_users(session: AsyncSession) -> None:
 
 async def cleanup_old_nutrition_todos(session: AsyncSession, user_id: int) -> None:
     """
-    Удаляет старые задачи питания (старше 3 дней).
+    Удаляет старые выполненные задачи питания (старше 3 дней).
     """
     try:
-        today = date.today()
-        three_days_ago = today - timedelta(days=3)
+        three_days_ago = date.today() - timedelta(days=3)
         
-        # Удаляем старые задачи питания
-        old_todos = await session.execute(
-            select(Todo)
+        # Один DELETE вместо загрузки и удаления задач по одной
+        result = await session.execute(
+            delete(Todo)
             .where(
                 and_(
                     Todo.user_id == user_id,
+                    Todo.origin.in_(NUTRITION_TODO_ORIGINS),
                     Todo.due_date < three_days_ago,
-                    Todo.description.like("Задача питания:%"),
                     Todo.is_completed == True  # Удаляем только выполненные
                 )
             )
+            .execution_options(synchronize_session=False)
         )
-        old_todos_list = old_todos.scalars().all()
-        
-        for todo in old_todos_list:
-            await session.delete(todo)
         
-        if old_todos_list:
+        if result.rowcount:
             await session.commit()
-            print(f"🗑️ Удалено {len(old_todos_list)} старых задач питания пользователя {user_id}")
+            print(f"🗑️ Удалено {result.rowcount} старых задач питания пользователя {user_id}")
         
     except Exception as e:
         print(f"❌ Ошибка при очистке старых задач питания: {e}")
@@ -175,7 +175,7 @@ async def get_nutrition_todos_for_user(session: AsyncSession, user_id: int) -> L
             .where(
                 and_(
                     Todo.user_id == user_id,
-                    Todo.description.like("Задача питания:%")
+                    Todo.origin.in_(NUTRITION_TODO_ORIGINS)
                 )
             )
             .order_by(Todo.due_date.desc())
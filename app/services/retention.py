@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import ColumnElement
+
+from app.config import settings
+from app.db.models import (
+    CookingSession,
+    FINANCE_TODO_ORIGINS,
+    NUTRITION_TODO_ORIGINS,
+    Todo,
+    TodoOrigin,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Правило хранения для одной сущности.
+
+    Строки, у которых date_column раньше чем keep_days назад и выполнены
+    условия where, удаляются. Если задан compact - строка остается, а
+    перечисленные колонки обнуляются (тяжелые тексты от ИИ).
+    """
+    name: str
+    model: Any
+    date_column: Any
+    keep_days: int
+    where: Tuple[ColumnElement, ...] = ()
+    compact: Tuple[str, ...] = field(default=())
+
+    def cutoff(self, today: date) -> Any:
+        cutoff = today - timedelta(days=self.keep_days)
+        if self.date_column.type.python_type is datetime:
+            return datetime.combine(cutoff, datetime.min.time())
+        return cutoff
+
+    def conditions(self, today: date) -> Tuple[ColumnElement, ...]:
+        conditions = (self.date_column < self.cutoff(today), *self.where)
+        if self.compact:
+            # Уже сжатые строки не трогаем, иначе цикл пачек не закончится
+            columns = [getattr(self.model, name) for name in self.compact]
+            conditions += (or_(*(column.isnot(None) for column in columns)),)
+        return conditions
+
+
+def default_policies() -> Sequence[RetentionPolicy]:
+    return (
+        RetentionPolicy(
+            name="finance_todos",
+            model=Todo,
+            date_column=Todo.due_date,
+            keep_days=settings.RETENTION_FINANCE_TODO_DAYS,
+            where=(Todo.origin.in_(FINANCE_TODO_ORIGINS), Todo.is_completed == True),
+        ),
+        RetentionPolicy(
+            name="nutrition_todos",
+            model=Todo,
+            date_column=Todo.due_date,
+            keep_days=settings.RETENTION_NUTRITION_TODO_DAYS,
+            where=(Todo.origin.in_(NUTRITION_TODO_ORIGINS), Todo.is_completed == True),
+        ),
+        RetentionPolicy(
+            name="goal_todos",
+            model=Todo,
+            date_column=Todo.due_date,
+            keep_days=settings.RETENTION_GOAL_TODO_DAYS,
+            where=(Todo.origin == TodoOrigin.goal, Todo.is_daily == True, Todo.is_completed == True),
+        ),
+        RetentionPolicy(
+            name="cooking_session_plans",
+            model=CookingSession,
+            date_column=CookingSession.cooking_date,
+            keep_days=settings.RETENTION_COOKING_SESSION_DAYS,
+            compact=("instructions", "shopping_list"),
+        ),
+    )
+
+
+async def purge_in_batches(
+    engine: AsyncEngine,
+    model: Any,
+    conditions: Sequence[ColumnElement],
+    batch_size: int,
+    compact: Sequence[str] = (),
+    max_batches: Optional[int] = None,
+) -> int:
+    """Удаляет (или сжимает) строки по условию пачками по id.
+
+    Каждая пачка - отдельная короткая транзакция с одним DELETE/UPDATE
+    ... WHERE id IN (SELECT id ... LIMIT batch_size), поэтому блокировки
+    держатся недолго, а объекты в память не загружаются.
+    """
+    batch_ids = (
+        select(model.id)
+        .where(*conditions)
+        .order_by(model.id)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    if compact:
+        statement = update(model).where(model.id.in_(batch_ids)).values({name: None for name in compact})
+    else:
+        statement = delete(model).where(model.id.in_(batch_ids))
+
+    affected = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        async with engine.begin() as conn:
+            rowcount = (await conn.execute(statement)).rowcount or 0
+        affected += rowcount
+        batches += 1
+        if rowcount < batch_size:
+            break
+        # Отдаем управление обработчикам между пачками
+        await asyncio.sleep(0)
+    return affected
+
+
+async def run_retention(
+    engine: AsyncEngine,
+    policies: Optional[Sequence[RetentionPolicy]] = None,
+    today: Optional[date] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+) -> Dict[str, int]:
+    """Применяет правила хранения и возвращает число освобожденных строк по каждому правилу.
+
+    max_batches ограничивает работу одного запуска: недоделанное
+    продолжится при следующем запуске.
+    """
+    today = today or date.today()
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+    max_batches = settings.RETENTION_MAX_BATCHES if max_batches is None else max_batches
+    report: Dict[str, int] = {}
+    for policy in default_policies() if policies is None else policies:
+        try:
+            report[policy.name] = await purge_in_batches(
+                engine,
+                policy.model,
+                policy.conditions(today),
+                batch_size,
+                compact=policy.compact,
+                max_batches=max_batches or None,
+            )
+        except Exception as e:
+            logger.error("Retention: policy %s failed: %s", policy.name, e)
+            report[policy.name] = 0
+    logger.info("Retention: reclaimed rows %s", report)
+    return report
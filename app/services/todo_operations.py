@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Collection, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, cast, delete, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Todo, TodoOrigin
+
+# Групповые операции над задачами: каждая - один UPDATE / INSERT ... SELECT /
+# DELETE с RETURNING, без загрузки задач в сессию. Коммит делает вызывающий
+# (session_scope или единица работы апдейта).
+
+# Колонки, которые переносятся при копировании задачи на другую дату. Копия -
+# пользовательская задача: origin и origin_ref_id не переносятся, иначе копия
+# задачи по кредитору/должнику нарушила бы uq_todos_finance_origin_due
+_COPIED_COLUMNS = ("user_id", "title", "description", "priority", "is_daily")
+
+
+def _per_user(user_ids: List[int]) -> Dict[int, int]:
+    return dict(Counter(user_ids))
+
+
+async def reset_daily_todos(session: AsyncSession, user_ids: Collection[int], today: date) -> Dict[int, int]:
+    """Переносит обычные ежедневные задачи пользователей на today и снимает отметку о выполнении.
+
+    Returns:
+        Число сброшенных задач по user_id
+    """
+    if not user_ids:
+        return {}
+    result = await session.execute(
+        update(Todo)
+        .where(
+            and_(
+                Todo.user_id.in_(user_ids),
+                Todo.is_daily == True,
+                Todo.origin != TodoOrigin.goal
+            )
+        )
+        .values(is_completed=False, due_date=today)
+        .returning(Todo.user_id)
+    )
+    return _per_user(result.scalars().all())
+
+
+async def reset_goal_todos(session: AsyncSession, user_ids: Collection[int], today: date) -> Dict[int, int]:
+    """Снимает отметку о выполнении с ежедневных задач целей на today."""
+    if not user_ids:
+        return {}
+    result = await session.execute(
+        update(Todo)
+        .where(
+            and_(
+                Todo.user_id.in_(user_ids),
+                Todo.is_daily == True,
+                Todo.origin == TodoOrigin.goal,
+                Todo.due_date == today,
+                Todo.is_completed == True
+            )
+        )
+        .values(is_completed=False)
+        .returning(Todo.user_id)
+    )
+    return _per_user(result.scalars().all())
+
+
+async def copy_todos(
+    session: AsyncSession,
+    user_id: int,
+    date_from: date,
+    date_to: date,
+    target_date: date,
+    is_daily: Optional[bool] = None,
+) -> List[int]:
+    """Копирует задачи пользователя за [date_from, date_to] на target_date невыполненными.
+
+    Копии - ручные задачи (origin=manual), не связанные с исходной записью.
+
+    Args:
+        is_daily: Значение is_daily для копий; None - как у исходной задачи
+
+    Returns:
+        id созданных задач
+    """
+    values = {name: getattr(Todo, name) for name in _COPIED_COLUMNS}
+    values.update(
+        due_date=literal(target_date),
+        is_completed=literal(False),
+        origin=cast(literal(TodoOrigin.manual.value), Todo.origin.type),
+        created_at=literal(datetime.now(timezone.utc).replace(tzinfo=None)),
+    )
+    if is_daily is not None:
+        values["is_daily"] = literal(is_daily)
+    source = select(*values.values()).where(
+        and_(
+            Todo.user_id == user_id,
+            Todo.due_date >= date_from,
+            Todo.due_date <= date_to
+        )
+    ).order_by(Todo.id)
+    result = await session.execute(insert(Todo).from_select(list(values), source).returning(Todo.id))
+    return list(result.scalars().all())
+
+
+async def complete_todos(
+    session: AsyncSession, user_id: int, todo_ids: Collection[int], completed: bool = True
+) -> List[int]:
+    """Отмечает выбранные задачи пользователя выполненными (или снимает отметку).
+
+    Returns:
+        id измененных задач; чужие и несуществующие id пропускаются
+    """
+    if not todo_ids:
+        return []
+    result = await session.execute(
+        update(Todo)
+        .where(and_(Todo.user_id == user_id, Todo.id.in_(todo_ids)))
+        .values(is_completed=completed)
+        .returning(Todo.id)
+    )
+    return list(result.scalars().all())
+
+
+async def toggle_todo(session: AsyncSession, user_id: int, todo_id: int) -> Optional[Tuple[bool, str]]:
+    """Переключает отметку о выполнении задачи.
+
+    Returns:
+        (новый статус, название задачи) или None, если задачи у пользователя нет
+    """
+    result = await session.execute(
+        update(Todo)
+        .where(and_(Todo.user_id == user_id, Todo.id == todo_id))
+        .values(is_completed=~Todo.is_completed)
+        .returning(Todo.is_completed, Todo.title)
+    )
+    row = result.first()
+    return (row.is_completed, row.title) if row else None
+
+
+async def delete_todos(session: AsyncSession, user_id: int, todo_ids: Collection[int]) -> List[int]:
+    """Удаляет выбранные задачи пользователя.
+
+    Returns:
+        id удаленных задач; чужие и несуществующие id пропускаются
+    """
+    if not todo_ids:
+        return []
+    result = await session.execute(
+        delete(Todo)
+        .where(and_(Todo.user_id == user_id, Todo.id.in_(todo_ids)))
+        .returning(Todo.id)
+    )
+    return list(result.scalars().all())
@@ -1,7 +1,7 @@
 from datetime import datetime, time
 from typing import List, Tuple, Dict
 
-from sqlalchemy import select
+from sqlalchemy import Select, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import Todo, User
@@ -11,19 +11,22 @@ from app.utils.timezone_utils import get_user_time_info
 _sent_todo_reminders_cache: Dict[str, str] = {}
 
 
+def active_todo_reminders_query() -> Select:
+    """Запрос активных задач с напоминаниями (его план проверяет test_query_plans)."""
+    return (
+        select(Todo, User)
+        .join(User, Todo.user_id == User.id)
+        .where(
+            Todo.is_reminder_active == True,
+            Todo.reminder_time.isnot(None),
+            Todo.is_completed == False
+        )
+    )
+
+
 async def get_active_todo_reminders(session: AsyncSession) -> List[Tuple[Todo, User]]:
     """Получает все активные задачи с напоминаниями."""
-    result = (
-        await session.execute(
-            select(Todo, User)
-            .join(User, Todo.user_id == User.id)
-            .where(
-                Todo.is_reminder_active == True,
-                Todo.reminder_time.isnot(None),
-                Todo.is_completed == False
-            )
-        )
-    ).all()
+    result = (await session.execute(active_todo_reminders_query())).all()
     
     return result
 
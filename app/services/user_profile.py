@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.hot_queries import user_by_telegram_id
+from app.db.models import User
+
+
+@dataclass(frozen=True)
+class UserProfile:
+    """Компактный снимок пользователя для обработчиков (только чтение)."""
+
+    id: int
+    telegram_id: int
+    timezone: Optional[str] = None
+    notification_preferences: Dict[str, Any] = field(default_factory=dict)
+    food_budget_type: Optional[str] = None
+    food_budget_percentage: Optional[int] = None
+    food_budget_amount: Optional[Decimal] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserProfile":
+        return cls(
+            id=user.id,
+            telegram_id=user.telegram_id,
+            timezone=user.timezone,
+            notification_preferences=dict(user.notification_preferences or {}),
+            food_budget_type=user.food_budget_type,
+            food_budget_percentage=user.food_budget_percentage,
+            food_budget_amount=user.food_budget_amount,
+        )
+
+
+class UserProfileCache:
+    """LRU-кеш профилей по telegram_id с ограничением времени жизни записи."""
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._items: "OrderedDict[int, Tuple[float, UserProfile]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, telegram_id: int) -> Optional[UserProfile]:
+        item = self._items.get(telegram_id)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self._items[telegram_id]
+            self.misses += 1
+            return None
+        self._items.move_to_end(telegram_id)
+        self.hits += 1
+        return item[1]
+
+    def put(self, profile: UserProfile) -> None:
+        if self.max_size <= 0:
+            return
+        self._items[profile.telegram_id] = (time.monotonic() + self.ttl_seconds, profile)
+        self._items.move_to_end(profile.telegram_id)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def invalidate(self, telegram_id: int) -> None:
+        self._items.pop(telegram_id, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+profile_cache = UserProfileCache(settings.USER_PROFILE_CACHE_SIZE, settings.USER_PROFILE_CACHE_TTL_SECONDS)
+
+
+def invalidate_user_profile(telegram_id: int) -> None:
+    """Сбрасывает профиль из кеша (для изменений в обход ORM, например bulk update)."""
+    profile_cache.invalidate(telegram_id)
+
+
+async def upsert_user(
+    session: AsyncSession,
+    telegram_id: int,
+    username: Optional[str] = None,
+    first_name: Optional[str] = None,
+    last_name: Optional[str] = None,
+) -> None:
+    """INSERT ... ON CONFLICT DO NOTHING по telegram_id: параллельные апдейты не падают на уникальности."""
+    values = dict(telegram_id=telegram_id, username=username, first_name=first_name, last_name=last_name)
+    dialect = session.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        session.add(User(**values))
+        await session.flush()
+        return
+    await session.execute(insert(User).values(**values).on_conflict_do_nothing(index_elements=[User.telegram_id]))
+
+
+async def resolve_user_profile(
+    session: AsyncSession,
+    telegram_id: int,
+    username: Optional[str] = None,
+    first_name: Optional[str] = None,
+    last_name: Optional[str] = None,
+) -> UserProfile:
+    """Профиль из кеша; при промахе читает пользователя из БД, создавая его при первом обращении."""
+    profile = profile_cache.get(telegram_id)
+    if profile is not None:
+        return profile
+    query = user_by_telegram_id(telegram_id)
+    db_user = (await session.execute(query)).scalar_one_or_none()
+    if db_user is None:
+        await upsert_user(session, telegram_id, username, first_name, last_name)
+        db_user = (await session.execute(query)).scalar_one()
+    profile = UserProfile.from_user(db_user)
+    profile_cache.put(profile)
+    return profile
+
+
+# Инвалидация при записи: любые изменения User через ORM сбрасывают профиль.
+# Сбрасываем и после flush, и после commit, чтобы чтение между ними
+# не вернуло в кеш старую версию.
+
+_PENDING_KEY = "user_profile_invalidate"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context) -> None:  # noqa: ANN001
+    changed: Set[int] = session.info.setdefault(_PENDING_KEY, set())
+    # Новых пользователей в кеше еще нет - смотрим только измененных и удаленных
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, User) and obj.telegram_id is not None:
+            changed.add(obj.telegram_id)
+            profile_cache.invalidate(obj.telegram_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    for telegram_id in session.info.pop(_PENDING_KEY, ()):
+        profile_cache.invalidate(telegram_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending_users(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
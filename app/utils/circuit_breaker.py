@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BreakerState(str, Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Запрос отклонен без обращения к сервису: предохранитель разомкнут."""
+
+    def __init__(self, name: str, retry_in: float) -> None:
+        super().__init__(f"{name} is unavailable, retry in {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Предохранитель для внешнего сервиса.
+
+    После ``failure_threshold`` ошибок подряд размыкается на ``reset_timeout``
+    секунд: все вызовы в это время сразу получают CircuitOpenError. Затем
+    пропускает один пробный вызов (half-open) - успех замыкает цепь, ошибка
+    снова размыкает. Дополнительно хранит скользящее окно последних вызовов
+    для расчета доли ошибок и перцентилей задержки.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        window_size: int = 100,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = BreakerState.closed
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._latencies: Deque[float] = deque(maxlen=window_size)
+        self._outcomes: Deque[bool] = deque(maxlen=window_size)
+
+    def before_call(self) -> None:
+        """Проверяет, можно ли выполнять вызов; иначе бросает CircuitOpenError."""
+        if self.state == BreakerState.closed:
+            return
+        if self.state == BreakerState.open:
+            retry_in = self._opened_at + self.reset_timeout - time.monotonic()
+            if retry_in > 0:
+                raise CircuitOpenError(self.name, retry_in)
+            self.state = BreakerState.half_open
+            self._probe_in_flight = False
+        # half-open: пропускаем только один пробный вызов
+        if self._probe_in_flight:
+            raise CircuitOpenError(self.name, self.reset_timeout)
+        self._probe_in_flight = True
+
+    def record_success(self, latency: Optional[float] = None) -> None:
+        if latency is not None:
+            self._latencies.append(latency)
+        self._outcomes.append(True)
+        self.consecutive_failures = 0
+        if self.state != BreakerState.closed:
+            logger.info("Circuit %s closed after successful probe", self.name)
+        self.state = BreakerState.closed
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._outcomes.append(False)
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == BreakerState.half_open or self.consecutive_failures >= self.failure_threshold:
+            if self.state != BreakerState.open:
+                logger.warning(
+                    "Circuit %s opened after %d consecutive failures (error rate %.0f%%)",
+                    self.name, self.consecutive_failures, self.error_rate() * 100,
+                )
+            self.state = BreakerState.open
+            self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Снимает отметку пробного вызова, если он завершился без результата (отмена)."""
+        self._probe_in_flight = False
+
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def latency_percentile(self, percentile: float, min_samples: int = 20) -> Optional[float]:
+        """Перцентиль задержки успешных вызовов; None, пока данных недостаточно."""
+        if len(self._latencies) < min_samples:
+            return None
+        values = sorted(self._latencies)
+        return values[min(len(values) - 1, int(len(values) * percentile))]
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "error_rate": self.error_rate(),
+            "p50_latency": self.latency_percentile(0.5, min_samples=1),
+            "p95_latency": self.latency_percentile(0.95, min_samples=1),
+        }
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import functools
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Set
+from typing import Any, Awaitable, Callable, Dict, Set
 
 from aiogram import Bot
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -10,10 +11,12 @@ from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
+from app.db.query_metrics import track_queries
 from app.services.daily_reminders import send_daily_principle, send_daily_motivation
 from app.services.nutrition_reminders import (
     send_cooking_day_reminders,
     send_shopping_day_reminders,
+    schedule_cooking_plan_pregeneration,
 )
 from app.services.health_reminders import send_health_daily_prompt
 from app.services.goal_reminders import send_goal_reminders
@@ -53,39 +56,82 @@ class AppScheduler:
         key = self._get_reminder_key(user_id, reminder_type)
         self.sent_reminders[key] = today
 
+    def _add_job(self, func: Callable[[], Awaitable[None]], trigger: Any, **kwargs: Any) -> None:
+        """Регистрирует задачу; ее SQL-запросы учитываются под именем задачи."""
+        name = f"scheduler.{func.__name__}"
+
+        @functools.wraps(func)
+        async def _tracked() -> None:
+            with track_queries(name):
+                await func()
+
+        self.scheduler.add_job(_tracked, trigger, **kwargs)
+
     def start(self) -> None:
         """Запускает планировщик с поддержкой часовых поясов пользователей."""
         print("🚀 Запуск AppScheduler с поддержкой часовых поясов пользователей")
         
         # Все задачи выполняются каждую минуту для проверки времени пользователей
         # Это позволяет учитывать индивидуальные часовые пояса
-        self.scheduler.add_job(self._daily_principle_job, IntervalTrigger(minutes=1))
-        self.scheduler.add_job(self._daily_motivation_job, IntervalTrigger(minutes=1))
+        self._add_job(self._daily_principle_job, IntervalTrigger(minutes=1))
+        self._add_job(self._daily_motivation_job, IntervalTrigger(minutes=1))
         
         # Напоминания по готовке и спискам покупок
-        self.scheduler.add_job(self._nutrition_cooking_job, IntervalTrigger(minutes=1))
-        self.scheduler.add_job(self._nutrition_shopping_job, IntervalTrigger(minutes=1))
+        self._add_job(self._nutrition_cooking_job, IntervalTrigger(minutes=1))
+        self._add_job(self._nutrition_shopping_job, IntervalTrigger(minutes=1))
+        # Заблаговременная подготовка планов готовки (генерируют фоновые воркеры)
+        self._add_job(self._cooking_plan_pregen_job, IntervalTrigger(minutes=1))
         
         # Здоровье: ежедневные напоминания о вводе показателей
-        self.scheduler.add_job(self._health_daily_prompt_job, IntervalTrigger(minutes=1))
+        self._add_job(self._health_daily_prompt_job, IntervalTrigger(minutes=1))
         
         # Напоминания по целям
-        self.scheduler.add_job(self._goal_reminders_job, IntervalTrigger(minutes=1))
+        self._add_job(self._goal_reminders_job, IntervalTrigger(minutes=1))
         
         # Напоминания по to-do задачам
-        self.scheduler.add_job(self._todo_reminders_job, IntervalTrigger(minutes=1))
+        self._add_job(self._todo_reminders_job, IntervalTrigger(minutes=1))
         
         # Финансовые напоминания
-        self.scheduler.add_job(self._finance_reminders_job, IntervalTrigger(minutes=1))
+        self._add_job(self._finance_reminders_job, IntervalTrigger(minutes=1))
         
         # Создание задач To-Do для финансовых обязательств
-        self.scheduler.add_job(self._finance_todo_creation_job, IntervalTrigger(minutes=1))
+        self._add_job(self._finance_todo_creation_job, IntervalTrigger(minutes=1))
         
         # To-Do: вечерние напоминания о составлении списка на завтра
-        self.scheduler.add_job(self._todo_evening_reminder_job, IntervalTrigger(minutes=1))
+        self._add_job(self._todo_evening_reminder_job, IntervalTrigger(minutes=1))
         
         # To-Do: сброс ежедневных задач каждое утро
-        self.scheduler.add_job(self._daily_tasks_reset_job, IntervalTrigger(minutes=1))
+        self._add_job(self._daily_tasks_reset_job, IntervalTrigger(minutes=1))
+        
+        # Ночная подготовка планов идеального дня (для включивших опцию)
+        self._add_job(self._perfect_day_pregen_job, IntervalTrigger(minutes=1))
+        
+        # Телеметрия пула соединений БД
+        if settings.DB_POOL_STATS_INTERVAL_MINUTES > 0:
+            self._add_job(
+                self._pool_stats_job, IntervalTrigger(minutes=settings.DB_POOL_STATS_INTERVAL_MINUTES)
+            )
+        
+        # Предзаполнение общего кеша планов готовки в непиковое время (UTC)
+        self._add_job(
+            self._cooking_plan_prefill_job,
+            CronTrigger(hour=settings.COOKING_PLAN_PREFILL_HOUR, minute=0),
+            max_instances=1,
+        )
+        
+        # Очистка выполненных автозадач и сжатие старых планов готовки (UTC)
+        self._add_job(
+            self._retention_job,
+            CronTrigger(hour=settings.RETENTION_HOUR, minute=0),
+            max_instances=1,
+        )
+        
+        # Партиции и срок хранения истории взаимодействий (UTC)
+        self._add_job(
+            self._interaction_retention_job,
+            CronTrigger(hour=settings.INTERACTION_RETENTION_HOUR, minute=30),
+            max_instances=1,
+        )
         
         self.scheduler.start()
         print("✅ AppScheduler запущен успешно")
@@ -203,6 +249,18 @@ class AppScheduler:
             except Exception as e:
                 print(f"❌ Ошибка в _nutrition_cooking_job: {e}")
 
+    async def _cooking_plan_pregen_job(self) -> None:
+        """Ставит в очередь подготовку планов готовки до наступления напоминания"""
+        async with self.session_factory() as session:  # type: ignore[misc]
+            try:
+                scheduled = await schedule_cooking_plan_pregeneration(session)
+                await session.commit()
+                if scheduled:
+                    print(f"🍽️ Запланирована подготовка {scheduled} планов готовки")
+            except Exception as e:
+                await session.rollback()
+                print(f"❌ Ошибка в _cooking_plan_pregen_job: {e}")
+
     async def _nutrition_shopping_job(self) -> None:
         """Напоминания о покупках с учетом часового пояса пользователя"""
         async with self.session_factory() as session:  # type: ignore[misc]
@@ -328,41 +386,53 @@ class AppScheduler:
                 print(f"❌ Ошибка в _finance_reminders_job: {e}")
 
     async def _finance_todo_creation_job(self) -> None:
-        """Создание задач To-Do для финансовых обязательств с учетом часового пояса пользователя"""
+        """Создание задач To-Do для финансовых обязательств с учетом часового пояса пользователя
+
+        Пользователи, у которых наступило 6:00, собираются по местной дате, и
+        задачи для каждой даты создаются одним INSERT ... SELECT.
+        """
+        from app.services.finance_todo_manager import create_financial_todos_for_users
+        from app.utils.timezone_utils import get_user_local_time
+        
         async with self.session_factory() as session:  # type: ignore[misc]
             try:
-                # Получаем всех пользователей
                 users = (await session.execute(select(User))).scalars().all()
                 
+                due_by_date: Dict[Any, list] = {}
                 for user in users:
-                    try:
-                        # Проверяем настройки уведомлений
-                        prefs = user.notification_preferences or {}
-                        if not prefs.get("finance_todo_creation", True):
-                            continue
-                        
-                        # Проверяем, было ли уже создано задач сегодня
-                        if self._is_reminder_sent_today(user.id, "finance_todo_creation"):
-                            continue
-                        
-                        # Проверяем, пора ли создавать задачи (6:00 по местному времени пользователя)
-                        if is_time_to_send_reminder(user.timezone, 6):
-                            time_info = get_user_time_info(user.timezone)
-                            print(f"🕐 Создаем задачи To-Do для финансовых обязательств пользователю {user.id} "
-                                  f"в {time_info['user_local_time'].strftime('%H:%M')} "
-                                  f"({time_info['timezone']})")
-                            
-                            from app.services.finance_todo_manager import create_todo_for_financial_obligations
-                            await create_todo_for_financial_obligations(session, user.id)
-                            
-                            # Отмечаем как выполненное
-                            self._mark_reminder_sent(user.id, "finance_todo_creation")
-                            
-                    except Exception as e:
-                        print(f"❌ Ошибка при создании задач To-Do для финансовых обязательств пользователя {user.id}: {e}")
+                    # Проверяем настройки уведомлений
+                    prefs = user.notification_preferences or {}
+                    if not prefs.get("finance_todo_creation", True):
+                        continue
+                    
+                    # Проверяем, было ли уже создано задач сегодня
+                    if self._is_reminder_sent_today(user.id, "finance_todo_creation"):
                         continue
+                    
+                    # Проверяем, пора ли создавать задачи (6:00 по местному времени пользователя)
+                    if is_time_to_send_reminder(user.timezone, 6):
+                        local_date = get_user_local_time(user.timezone).date()
+                        due_by_date.setdefault(local_date, []).append(user.id)
+                
+                if not due_by_date:
+                    return
+                
+                created: Dict[int, int] = {}
+                for local_date, user_ids in due_by_date.items():
+                    created.update(await create_financial_todos_for_users(session, user_ids, local_date))
+                await session.commit()
+                
+                for user_ids in due_by_date.values():
+                    for user_id in user_ids:
+                        # Отмечаем как выполненное
+                        self._mark_reminder_sent(user_id, "finance_todo_creation")
+                
+                due_count = sum(len(user_ids) for user_ids in due_by_date.values())
+                print(f"🕐 Задачи To-Do для финансовых обязательств: пользователей {due_count}, "
+                      f"создано {sum(created.values())} {created}")
                         
             except Exception as e:
+                await session.rollback()
                 print(f"❌ Ошибка в _finance_todo_creation_job: {e}")
 
     async def _todo_evening_reminder_job(self) -> None:
@@ -414,40 +484,126 @@ class AppScheduler:
 
     async def _daily_tasks_reset_job(self) -> None:
         """Сброс ежедневных задач с учетом часового пояса пользователя"""
+        from datetime import date
+        from app.services.goal_tasks_manager import GoalTasksManager
+        from app.services.todo_operations import reset_daily_todos, reset_goal_todos
+        
         async with self.session_factory() as session:  # type: ignore[misc]
             try:
                 # Получаем всех пользователей
                 users = (await session.execute(select(User))).scalars().all()
                 
-                for user in users:
+                # Пользователи, у которых наступило 6:00 по местному времени и сброса сегодня еще не было
+                due_users = [
+                    user for user in users
+                    if not self._is_reminder_sent_today(user.id, "daily_tasks_reset")
+                    and is_time_to_send_reminder(user.timezone, 6)
+                ]
+                if not due_users:
+                    return
+                
+                # Сбрасываем задачи всех этих пользователей двумя UPDATE
+                user_ids = [user.id for user in due_users]
+                today = date.today()
+                reset = await reset_daily_todos(session, user_ids, today)
+                reset_goals = await reset_goal_todos(session, user_ids, today)
+                await session.commit()
+                print(f"🕐 Сброшены ежедневные задачи {len(user_ids)} пользователей: "
+                      f"обычных {sum(reset.values())}, по целям {sum(reset_goals.values())}")
+                
+                for user in due_users:
                     try:
-                        # Проверяем, было ли уже выполнено сброс сегодня
-                        if self._is_reminder_sent_today(user.id, "daily_tasks_reset"):
-                            continue
-                        
-                        # Проверяем, пора ли сбрасывать задачи (6:00 по местному времени пользователя)
-                        if is_time_to_send_reminder(user.timezone, 6):
-                            time_info = get_user_time_info(user.timezone)
-                            print(f"🕐 Сбрасываем ежедневные задачи пользователю {user.id} "
-                                  f"в {time_info['user_local_time'].strftime('%H:%M')} "
-                                  f"({time_info['timezone']})")
-                            
-                            from app.services.daily_tasks_manager import reset_daily_tasks
-                            await reset_daily_tasks(session, user.id)
-                            
-                            # Создаем задачи питания
-                            await create_nutrition_todos_for_all_users(session)
-                            
-                            # Отмечаем как выполненное
-                            self._mark_reminder_sent(user.id, "daily_tasks_reset")
-                            
+                        # Новые задачи по активным целям (обращение к ИИ - по пользователю)
+                        await GoalTasksManager.create_daily_tasks_from_goals(session, user.id)
                     except Exception as e:
-                        print(f"❌ Ошибка при сбросе ежедневных задач для пользователя {user.id}: {e}")
-                        continue
+                        await session.rollback()
+                        print(f"❌ Ошибка при создании задач по целям для пользователя {user.id}: {e}")
+                    # Отмечаем как выполненное
+                    self._mark_reminder_sent(user.id, "daily_tasks_reset")
+                
+                # Создаем задачи питания
+                await create_nutrition_todos_for_all_users(session)
                         
             except Exception as e:
+                await session.rollback()
                 print(f"❌ Ошибка в _daily_tasks_reset_job: {e}")
 
+    async def _perfect_day_pregen_job(self) -> None:
+        """Ставит в очередь ночную подготовку плана идеального дня по местному времени пользователя"""
+        from app.services.job_queue import enqueue_job
+        from app.services.llm_jobs import PERFECT_DAY_PLAN_JOB
+        from app.utils.timezone_utils import get_user_local_time
+        
+        async with self.session_factory() as session:  # type: ignore[misc]
+            try:
+                users = (await session.execute(select(User))).scalars().all()
+                
+                for user in users:
+                    prefs = user.notification_preferences or {}
+                    if not prefs.get("perfect_day_pregen", False):
+                        continue
+                    if self._is_reminder_sent_today(user.id, "perfect_day_pregen"):
+                        continue
+                    if is_time_to_send_reminder(user.timezone, settings.PERFECT_DAY_PREGEN_HOUR):
+                        plan_date = get_user_local_time(user.timezone).date()
+                        await enqueue_job(
+                            session,
+                            PERFECT_DAY_PLAN_JOB,
+                            chat_id=user.telegram_id,
+                            user_id=user.id,
+                            payload={"plan_date": plan_date.isoformat(), "silent": True},
+                        )
+                        self._mark_reminder_sent(user.id, "perfect_day_pregen")
+                
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                print(f"❌ Ошибка в _perfect_day_pregen_job: {e}")
+
+    async def _pool_stats_job(self) -> None:
+        """Периодический отчет о пуле соединений БД, запросах и очереди фоновых задач"""
+        from app.db.pool_metrics import log_pool_stats
+        from app.db.query_metrics import log_query_stats
+        from app.db.session import engine
+        from app.services.job_queue import log_job_queue_stats
+        log_pool_stats(engine)
+        log_query_stats()
+        async with self.session_factory() as session:  # type: ignore[misc]
+            try:
+                await log_job_queue_stats(session)
+            except Exception as e:
+                print(f"❌ Ошибка в _pool_stats_job: {e}")
+
+    async def _cooking_plan_prefill_job(self) -> None:
+        """Ночная генерация недостающих вариантов планов готовки"""
+        try:
+            from app.services.cooking_plan_cache import prefill_cooking_plan_cache
+            generated = await prefill_cooking_plan_cache()
+            print(f"🍽️ Кеш планов готовки обновлен: сгенерировано {generated} планов")
+        except Exception as e:
+            print(f"❌ Ошибка в _cooking_plan_prefill_job: {e}")
+
+    async def _retention_job(self) -> None:
+        """Ночное удаление устаревших сгенерированных данных по правилам хранения"""
+        try:
+            from app.db.session import engine
+            from app.services.retention import run_retention
+            report = await run_retention(engine)
+            print(f"🗑️ Очистка устаревших данных: {report}")
+        except Exception as e:
+            print(f"❌ Ошибка в _retention_job: {e}")
+
+    async def _interaction_retention_job(self) -> None:
+        """Ночное обслуживание истории взаимодействий: новые партиции и удаление старых данных"""
+        try:
+            from app.db.session import engine
+            from app.services.interaction_retention import maintain_interaction_storage
+            report = await maintain_interaction_storage(engine)
+            print(f"🗄️ История взаимодействий: удалено партиций {len(report.dropped_partitions)}, "
+                  f"строк {report.deleted_rows}")
+        except Exception as e:
+            print(f"❌ Ошибка в _interaction_retention_job: {e}")
+
     def stop(self) -> None:
         """Останавливает планировщик"""
         if self.scheduler.running:
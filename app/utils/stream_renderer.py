@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import AsyncIterator, Callable, List, Optional
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import InlineKeyboardMarkup, Message
+
+from app.config import settings
+
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+STREAM_CURSOR = " ▌"
+
+
+def _paginate(text: str, max_len: int) -> List[str]:
+    """Разбивает текст на страницы не длиннее max_len по границам строк/слов.
+
+    Точки разрыва зависят только от префикса текста, поэтому уже
+    заполненные страницы не меняются по мере дописывания ответа.
+    """
+    pages: List[str] = []
+    rest = text
+    while len(rest) > max_len:
+        split_point = rest.rfind("\n", 0, max_len)
+        if split_point < max_len // 2:
+            split_point = rest.rfind(" ", 0, max_len)
+        if split_point <= 0:
+            split_point = max_len
+        pages.append(rest[:split_point].rstrip())
+        rest = rest[split_point:].lstrip()
+    pages.append(rest)
+    return pages
+
+
+class TelegramStreamRenderer:
+    """Прогрессивно выводит потоковый ответ ИИ в сообщения Telegram.
+
+    Первое сообщение (обычно индикатор "⏳ Генерирую...") редактируется
+    не чаще, чем раз в ``min_interval`` секунд. При превышении лимита
+    Telegram в 4096 символов текст переносится в новые сообщения; лишние
+    сообщения, оставшиеся от промежуточных кадров, удаляются в финальном.
+    """
+
+    def __init__(
+        self,
+        message: Message,
+        header: str = "",
+        footer: str = "",
+        formatter: Optional[Callable[[str], str]] = None,
+        parse_mode: Optional[str] = None,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+        min_interval: Optional[float] = None,
+        max_len: int = TELEGRAM_MESSAGE_LIMIT,
+    ) -> None:
+        self.messages: List[Message] = [message]
+        self.header = header
+        self.footer = footer
+        self.formatter = formatter
+        self.parse_mode = parse_mode
+        self.reply_markup = reply_markup
+        self.min_interval = settings.LLM_STREAM_EDIT_INTERVAL if min_interval is None else min_interval
+        self.max_len = max_len
+        self.text = ""
+        self._rendered: List[Optional[str]] = [None]
+        self._last_flush = 0.0
+
+    async def render(self, chunks: AsyncIterator[str]) -> str:
+        """Читает поток фрагментов, обновляя сообщения, и возвращает полный ответ."""
+        async for piece in chunks:
+            self.text += piece
+            if time.monotonic() - self._last_flush >= self.min_interval:
+                await self._flush(final=False)
+        await self._flush(final=True)
+        return self.text
+
+    async def finish(self, text: str) -> None:
+        """Выводит готовый текст целиком (например, ответ из кеша или резервный)."""
+        self.text = text
+        await self._flush(final=True)
+
+    def _compose(self, final: bool) -> str:
+        body = self.formatter(self.text) if self.formatter else self.text
+        if final:
+            return f"{self.header}{body}{self.footer}"
+        return f"{self.header}{body}"
+
+    def _pages(self, final: bool) -> List[str]:
+        pages = _paginate(self._compose(final), self.max_len)
+        # Курсор не участвует в разбиении: из-за него не должна появляться
+        # лишняя страница, которой не будет в финальном тексте
+        if not final and len(pages[-1]) + len(STREAM_CURSOR) <= self.max_len:
+            pages[-1] += STREAM_CURSOR
+        return pages
+
+    async def _flush(self, final: bool) -> None:
+        self._last_flush = time.monotonic()
+        pages = self._pages(final)
+        for index, page in enumerate(pages):
+            markup = self.reply_markup if final and index == len(pages) - 1 else None
+            if index >= len(self.messages):
+                sent = await self._send(page, markup, final)
+                if sent is None:
+                    return
+                self.messages.append(sent)
+                self._rendered.append(page)
+            elif self._rendered[index] != page or markup is not None:
+                await self._edit(index, page, markup, final)
+        if final:
+            await self._drop_extra_messages(len(pages))
+
+    async def _drop_extra_messages(self, keep: int) -> None:
+        """Удаляет сообщения промежуточных кадров, для которых не осталось текста."""
+        while len(self.messages) > max(keep, 1):
+            message = self.messages.pop()
+            self._rendered.pop()
+            try:
+                await message.delete()
+            except Exception:
+                pass
+
+    async def _send(
+        self, text: str, markup: Optional[InlineKeyboardMarkup], final: bool
+    ) -> Optional[Message]:
+        anchor = self.messages[-1]
+        try:
+            return await anchor.answer(text, parse_mode=self.parse_mode, reply_markup=markup)
+        except TelegramRetryAfter as e:
+            if not final:
+                return None
+            await asyncio.sleep(e.retry_after)
+            return await self._send(text, markup, final)
+        except TelegramBadRequest:
+            # Незакрытая разметка в тексте - отправляем без форматирования
+            try:
+                return await anchor.answer(text, parse_mode=None, reply_markup=markup)
+            except Exception:
+                return None
+
+    async def _edit(
+        self, index: int, text: str, markup: Optional[InlineKeyboardMarkup], final: bool
+    ) -> None:
+        message = self.messages[index]
+        try:
+            await message.edit_text(text, parse_mode=self.parse_mode, reply_markup=markup)
+        except TelegramRetryAfter as e:
+            # Превышен лимит правок: промежуточный кадр пропускаем, финальный дожидаемся
+            if not final:
+                return
+            await asyncio.sleep(e.retry_after)
+            await self._edit(index, text, markup, final)
+            return
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                try:
+                    await message.edit_text(text, parse_mode=None, reply_markup=markup)
+                except Exception:
+                    return
+        self._rendered[index] = text
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Микро-бенчмарк горячих запросов: накладные расходы SQLAlchemy на вызов для
+обычного select() и для lambda_stmt из app.db.hot_queries.
+
+Замеряются два этапа:
+  build   - построение запроса и ключа кеша (работа до поиска в кеше компиляции)
+  execute - полный вызов Session.execute на SQLite в памяти с несколькими строками,
+            чтобы время самой базы было минимальным
+    python3 benchmark_hot_queries.py --iterations 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, Tuple
+
+sys.path.append(".")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+os.environ.setdefault("BOT_TOKEN", "42:BENCH")
+os.environ.setdefault("DEEPSEEK_API_KEY", "bench")
+
+from sqlalchemy import and_, create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.hot_queries import HOT_QUERIES
+from app.db.models import Creditor, Debtor, Todo, User
+
+TODAY = date.today()
+USER_ID = 1
+
+
+def _plain_queries() -> Dict[str, Callable[..., Any]]:
+    """Те же запросы, собираемые заново при каждом вызове (как было в обработчиках)."""
+    def obligations(model: Any, overdue: bool) -> Callable[..., Any]:
+        if overdue:
+            return lambda user_id, today: select(model).where(and_(
+                model.user_id == user_id, model.is_active == True, model.due_date < today,
+            )).order_by(model.due_date)
+        return lambda user_id, date_from, date_to: select(model).where(and_(
+            model.user_id == user_id, model.is_active == True,
+            model.due_date >= date_from, model.due_date <= date_to,
+        )).order_by(model.due_date)
+
+    return {
+        "user_by_telegram_id": lambda telegram_id: select(User).where(User.telegram_id == telegram_id),
+        "open_todos": lambda user_id: select(Todo).where(
+            and_(Todo.user_id == user_id, Todo.is_completed == False)
+        ).order_by(Todo.due_date, Todo.priority),
+        "completed_todos": lambda user_id: select(Todo).where(
+            and_(Todo.user_id == user_id, Todo.is_completed == True)
+        ).order_by(Todo.due_date.desc(), Todo.priority),
+        "overdue_creditors": obligations(Creditor, overdue=True),
+        "overdue_debtors": obligations(Debtor, overdue=True),
+        "upcoming_creditors": obligations(Creditor, overdue=False),
+        "upcoming_debtors": obligations(Debtor, overdue=False),
+    }
+
+
+ARGUMENTS: Dict[str, Tuple[Any, ...]] = {
+    "user_by_telegram_id": (1001,),
+    "open_todos": (USER_ID,),
+    "completed_todos": (USER_ID,),
+    "overdue_creditors": (USER_ID, TODAY),
+    "overdue_debtors": (USER_ID, TODAY),
+    "upcoming_creditors": (USER_ID, TODAY, TODAY + timedelta(days=3)),
+    "upcoming_debtors": (USER_ID, TODAY, TODAY + timedelta(days=3)),
+}
+
+
+def seed(session: Session) -> None:
+    session.execute(insert(User), [{"telegram_id": 1001, "notification_preferences": {}}])
+    session.execute(insert(Todo), [
+        {"user_id": USER_ID, "title": f"Задача {n}", "due_date": TODAY, "is_completed": n % 2 == 0,
+         "priority": "medium"}
+        for n in range(4)
+    ])
+    for model in (Creditor, Debtor):
+        session.execute(insert(model), [
+            {"user_id": USER_ID, "name": f"Контрагент {n}", "amount": Decimal(100),
+             "due_date": TODAY + timedelta(days=n - 1), "is_active": True}
+            for n in range(3)
+        ])
+    session.commit()
+
+
+def _per_call_us(fn: Callable[[], Any], iterations: int) -> float:
+    for _ in range(min(iterations, 200)):
+        fn()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def run_benchmark(iterations: int) -> None:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    plain = _plain_queries()
+    with Session(engine) as session:
+        seed(session)
+        print(f"{'query':<22}{'stage':<9}{'select()':>12}{'lambda':>12}{'speedup':>9}")
+        totals = {"build": [0.0, 0.0], "execute": [0.0, 0.0]}
+        for name, cached in HOT_QUERIES.items():
+            args = ARGUMENTS[name]
+            build = plain[name]
+            stages = {
+                "build": (lambda: build(*args)._generate_cache_key(),
+                          lambda: cached(*args)._generate_cache_key()),
+                "execute": (lambda: session.execute(build(*args)).scalars().all(),
+                            lambda: session.execute(cached(*args)).scalars().all()),
+            }
+            for stage, (before, after) in stages.items():
+                before_us = _per_call_us(before, iterations)
+                after_us = _per_call_us(after, iterations)
+                totals[stage][0] += before_us
+                totals[stage][1] += after_us
+                print(f"{name:<22}{stage:<9}{before_us:>10.1f}us{after_us:>10.1f}us{before_us / after_us:>8.2f}x")
+        for stage, (before_us, after_us) in totals.items():
+            print(f"{'total':<22}{stage:<9}{before_us:>10.1f}us{after_us:>10.1f}us{before_us / after_us:>8.2f}x")
+    engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Накладные расходы на горячие запросы: select() и lambda_stmt")
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+    run_benchmark(args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный прогон клиента ИИ (deepseek_complete / deepseek_stream).
+
+Запускать против локального стаба, чтобы не тратить квоту реального API:
+    python3 deepseek_stub_server.py --seed 1 --error-rate 0.05 &
+    DEEPSEEK_BASE_URL=http://127.0.0.1:8089 python3 benchmark_llm.py --requests 200 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import List, Optional
+
+sys.path.append(".")
+from app.services.llm import LLMUnavailableError, deepseek_breaker, deepseek_complete, deepseek_stream
+
+
+def _percentile(values: List[float], percentile: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile))]
+
+
+async def _one_request(n: int, stream: bool, hedge: bool) -> float:
+    prompt = f"Составь короткий план дня для гладиатора #{n % 50}"
+    started = time.monotonic()
+    if stream:
+        async for _ in deepseek_stream(prompt, max_tokens=300):
+            pass
+    else:
+        await deepseek_complete(prompt, max_tokens=300, hedge=hedge)
+    return time.monotonic() - started
+
+
+async def run_benchmark(requests: int, concurrency: int, stream: bool, hedge: bool) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    rejected: List[float] = []
+    failures = 0
+
+    async def worker(n: int) -> None:
+        nonlocal failures
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                latencies.append(await _one_request(n, stream, hedge))
+            except LLMUnavailableError:
+                rejected.append(time.monotonic() - started)
+            except Exception:
+                failures += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(worker(n) for n in range(requests)))
+    elapsed = time.monotonic() - started
+
+    def fmt(value: Optional[float]) -> str:
+        return f"{value:.3f}s" if value is not None else "-"
+
+    print("📊 Результаты")
+    print("=" * 50)
+    print(f"Запросов: {requests}, параллельно: {concurrency}, stream={stream}, hedge={hedge}")
+    print(f"Общее время: {elapsed:.2f}s, пропускная способность: {requests / elapsed:.1f} req/s")
+    print(f"Успешно: {len(latencies)}, ошибок: {failures}, отклонено предохранителем: {len(rejected)}")
+    print(f"Задержка p50: {fmt(_percentile(latencies, 0.5))}, p95: {fmt(_percentile(latencies, 0.95))}, "
+          f"p99: {fmt(_percentile(latencies, 0.99))}")
+    print(f"Отказ предохранителя p95: {fmt(_percentile(rejected, 0.95))}")
+    print(f"Предохранитель: {deepseek_breaker.stats()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон клиента ИИ")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--hedge", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.requests, args.concurrency, args.stream, args.hedge))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Локальный DeepSeek-совместимый стаб для нагрузочных тестов без обращения к API.
+
+Реализует POST /chat/completions (обычный ответ и stream=true в формате SSE),
+задержки по заданному распределению, инъекцию ошибок (5xx, 429, зависания)
+и режимы записи/воспроизведения ответов.
+
+Использование:
+    python3 deepseek_stub_server.py --port 8089 --latency lognormal --latency-median 1.5
+    python3 deepseek_stub_server.py --error-rate 0.1 --rate-limit-rate 0.05 --hang-rate 0.01
+    python3 deepseek_stub_server.py --record llm_cassette.jsonl   # проксирует в реальный API
+    python3 deepseek_stub_server.py --replay llm_cassette.jsonl --seed 42
+
+Бот направляется на стаб через DEEPSEEK_BASE_URL=http://127.0.0.1:8089
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+from aiohttp import web
+
+UPSTREAM_URL = "https://api.deepseek.com"
+
+WORDS = (
+    "гладиатор арена план задача цель день дисциплина сила отдых питание "
+    "белок овощи бюджет тренировка фокус привычка прогресс неделя шаг результат"
+).split()
+
+
+def request_key(payload: dict) -> str:
+    """Ключ ответа в кассете: зависит только от содержимого запроса."""
+    material = json.dumps(
+        {
+            "model": payload.get("model"),
+            "messages": payload.get("messages"),
+            "max_tokens": payload.get("max_tokens"),
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def synthetic_answer(key: str, max_tokens: int) -> str:
+    """Детерминированный текст-заглушка, длина пропорциональна max_tokens."""
+    rng = random.Random(key)
+    words = [rng.choice(WORDS) for _ in range(max(5, min(max_tokens, 800) // 2))]
+    lines = [" ".join(words[i:i + 12]).capitalize() + "." for i in range(0, len(words), 12)]
+    return "\n".join(f"{n}. {line}" for n, line in enumerate(lines, 1))
+
+
+class Cassette:
+    """Записанные ответы в формате JSONL: {"key": ..., "content": ...}."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.responses: Dict[str, List[str]] = {}
+        if path.exists():
+            for line in path.read_text(encoding="utf-8").splitlines():
+                if line.strip():
+                    record = json.loads(line)
+                    self.responses.setdefault(record["key"], []).append(record["content"])
+        # Для одинаковых запросов ответы выдаются по кругу в порядке записи
+        self._cursor: Dict[str, int] = {}
+
+    def get(self, key: str) -> Optional[str]:
+        variants = self.responses.get(key)
+        if not variants:
+            return None
+        index = self._cursor.get(key, 0)
+        self._cursor[key] = index + 1
+        return variants[index % len(variants)]
+
+    def append(self, key: str, content: str) -> None:
+        self.responses.setdefault(key, []).append(content)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": key, "content": content}, ensure_ascii=False) + "\n")
+
+
+class StubServer:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.cassette = Cassette(Path(args.record or args.replay)) if (args.record or args.replay) else None
+        self.stats = {"requests": 0, "stream": 0, "errors": 0, "rate_limited": 0, "hung": 0,
+                      "replayed": 0, "recorded": 0, "synthetic": 0}
+
+    def sample_latency(self) -> float:
+        a = self.args
+        if a.latency == "fixed":
+            value = a.latency_median
+        elif a.latency == "uniform":
+            value = self.rng.uniform(a.latency_min, a.latency_max)
+        elif a.latency == "exponential":
+            value = a.latency_min + self.rng.expovariate(1 / max(a.latency_median, 1e-6))
+        else:  # lognormal - длинный хвост, похожий на реальный API
+            value = self.rng.lognormvariate(math.log(max(a.latency_median, 1e-6)), a.latency_sigma)
+        return max(a.latency_min, min(value, a.latency_max))
+
+    def inject_error(self) -> Optional[web.Response]:
+        roll = self.rng.random()
+        a = self.args
+        if roll < a.rate_limit_rate:
+            self.stats["rate_limited"] += 1
+            return web.json_response({"error": {"message": "Rate limit reached"}}, status=429)
+        if roll < a.rate_limit_rate + a.error_rate:
+            self.stats["errors"] += 1
+            return web.json_response({"error": {"message": "Service unavailable"}}, status=a.error_status)
+        return None
+
+    async def resolve_content(self, payload: dict) -> str:
+        key = request_key(payload)
+        if self.args.record:
+            content = await self.fetch_upstream(payload)
+            self.cassette.append(key, content)
+            self.stats["recorded"] += 1
+            return content
+        if self.cassette is not None:
+            content = self.cassette.get(key)
+            if content is not None:
+                self.stats["replayed"] += 1
+                return content
+            if self.args.strict:
+                raise web.HTTPNotFound(text=f"No recorded response for {key}")
+        self.stats["synthetic"] += 1
+        return synthetic_answer(key, int(payload.get("max_tokens") or 512))
+
+    async def fetch_upstream(self, payload: dict) -> str:
+        upstream_payload = dict(payload)
+        upstream_payload.pop("stream", None)
+        async with httpx.AsyncClient(timeout=300) as client:
+            r = await client.post(
+                f"{self.args.upstream}/chat/completions",
+                headers={"Authorization": f"Bearer {self.args.api_key}", "Content-Type": "application/json"},
+                json=upstream_payload,
+            )
+            r.raise_for_status()
+            return r.json()["choices"][0]["message"]["content"]
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        self.stats["requests"] += 1
+        if self.rng.random() < self.args.hang_rate:
+            # Зависший запрос: клиент должен отвалиться по своему таймауту
+            self.stats["hung"] += 1
+            await asyncio.sleep(3600)
+        error = self.inject_error()
+        if error is not None:
+            await asyncio.sleep(self.sample_latency() * 0.1)
+            return error
+        latency = self.sample_latency()
+        started = time.monotonic()
+        content = await self.resolve_content(payload)
+        if payload.get("stream"):
+            self.stats["stream"] += 1
+            return await self.stream_response(request, payload, content, latency)
+        await asyncio.sleep(max(0.0, latency - (time.monotonic() - started)))
+        return web.json_response({
+            "id": f"stub-{self.stats['requests']}",
+            "object": "chat.completion",
+            "model": payload.get("model", "deepseek-chat"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(content.split()), "total_tokens": len(content.split())},
+        })
+
+    async def stream_response(
+        self, request: web.Request, payload: dict, content: str, latency: float
+    ) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        # Время до первого токена - доля общей задержки, остальное распределяем по фрагментам
+        await asyncio.sleep(latency * self.args.first_token_share)
+        pieces = [content[i:i + self.args.chunk_chars] for i in range(0, len(content), self.args.chunk_chars)]
+        per_piece = latency * (1 - self.args.first_token_share) / max(len(pieces), 1)
+        for piece in pieces:
+            chunk = {"choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+            await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            await asyncio.sleep(per_piece)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/chat/completions", self.chat_completions)
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        app.router.add_get("/stats", self.get_stats)
+        return app
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="DeepSeek-совместимый стаб для нагрузочных тестов")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--seed", type=int, default=None, help="Зерно генератора для воспроизводимых прогонов")
+    parser.add_argument("--latency", choices=["fixed", "uniform", "exponential", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-median", type=float, default=1.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Разброс для lognormal")
+    parser.add_argument("--latency-min", type=float, default=0.0)
+    parser.add_argument("--latency-max", type=float, default=60.0)
+    parser.add_argument("--first-token-share", type=float, default=0.3, help="Доля задержки до первого фрагмента потока")
+    parser.add_argument("--chunk-chars", type=int, default=20, help="Размер фрагмента потока в символах")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов с ошибкой --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Доля ответов 429")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Доля запросов, на которые стаб не отвечает")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", help="Проксировать в реальный API и дописывать ответы в JSONL-кассету")
+    mode.add_argument("--replay", help="Отдавать ответы из JSONL-кассеты")
+    parser.add_argument("--strict", action="store_true", help="В режиме replay отвечать 404 на незаписанные запросы")
+    parser.add_argument("--upstream", default=UPSTREAM_URL)
+    parser.add_argument("--api-key", default="", help="Ключ реального API для режима record")
+    args = parser.parse_args(argv)
+    if args.record and not args.api_key:
+        from app.config import settings
+        args.api_key = settings.DEEPSEEK_API_KEY
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    server = StubServer(args)
+    print(f"🤖 DeepSeek stub: http://{args.host}:{args.port} (latency={args.latency}, "
+          f"errors={args.error_rate}, 429={args.rate_limit_rate}, hang={args.hang_rate})")
+    web.run_app(server.build_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    sys.path.append(".")
+    main()
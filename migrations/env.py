@@ -32,6 +32,8 @@ def _get_database_url() -> str:
     if url.startswith("postgresql://"):
         # enforce async driver for SQLAlchemy async engine
         url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    elif url.startswith("sqlite://"):
+        url = url.replace("sqlite://", "sqlite+aiosqlite://", 1)
     # keep alembic's config in sync (offline mode reads from here)
     config.set_main_option("sqlalchemy.url", url)
     return url
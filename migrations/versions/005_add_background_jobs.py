@@ -0,0 +1,52 @@
+"""Add persisted background job queue
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'backgroundjob',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id', ondelete='CASCADE'), nullable=True),
+        sa.Column('chat_id', sa.BigInteger(), nullable=False),
+        sa.Column('kind', sa.String(64), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('pending', 'running', 'done', 'failed', name='jobstatus'),
+            nullable=False,
+        ),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='3'),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('available_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_backgroundjob_user_id', 'backgroundjob', ['user_id'])
+    op.create_index('ix_backgroundjob_kind', 'backgroundjob', ['kind'])
+    op.create_index('ix_backgroundjob_status', 'backgroundjob', ['status'])
+    op.create_index('ix_backgroundjob_available_at', 'backgroundjob', ['available_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_backgroundjob_available_at', table_name='backgroundjob')
+    op.drop_index('ix_backgroundjob_status', table_name='backgroundjob')
+    op.drop_index('ix_backgroundjob_kind', table_name='backgroundjob')
+    op.drop_index('ix_backgroundjob_user_id', table_name='backgroundjob')
+    op.drop_table('backgroundjob')
+    sa.Enum(name='jobstatus').drop(op.get_bind(), checkfirst=True)
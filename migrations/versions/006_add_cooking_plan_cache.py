@@ -0,0 +1,34 @@
+"""Add shared cooking plan cache
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'cookingplanvariant',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('bucket_key', sa.String(128), nullable=False),
+        sa.Column('variant', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('plan', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.UniqueConstraint('bucket_key', 'variant', name='uq_cookingplanvariant_bucket_variant'),
+    )
+    op.create_index('ix_cookingplanvariant_bucket_key', 'cookingplanvariant', ['bucket_key'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cookingplanvariant_bucket_key', table_name='cookingplanvariant')
+    op.drop_table('cookingplanvariant')
@@ -0,0 +1,35 @@
+"""Add prepared perfect day plans
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'perfectdayplan',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('plan_date', sa.Date(), nullable=False),
+        sa.Column('context_hash', sa.String(64), nullable=False),
+        sa.Column('plan', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.UniqueConstraint('user_id', 'plan_date', name='uq_perfectdayplan_user_date'),
+    )
+    op.create_index('ix_perfectdayplan_user_id', 'perfectdayplan', ['user_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_perfectdayplan_user_id', table_name='perfectdayplan')
+    op.drop_table('perfectdayplan')
@@ -0,0 +1,36 @@
+"""Add indexes for todo lists and todo reminders
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index('ix_todos_user_id', 'todos', ['user_id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_todos_user_due_completed', 'todos', ['user_id', 'due_date', 'is_completed'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_todos_reminder_active_time', 'todos', ['is_reminder_active', 'reminder_time'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_todos_reminder_active_time', table_name='todos',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_todos_user_due_completed', table_name='todos',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_todos_user_id', table_name='todos',
+                      postgresql_concurrently=True, if_exists=True)
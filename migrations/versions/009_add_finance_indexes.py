@@ -0,0 +1,36 @@
+"""Add indexes for finance transactions, creditors and debtors
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19 18:05:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index('ix_financetransaction_user_date', 'financetransaction', ['user_id', 'date'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_creditor_user_active_due', 'creditor', ['user_id', 'is_active', 'due_date'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_debtor_user_active_due', 'debtor', ['user_id', 'is_active', 'due_date'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_debtor_user_active_due', table_name='debtor',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_creditor_user_active_due', table_name='creditor',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_financetransaction_user_date', table_name='financetransaction',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,67 @@
+"""Make health metrics unique per user and day
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19 18:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+METRIC_COLUMNS = (
+    'steps', 'calories', 'sleep_minutes', 'heart_rate_resting',
+    'weight_kg', 'systolic', 'diastolic', 'source',
+)
+
+healthmetric = sa.table(
+    'healthmetric',
+    sa.column('id', sa.Integer),
+    sa.column('user_id', sa.Integer),
+    sa.column('day', sa.Date),
+    *(sa.column(name) for name in METRIC_COLUMNS),
+)
+
+
+def _merge_duplicates() -> None:
+    """Сливает дубликаты (user_id, day) в самую новую запись, заполняя ее пустые поля."""
+    conn = op.get_bind()
+    duplicates = conn.execute(
+        sa.select(healthmetric.c.user_id, healthmetric.c.day)
+        .group_by(healthmetric.c.user_id, healthmetric.c.day)
+        .having(sa.func.count() > 1)
+    ).all()
+    for user_id, day in duplicates:
+        rows = conn.execute(
+            sa.select(healthmetric)
+            .where(healthmetric.c.user_id == user_id, healthmetric.c.day == day)
+            .order_by(healthmetric.c.id.desc())
+        ).mappings().all()
+        keep, older = rows[0], rows[1:]
+        values = {}
+        for name in METRIC_COLUMNS:
+            if keep[name] is None:
+                values[name] = next((row[name] for row in older if row[name] is not None), None)
+        if any(value is not None for value in values.values()):
+            conn.execute(healthmetric.update().where(healthmetric.c.id == keep['id']).values(**values))
+        conn.execute(healthmetric.delete().where(healthmetric.c.id.in_([row['id'] for row in older])))
+
+
+def upgrade() -> None:
+    _merge_duplicates()
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index('uq_healthmetric_user_day', 'healthmetric', ['user_id', 'day'], unique=True,
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_healthmetric_user_day', table_name='healthmetric',
+                      postgresql_concurrently=True, if_exists=True)
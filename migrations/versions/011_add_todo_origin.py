@@ -0,0 +1,103 @@
+"""Add typed origin columns to todos
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+ORIGINS = ('manual', 'creditor', 'debtor', 'goal', 'nutrition_cooking', 'nutrition_shopping', 'perfect_day')
+todoorigin = sa.Enum(*ORIGINS, name='todoorigin')
+
+# Префиксы описаний, которыми раньше помечались автоматически созданные задачи
+DESCRIPTION_PREFIXES = (
+    ('Финансовое обязательство: Кредитор ID:', 'creditor'),
+    ('Финансовое обязательство: Должник ID:', 'debtor'),
+    ('Задача питания: Время готовки', 'nutrition_cooking'),
+    ('Задача питания: Покупки', 'nutrition_shopping'),
+    ('Ежедневная задача для достижения цели:', 'goal'),
+    ('Из плана идеального дня:', 'perfect_day'),
+)
+GOAL_PREFIX = 'Ежедневная задача для достижения цели: '
+
+todos = sa.table(
+    'todos',
+    sa.column('id', sa.Integer),
+    sa.column('user_id', sa.Integer),
+    sa.column('description', sa.Text),
+    sa.column('origin', todoorigin),
+    sa.column('origin_ref_id', sa.Integer),
+)
+nutritionreminder = sa.table('nutritionreminder', sa.column('id', sa.Integer), sa.column('user_id', sa.Integer))
+goal = sa.table('goal', sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('title', sa.String))
+
+
+def _backfill() -> None:
+    """Переносит метки из описаний в origin/origin_ref_id."""
+    conn = op.get_bind()
+    for prefix, value in DESCRIPTION_PREFIXES:
+        conn.execute(
+            todos.update()
+            .where(todos.c.description.like(prefix + '%'), todos.c.origin == 'manual')
+            .values(origin=value)
+        )
+
+    # Финансовые задачи: ID кредитора/должника записан в описании
+    rows = conn.execute(
+        sa.select(todos.c.id, todos.c.description).where(todos.c.origin.in_(['creditor', 'debtor']))
+    ).all()
+    for todo_id, description in rows:
+        match = re.search(r'ID:\s*(\d+)', description or '')
+        if match:
+            conn.execute(todos.update().where(todos.c.id == todo_id).values(origin_ref_id=int(match.group(1))))
+
+    # Задачи питания: у пользователя одна запись настроек напоминаний
+    reminders = dict(conn.execute(sa.select(nutritionreminder.c.user_id, nutritionreminder.c.id)).all())
+    rows = conn.execute(
+        sa.select(todos.c.id, todos.c.user_id)
+        .where(todos.c.origin.in_(['nutrition_cooking', 'nutrition_shopping']))
+    ).all()
+    for todo_id, user_id in rows:
+        if user_id in reminders:
+            conn.execute(todos.update().where(todos.c.id == todo_id).values(origin_ref_id=reminders[user_id]))
+
+    # Задачи целей: цель находим по названию после префикса
+    goals = {(user_id, title): goal_id for goal_id, user_id, title in conn.execute(sa.select(goal)).all()}
+    rows = conn.execute(
+        sa.select(todos.c.id, todos.c.user_id, todos.c.description).where(todos.c.origin == 'goal')
+    ).all()
+    for todo_id, user_id, description in rows:
+        goal_id = goals.get((user_id, (description or '')[len(GOAL_PREFIX):]))
+        if goal_id is not None:
+            conn.execute(todos.update().where(todos.c.id == todo_id).values(origin_ref_id=goal_id))
+
+
+def upgrade() -> None:
+    todoorigin.create(op.get_bind(), checkfirst=True)
+    op.add_column('todos', sa.Column('origin', todoorigin, nullable=False, server_default='manual'))
+    op.add_column('todos', sa.Column('origin_ref_id', sa.Integer(), nullable=True))
+    _backfill()
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index('ix_todos_user_origin_due', 'todos', ['user_id', 'origin', 'due_date'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_todos_user_origin_due', table_name='todos',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_column('todos', 'origin_ref_id')
+    op.drop_column('todos', 'origin')
+    todoorigin.drop(op.get_bind(), checkfirst=True)
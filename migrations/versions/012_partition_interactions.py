@@ -0,0 +1,96 @@
+"""Partition interaction history by month (PostgreSQL)
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+# Партиции создаются заранее на столько месяцев вперед; дальше их ведет планировщик
+PARTITIONS_AHEAD = 2
+COLUMNS = 'id, user_id, message_text, command, meta, created_at'
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _rename_existing(suffix: str) -> str:
+    """Переименовывает текущую таблицу interaction с индексами, возвращает ее последовательность id."""
+    table = f'interaction_{suffix}'
+    op.execute(f'ALTER TABLE interaction RENAME TO {table}')
+    op.execute(f'ALTER TABLE {table} RENAME CONSTRAINT interaction_pkey TO {table}_pkey')
+    op.execute(f'ALTER INDEX IF EXISTS ix_interaction_user_id RENAME TO ix_{table}_user_id')
+    op.execute(f'ALTER INDEX IF EXISTS ix_interaction_created_at RENAME TO ix_{table}_created_at')
+    sequence = op.get_bind().execute(sa.text(f"SELECT pg_get_serial_sequence('{table}', 'id')")).scalar()
+    if sequence is None:
+        op.execute('CREATE SEQUENCE IF NOT EXISTS interaction_id_seq')
+        sequence = 'interaction_id_seq'
+    return sequence
+
+
+def _create_table(sequence: str, partition_by: str = '') -> None:
+    primary_key = '(id, created_at)' if partition_by else '(id)'
+    op.execute(f"""
+        CREATE TABLE interaction (
+            id INTEGER NOT NULL DEFAULT nextval('{sequence}'::regclass),
+            user_id INTEGER NOT NULL REFERENCES "user" (id) ON DELETE CASCADE,
+            message_text VARCHAR(4096),
+            command VARCHAR(128),
+            meta JSON NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            CONSTRAINT interaction_pkey PRIMARY KEY {primary_key}
+        ) {partition_by}
+    """)
+    op.execute(f'ALTER SEQUENCE {sequence} OWNED BY interaction.id')
+    op.create_index('ix_interaction_user_id', 'interaction', ['user_id'])
+    op.create_index('ix_interaction_created_at', 'interaction', ['created_at'])
+
+
+def _copy_from(table: str, sequence: str) -> None:
+    op.execute(f'INSERT INTO interaction ({COLUMNS}) SELECT {COLUMNS} FROM {table}')
+    op.execute(f"SELECT setval('{sequence}', COALESCE((SELECT max(id) FROM interaction), 0) + 1, false)")
+    op.execute(f'DROP TABLE {table}')
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        # SQLite и прочие: таблица остается обычной, срок хранения - пакетным удалением
+        return
+    sequence = _rename_existing('unpartitioned')
+    _create_table(sequence, partition_by='PARTITION BY RANGE (created_at)')
+
+    first = op.get_bind().execute(sa.text('SELECT min(created_at) FROM interaction_unpartitioned')).scalar()
+    this_month = date.today().replace(day=1)
+    month = first.date().replace(day=1) if first else this_month
+    while month <= _add_months(this_month, PARTITIONS_AHEAD):
+        op.execute(
+            f"CREATE TABLE interaction_p{month:%Y%m} PARTITION OF interaction "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    # Страховка для строк вне созданных месяцев (например, если планировщик не запускался)
+    op.execute('CREATE TABLE interaction_default PARTITION OF interaction DEFAULT')
+
+    _copy_from('interaction_unpartitioned', sequence)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    sequence = _rename_existing('partitioned')
+    _create_table(sequence)
+    # DROP родительской таблицы удаляет и все ее партиции
+    _copy_from('interaction_partitioned', sequence)
@@ -0,0 +1,43 @@
+"""Make generated finance todos unique per obligation and day
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+FINANCE_ORIGINS = "origin IN ('creditor', 'debtor')"
+
+
+def upgrade() -> None:
+    # Оставляем самую раннюю из задач-дубликатов по одному обязательству за день
+    op.execute(f"""
+        DELETE FROM todos
+        WHERE {FINANCE_ORIGINS} AND origin_ref_id IS NOT NULL
+          AND id NOT IN (
+              SELECT min(id) FROM todos
+              WHERE {FINANCE_ORIGINS} AND origin_ref_id IS NOT NULL
+              GROUP BY origin, origin_ref_id, due_date
+          )
+    """)
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index('uq_todos_finance_origin_due', 'todos', ['origin', 'origin_ref_id', 'due_date'],
+                        unique=True,
+                        postgresql_where=sa.text(FINANCE_ORIGINS), sqlite_where=sa.text(FINANCE_ORIGINS),
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_todos_finance_origin_due', table_name='todos',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Тест пакетного создания задач по финансовым обязательствам: один INSERT ...
+SELECT на всех пользователей, повторный запуск не создает дублей благодаря
+уникальному индексу (origin, origin_ref_id, due_date).
+
+Запуск: python3 test_finance_todos.py (временная база SQLite)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.db.models import Creditor, Debtor, Todo, TodoOrigin, User
+from app.services.finance_todo_manager import create_financial_todos_for_users
+
+TODAY = date(2026, 10, 19)
+
+
+def _obligation(user_id: int, name: str, due_date: date, is_active: bool = True) -> Dict:
+    return {
+        "user_id": user_id, "name": name, "amount": Decimal("1500.5"), "due_date": due_date,
+        "description": None, "is_active": is_active,
+    }
+
+
+async def run_scenario(database_url: str) -> Dict[str, object]:
+    engine = create_async_engine(database_url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(insert(User), [{"telegram_id": n, "notification_preferences": {}} for n in (1, 2, 3)])
+            await conn.execute(insert(Creditor), [
+                _obligation(1, "Иван", TODAY),
+                _obligation(2, "Петр", TODAY),
+                _obligation(1, "Закрыт", TODAY, is_active=False),
+                _obligation(3, "Завтра", TODAY + timedelta(days=1)),
+            ])
+            await conn.execute(insert(Debtor), [_obligation(1, "Банк", TODAY)])
+
+        runs = []
+        for _ in range(2):
+            async with session_factory() as session:
+                runs.append(await create_financial_todos_for_users(session, [1, 2, 3], TODAY))
+                await session.commit()
+        async with session_factory() as session:
+            todos = (await session.execute(select(Todo).order_by(Todo.id))).scalars().all()
+        return {"runs": runs, "todos": todos}
+    finally:
+        await engine.dispose()
+
+
+def test_financial_todos_created_once_per_obligation():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        result = asyncio.run(run_scenario(f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'finance.db')}"))
+    assert result["runs"] == [{1: 2, 2: 1}, {}], result["runs"]
+    todos = result["todos"]
+    assert [(todo.user_id, todo.origin, todo.origin_ref_id) for todo in todos] == [
+        (1, TodoOrigin.creditor, 1), (2, TodoOrigin.creditor, 2), (1, TodoOrigin.debtor, 1),
+    ]
+    assert todos[0].title == "Получить долг от Иван"
+    assert "1500.50 ₽" in todos[0].description
+    assert all(todo.due_date == TODAY and not todo.is_completed for todo in todos)
+
+
+if __name__ == "__main__":
+    test_financial_todos_created_once_per_obligation()
+    print("✅ Задачи по финансовым обязательствам создаются один раз")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Горячие запросы на lambda_stmt: закешированная форма запроса должна
+подставлять новые значения параметров при каждом вызове.
+
+Запуск: python3 test_hot_queries.py (SQLite в памяти)
+"""
+
+import asyncio
+import os
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.db.hot_queries import (
+    open_todos, overdue_creditors, upcoming_debtors, user_by_telegram_id,
+)
+from app.db.models import Creditor, Debtor, Todo, User
+
+TODAY = date(2026, 10, 19)
+
+
+async def run_scenario() -> Dict[str, List]:
+    engine = create_async_engine("sqlite+aiosqlite://")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(insert(User), [{"telegram_id": 100 + n, "notification_preferences": {}} for n in (1, 2)])
+            await conn.execute(insert(Todo), [
+                {"user_id": user_id, "title": f"{user_id}-{n}", "due_date": TODAY,
+                 "is_completed": n == 0, "priority": "medium"}
+                for user_id in (1, 2) for n in range(3)
+            ])
+            for model in (Creditor, Debtor):
+                await conn.execute(insert(model), [
+                    {"user_id": user_id, "name": f"{user_id}-{days}", "amount": Decimal(1),
+                     "due_date": TODAY + timedelta(days=days), "is_active": True}
+                    for user_id in (1, 2) for days in (-2, 1, 5)
+                ])
+        async with AsyncSession(engine) as session:
+            async def rows(statement) -> List:
+                return (await session.execute(statement)).scalars().all()
+
+            return {
+                "users": [(await rows(user_by_telegram_id(telegram_id)))[0].id for telegram_id in (102, 101)],
+                "todos": [sorted(t.title for t in await rows(open_todos(user_id))) for user_id in (1, 2)],
+                "overdue": [[c.name for c in await rows(overdue_creditors(user_id, TODAY))] for user_id in (2, 1)],
+                "upcoming": [
+                    [d.name for d in await rows(upcoming_debtors(1, TODAY, TODAY + timedelta(days=days)))]
+                    for days in (3, 7)
+                ],
+            }
+    finally:
+        await engine.dispose()
+
+
+def test_hot_queries_bind_new_values():
+    result = asyncio.run(run_scenario())
+    assert result["users"] == [2, 1]
+    assert result["todos"] == [["1-1", "1-2"], ["2-1", "2-2"]]
+    assert result["overdue"] == [["2--2"], ["1--2"]]
+    assert result["upcoming"] == [["1-1"], ["1-1", "1-5"]]
+
+
+if __name__ == "__main__":
+    test_hot_queries_bind_new_values()
+    print("✅ Горячие запросы подставляют актуальные параметры")
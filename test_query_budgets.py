@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Бюджеты SQL-запросов обработчиков: апдейты прогоняются через диспетчер с
+теми же middleware, что и в боте, в строгом режиме (DB_QUERY_BUDGET_STRICT),
+поэтому обработчик с флагом query_budget, превысивший бюджет, роняет тест.
+Запросы к Telegram API не отправляются, а только записываются.
+
+Запуск: python3 test_query_budgets.py (временная база SQLite)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import date, datetime
+from typing import Any, Dict, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+_TMP_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_TMP_DIR, 'budgets.db')}"
+os.environ.pop("DATABASE_REPLICA_URL", None)
+os.environ["DB_QUERY_BUDGET_STRICT"] = "true"
+os.environ["DB_QUERY_DEBUG"] = "true"
+os.environ.setdefault("BOT_TOKEN", "42:TEST")
+os.environ.setdefault("DEEPSEEK_API_KEY", "test")
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.types import CallbackQuery, Chat, Message, Update, User as TelegramUser
+from sqlalchemy import insert
+
+from app.db.models import Creditor, Debtor, FinanceTransaction, Todo, User
+from app.db.query_metrics import QueryBudgetExceeded, query_metrics, track_queries
+from app.db.session import create_all, dispose_engines, session_scope
+from app.handlers import setup_routers
+from app.middlewares import DbSessionMiddleware, QueryTrackingMiddleware, UserProfileMiddleware
+from app.services.finance_analytics import get_finance_summary
+from app.services.user_profile import profile_cache
+
+TELEGRAM_ID = 777
+
+# Настройки могли быть прочитаны раньше (другой тестовый модуль в том же
+# процессе pytest), поэтому режимы детектора включаем явно
+query_metrics.strict_budgets = True
+query_metrics.detect_n_plus_one = True
+
+
+class RecordingSession(BaseSession):
+    """Вместо запросов к Telegram API запоминает вызванные методы."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: List[Any] = []
+
+    async def make_request(self, bot: Bot, method: Any, timeout: Any = None) -> Any:
+        self.calls.append(method)
+        return True
+
+    async def stream_content(self, *args: Any, **kwargs: Any) -> Any:  # pragma: no cover
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+def build_dispatcher() -> Dispatcher:
+    dp = Dispatcher()
+    for observer in (dp.message, dp.callback_query):
+        observer.middleware(QueryTrackingMiddleware())
+        observer.middleware(UserProfileMiddleware())
+        observer.middleware(DbSessionMiddleware())
+    dp.include_router(setup_routers())
+    return dp
+
+
+def callback_update(update_id: int, data: str) -> Update:
+    user = TelegramUser(id=TELEGRAM_ID, is_bot=False, first_name="Test")
+    message = Message(message_id=1, date=datetime.now(), chat=Chat(id=TELEGRAM_ID, type="private"), text="menu")
+    return Update(
+        update_id=update_id,
+        callback_query=CallbackQuery(id=str(update_id), from_user=user, chat_instance="test", data=data, message=message),
+    )
+
+
+async def run_budgeted_handlers() -> List[Any]:
+    await create_all()
+    bot = Bot(token=os.environ["BOT_TOKEN"], session=RecordingSession())
+    dp = build_dispatcher()
+    try:
+        # Первый апдейт создает пользователя, затем задачи для экранов списка
+        await dp.feed_update(bot, callback_update(1, "todo_list"))
+        async with session_scope() as session:
+            profile_id = profile_cache.get(TELEGRAM_ID).id
+            await session.execute(insert(Todo), [
+                {"user_id": profile_id, "title": f"Задача {n}", "due_date": date.today(),
+                 "is_completed": n % 2 == 0, "priority": "medium"}
+                for n in range(20)
+            ])
+        screens = ("todo_list", "todo_completed", "todo_view:1", "books_stats", "overdue_analysis")
+        for update_id, data in enumerate(screens, start=2):
+            # Промах кеша профиля - худший случай для бюджета
+            profile_cache.clear()
+            await dp.feed_update(bot, callback_update(update_id, data))
+        return bot.session.calls
+    finally:
+        await dispose_engines()
+
+
+async def run_finance_summary() -> Tuple[Dict[str, float], int]:
+    await create_all()
+    try:
+        async with session_scope() as session:
+            user = User(telegram_id=TELEGRAM_ID + 1, notification_preferences={})
+            session.add(user)
+            await session.flush()
+            today = date.today()
+            session.add_all([
+                FinanceTransaction(user_id=user.id, amount=1000, category="Зарплата", date=today),
+                FinanceTransaction(user_id=user.id, amount=-250, category="Транспорт", date=today),
+                Creditor(user_id=user.id, name="Иван", amount=300, due_date=today),
+                Debtor(user_id=user.id, name="Банк", amount=50, due_date=today, is_active=False),
+            ])
+            await session.flush()
+            with track_queries("test.finance_summary") as scope:
+                summary = await get_finance_summary(session, user.id)
+        return summary, scope.count
+    finally:
+        await dispose_engines()
+
+
+def test_handlers_stay_within_query_budgets():
+    calls = asyncio.run(run_budgeted_handlers())
+    assert calls, "обработчики не ответили в Telegram"
+
+
+def test_finance_summary_is_single_query():
+    summary, statements = asyncio.run(run_finance_summary())
+    assert statements == 1, statements
+    assert summary == {
+        "monthly_income": 1000.0, "monthly_expenses": 250.0, "monthly_balance": 750.0,
+        "total_creditors": 300.0, "total_debtors": 0.0,
+    }, summary
+
+
+def test_budget_violation_raises_in_strict_mode():
+    try:
+        with track_queries("test.over_budget", budget=0) as scope:
+            scope.count = 1
+    except QueryBudgetExceeded:
+        return
+    raise AssertionError("QueryBudgetExceeded не был брошен")
+
+
+def test_repeated_statements_are_flagged():
+    with track_queries("test.n_plus_one") as scope:
+        for _ in range(query_metrics.n_plus_one_threshold):
+            query_metrics.record("SELECT todos.id FROM todos WHERE todos.id IN (?, ?)", 1.0)
+        query_metrics.record("SELECT todos.id FROM todos WHERE todos.id IN (?, ?, ?)", 1.0)
+    assert scope.repeated == {
+        "SELECT todos.id FROM todos WHERE todos.id IN (?...)": query_metrics.n_plus_one_threshold + 1
+    }, scope.repeated
+
+
+if __name__ == "__main__":
+    test_budget_violation_raises_in_strict_mode()
+    test_repeated_statements_are_flagged()
+    test_handlers_stay_within_query_budgets()
+    test_finance_summary_is_single_query()
+    print("✅ Обработчики укладываются в бюджеты SQL-запросов")
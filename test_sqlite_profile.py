@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Профиль встроенной SQLite: WAL и pragma на соединениях, один писатель с
+очередью в пуле, читатели только для чтения, SAVEPOINT, а также полный
+проход миграций Alembic вниз и вверх без расхождений со схемой моделей.
+
+Запуск: python3 test_sqlite_profile.py (временная база SQLite)
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(ROOT)
+
+_TMP_DIR = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(_TMP_DIR, 'app.db')}")
+os.environ.setdefault("BOT_TOKEN", "42:TEST")
+os.environ.setdefault("DEEPSEEK_API_KEY", "test")
+
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, func, insert, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.db.base import Base
+from app.db.models import User
+from app.db.session import create_schema
+from app.db.sqlite import install_sqlite_profile, sqlite_engine_options
+
+WRITERS = 30
+
+
+def build_engine(database_url: str, readonly: bool = False) -> AsyncEngine:
+    url = make_url(database_url)
+    engine = create_async_engine(url, **sqlite_engine_options(url, readonly))
+    install_sqlite_profile(engine, readonly)
+    return engine
+
+
+async def run_scenario(database_url: str) -> Dict[str, object]:
+    writer = build_engine(database_url)
+    reader = build_engine(database_url, readonly=True)
+    try:
+        async with writer.begin() as conn:
+            await conn.run_sync(create_schema)
+        async with writer.connect() as conn:
+            pragmas = {
+                name: (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+                for name in ("journal_mode", "synchronous", "foreign_keys")
+            }
+            revision = (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+
+        async def write(n: int) -> None:
+            async with writer.begin() as conn:
+                await conn.execute(insert(User).values(telegram_id=n, notification_preferences={}))
+                await asyncio.sleep(0.001)
+
+        async def read() -> int:
+            async with reader.connect() as conn:
+                return (await conn.execute(select(func.count()).select_from(User))).scalar()
+
+        # Писатели ждут единственное соединение, читатели идут параллельно
+        results = await asyncio.gather(*(write(n) for n in range(WRITERS)), *(read() for _ in range(10)))
+        reads: List[int] = [value for value in results if value is not None]
+
+        # SAVEPOINT: откатывается только вложенный блок
+        async with writer.begin() as conn:
+            nested = await conn.begin_nested()
+            await conn.execute(insert(User).values(telegram_id=-1, notification_preferences={}))
+            await nested.rollback()
+            await conn.execute(insert(User).values(telegram_id=-2, notification_preferences={}))
+
+        read_only_rejected = False
+        try:
+            async with reader.begin() as conn:
+                await conn.execute(insert(User).values(telegram_id=-3, notification_preferences={}))
+        except OperationalError:
+            read_only_rejected = True
+
+        async with reader.connect() as conn:
+            telegram_ids = set((await conn.execute(select(User.telegram_id))).scalars().all())
+        return {
+            "pragmas": pragmas, "revision": revision, "reads": reads,
+            "telegram_ids": telegram_ids, "read_only_rejected": read_only_rejected,
+        }
+    finally:
+        await writer.dispose()
+        await reader.dispose()
+
+
+def alembic(database_url: str, *args: str) -> None:
+    env = dict(os.environ, DATABASE_URL=database_url)
+    subprocess.run([sys.executable, "-m", "alembic", *args], cwd=ROOT, env=env, check=True, capture_output=True)
+
+
+def test_sqlite_profile():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        result = asyncio.run(run_scenario(f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'profile.db')}"))
+    assert result["pragmas"] == {"journal_mode": "wal", "synchronous": 1, "foreign_keys": 1}, result["pragmas"]
+    assert result["revision"] is not None
+    assert all(0 <= count <= WRITERS for count in result["reads"])
+    assert result["telegram_ids"] == set(range(WRITERS)) | {-2}
+    assert result["read_only_rejected"]
+
+
+def test_migrations_round_trip_on_sqlite():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "migrations.db")
+        asyncio.run(run_scenario(f"sqlite+aiosqlite:///{path}"))
+        alembic(f"sqlite:///{path}", "downgrade", "base")
+        alembic(f"sqlite:///{path}", "upgrade", "head")
+        engine = create_engine(f"sqlite:///{path}")
+        try:
+            with engine.connect() as conn:
+                diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+        finally:
+            engine.dispose()
+    assert diff == [], diff
+
+
+if __name__ == "__main__":
+    test_sqlite_profile()
+    test_migrations_round_trip_on_sqlite()
+    print("✅ Профиль SQLite и миграции работают")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Копирование задач на другую дату (кнопка "скопировать сегодня на завтра"):
+копии - ручные задачи, поэтому повторное копирование задач по кредиторам и
+должникам не упирается в уникальный индекс uq_todos_finance_origin_due.
+
+Запуск: python3 test_todo_copy.py (временная база SQLite)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+from typing import Dict
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+_TMP_DIR = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(_TMP_DIR, 'app.db')}")
+os.environ.setdefault("BOT_TOKEN", "42:TEST")
+os.environ.setdefault("DEEPSEEK_API_KEY", "test")
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.db.models import Todo, TodoOrigin, User
+from app.services.todo_operations import copy_todos
+
+TODAY = date(2026, 10, 19)
+TOMORROW = TODAY + timedelta(days=1)
+
+
+async def run_scenario(database_url: str) -> Dict[str, object]:
+    engine = create_async_engine(database_url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(insert(User), [{"telegram_id": 1, "notification_preferences": {}}])
+            await conn.execute(insert(Todo), [
+                {"user_id": 1, "title": "Получить долг от Иван", "due_date": TODAY, "is_completed": True,
+                 "priority": "high", "origin": TodoOrigin.creditor, "origin_ref_id": 1},
+                {"user_id": 1, "title": "Своя задача", "due_date": TODAY, "is_completed": False,
+                 "priority": "medium", "origin": TodoOrigin.manual, "origin_ref_id": None},
+            ])
+
+        copies = []
+        for _ in range(2):
+            async with session_factory() as session:
+                copies.append(await copy_todos(session, 1, TODAY, TODAY, TOMORROW))
+                await session.commit()
+        async with session_factory() as session:
+            copied = (await session.execute(
+                select(Todo).where(Todo.due_date == TOMORROW).order_by(Todo.id)
+            )).scalars().all()
+        return {"copies": copies, "copied": copied}
+    finally:
+        await engine.dispose()
+
+
+def test_copying_twice_creates_manual_todos():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        result = asyncio.run(run_scenario(f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'copy.db')}"))
+    assert [len(ids) for ids in result["copies"]] == [2, 2], result["copies"]
+    copied = result["copied"]
+    assert [todo.title for todo in copied] == ["Получить долг от Иван", "Своя задача"] * 2
+    assert all(todo.origin == TodoOrigin.manual and todo.origin_ref_id is None for todo in copied)
+    assert all(not todo.is_completed for todo in copied)
+    assert copied[0].priority == "high"
+
+
+if __name__ == "__main__":
+    test_copying_twice_creates_manual_todos()
+    print("✅ Копирование задач можно повторять")